@@ -1,82 +1,76 @@
 from fastapi import APIRouter, HTTPException, Header
-from app.core.config import settings
+from app.services.embedding_jobs import submit_reembed
+from app.services.job_manager import job_manager
 import logging
-import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-_reembed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reembed")
-_reembed_running = False
 
-
-def _run_reembed():
-    global _reembed_running
-    try:
-        import sys
-        app_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        if app_root not in sys.path:
-            sys.path.insert(0, app_root)
-
-        from scripts.embed_initial_data import embed_portfolio_data, embed_documentation, embed_security_logs, embed_private_readmes
-        logger.info("[reembed] Embedding portfolio and documentation...")
-        embed_portfolio_data()
-        embed_documentation()
-
-        logger.info("[reembed] Embedding private repo notes...")
-        embed_private_readmes()
-
-        logger.info("[reembed] Embedding security logs and attack patterns...")
-        embed_security_logs()
-
-        github_token = settings.GITHUB_TOKEN or os.getenv("GITHUB_TOKEN")
-        if github_token:
-            logger.info("[reembed] Fetching and embedding GitHub repositories...")
-            from scripts.fetch_github_repos import embed_github_repos
-            embed_github_repos(github_token)
-            logger.info("[reembed] GitHub repositories done.")
-        else:
-            logger.warning("[reembed] GITHUB_TOKEN not set — skipping GitHub repos.")
-
-        logger.info("[reembed] Re-embedding complete.")
-    except Exception as e:
-        logger.error(f"[reembed] Failed: {e}", exc_info=True)
-    finally:
-        _reembed_running = False
+def _check_admin_token(x_admin_token: str) -> None:
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or x_admin_token != admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 
 @router.post("/reembed")
 async def trigger_reembed(x_admin_token: str = Header(...)):
     """Trigger re-embedding of all portfolio data and GitHub repositories."""
-    global _reembed_running
-
-    admin_token = os.getenv("ADMIN_TOKEN")
-    if not admin_token or x_admin_token != admin_token:
-        raise HTTPException(status_code=401, detail="Invalid admin token")
+    _check_admin_token(x_admin_token)
 
-    if _reembed_running:
-        return {"status": "already_running", "message": "Re-embedding is already in progress"}
+    job, created = submit_reembed()
+    if not created:
+        return {
+            "status": "already_running",
+            "message": "Re-embedding is already in progress",
+            "job_id": job.id,
+        }
 
-    _reembed_running = True
-    loop = asyncio.get_event_loop()
-    loop.run_in_executor(_reembed_executor, _run_reembed)
-
-    return {"status": "started", "message": "Re-embedding started in background. Check service logs for progress."}
+    return {
+        "status": "started",
+        "message": f"Re-embedding started in background. Follow progress at /api/admin/jobs/{job.id}.",
+        "job_id": job.id,
+    }
 
 
 @router.get("/status")
 async def reembed_status(x_admin_token: str = Header(...)):
     """Check if re-embedding is currently running."""
-    admin_token = os.getenv("ADMIN_TOKEN")
-    if not admin_token or x_admin_token != admin_token:
-        raise HTTPException(status_code=401, detail="Invalid admin token")
+    _check_admin_token(x_admin_token)
 
     from app.services.chroma_service import chroma_service
-    stats = chroma_service.get_stats()
 
     return {
-        "reembed_running": _reembed_running,
-        "collections": stats,
+        "reembed_running": job_manager.is_running("reembed"),
+        "ready": chroma_service.readiness(),
+        # Counting would block until the warm-up finishes
+        "collections": chroma_service.get_stats() if chroma_service.is_ready else None,
     }
+
+
+@router.get("/jobs")
+async def list_jobs(x_admin_token: str = Header(...)):
+    """List background embedding jobs (newest first) with progress, throughput and ETA."""
+    _check_admin_token(x_admin_token)
+    return {"jobs": job_manager.list()}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, x_admin_token: str = Header(...)):
+    """Get one background job's per-stage progress, throughput and ETA."""
+    _check_admin_token(x_admin_token)
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, x_admin_token: str = Header(...)):
+    """Cancel a job; a running one stops after its current embedding batch."""
+    _check_admin_token(x_admin_token)
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
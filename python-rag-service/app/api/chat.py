@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.schemas import ChatRequest, ChatResponse
 from app.services.rag_service import rag_service
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,3 +38,34 @@ async def chat(request: ChatRequest):
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint with RAG support (Server-Sent Events).
+
+    Event sequence:
+    - `sources`: RAG metadata (same shape as ChatResponse.metadata)
+    - `token`: `{"content": "..."}` for each generated text delta
+    - `done` once the completion finishes, or `error` on failure
+    """
+    messages = [msg.model_dump() for msg in request.messages]
+
+    async def event_stream():
+        async for event in rag_service.chat_stream(
+            messages=messages,
+            use_rag=request.use_rag,
+            collections=request.collections,
+        ):
+            data = json.dumps(event["data"], ensure_ascii=False, default=str)
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering
+        },
+    )
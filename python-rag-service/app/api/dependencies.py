@@ -0,0 +1,24 @@
+from fastapi import HTTPException
+from app.services.chroma_service import chroma_service
+
+WARMUP_RETRY_AFTER_SECONDS = 5
+
+
+async def require_chroma_ready() -> None:
+    """
+    Fail fast with 503 until ChromaDB and the embedding model are loaded.
+
+    Checked without blocking, so data endpoints never hold the event loop
+    while the warm-up thread is still running.
+    """
+    if chroma_service.is_ready:
+        return
+    readiness = chroma_service.readiness()
+    if readiness["status"] == "warming_up":
+        chroma_service.start_warmup()
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base is warming up, try again shortly",
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER_SECONDS)},
+        )
+    raise HTTPException(status_code=503, detail=f"Knowledge base unavailable: {readiness['error']}")
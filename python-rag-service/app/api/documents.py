@@ -1,75 +1,188 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from app.api.dependencies import require_chroma_ready
+from app.core.config import settings
 from app.models.schemas import DocumentUpload
+from app.services.bulk_ingest import bulk_ingestor
 from app.services.chroma_service import chroma_service
-from typing import Optional
+from app.services.chunking import build_chunk_records
+from app.services.document_extraction import document_extractor
+from app.workers.extraction import ExtractionError, file_extension
+from typing import AsyncIterator, Optional
+import json
 import logging
+import os
+import shutil
+import tempfile
 import uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024  # Multipart headers and the non-file fields
+UPLOAD_COPY_CHUNK_BYTES = 1024 * 1024
 
-@router.post("/upload")
-async def upload_document(
-    file: UploadFile = File(...),
-    collection: str = Form(...),
-    metadata: Optional[str] = Form(None),
-):
+# The form is parsed by hand (to bound its size), so describe it for the docs
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "collection"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "collection": {"type": "string"},
+                        "metadata": {"type": "string", "description": "JSON object"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+class _UploadTooLarge(MultiPartException):
+    """Raised from the body stream; as a MultiPartException, the parser closes the parts it spooled."""
+
+
+async def _limited_stream(request: Request, max_bytes: int) -> AsyncIterator[bytes]:
+    """Yield the request body, failing as soon as it grows past max_bytes."""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise _UploadTooLarge(f"Upload exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+        yield chunk
+
+
+async def _read_upload_form(request: Request) -> FormData:
+    """
+    Parse the multipart upload with the size limit enforced while reading.
+
+    File parts are spooled (to disk past 1 MB) by Starlette's parser, so an
+    upload never sits in memory whole and an oversized one is cut off at the
+    limit instead of being read to the end.
+    """
+    max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + UPLOAD_FORM_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
+
+    parser = MultiPartParser(request.headers, _limited_stream(request, max_bytes), max_files=1, max_fields=10)
+    try:
+        return await parser.parse()
+    except _UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+def _spool_to_disk(upload: UploadFile, extension: str) -> str:
+    """Copy a spooled upload to a named temp file the extraction worker can open."""
+    upload.file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload-", suffix=extension, delete=False) as tmp:
+        shutil.copyfileobj(upload.file, tmp, UPLOAD_COPY_CHUNK_BYTES)
+        return tmp.name
+
+
+@router.post("/upload", openapi_extra=UPLOAD_OPENAPI, dependencies=[Depends(require_chroma_ready)])
+async def upload_document(request: Request):
     """
     Upload and embed a document.
 
-    Supports: .txt, .md, .json, .pdf
+    Form fields: file, collection, metadata (optional JSON object).
+    Supports: ALLOWED_FILE_TYPES (.txt, .md, .json, .pdf by default), up to
+    MAX_UPLOAD_SIZE_MB. Text is extracted in a worker process and long files
+    are split into overlapping, heading-aware chunks.
     """
+    form = await _read_upload_form(request)
+    path = None
     try:
-        # Read file content
-        content = await file.read()
-        text_content = content.decode("utf-8")
+        file = form.get("file")
+        collection = form.get("collection")
+        metadata = form.get("metadata")
+        if not isinstance(file, UploadFile) or not isinstance(collection, str) or not collection:
+            raise HTTPException(status_code=422, detail="Form fields 'file' and 'collection' are required")
+        if file.size and file.size > settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+
+        extension = file_extension(file.filename)
+        allowed = [ext.lower() for ext in settings.allowed_file_types_list]
+        if extension not in allowed:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type '{extension}'. Allowed: {', '.join(allowed)}",
+            )
 
         # Parse metadata if provided
-        import json
         meta = json.loads(metadata) if metadata else {}
+        if not isinstance(meta, dict):
+            raise HTTPException(status_code=400, detail="metadata must be a JSON object")
         meta["filename"] = file.filename
         meta["content_type"] = file.content_type
 
-        # Add to ChromaDB
+        path = await run_in_threadpool(_spool_to_disk, file, extension)
+        text_content = await document_extractor.extract(path, extension)
+
+        # Chunk and add to ChromaDB
         doc_id = str(uuid.uuid4())
-        success = chroma_service.add_documents(
-            collection_name=collection,
-            documents=[text_content],
-            metadatas=[meta],
-            ids=[doc_id],
+        chunks = await bulk_ingestor.ingest_document(
+            collection,
+            text_content,
+            meta,
+            doc_id,
+            markdown=extension not in (".json", ".pdf"),
         )
 
-        if success:
+        if chunks is not None:
             return {
                 "message": "Document uploaded successfully",
                 "document_id": doc_id,
                 "collection": collection,
+                "chunks": chunks,
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to upload document")
 
-    except UnicodeDecodeError:
-        raise HTTPException(
-            status_code=400, detail="File must be text-based (UTF-8 encoded)"
-        )
+    except HTTPException:
+        raise
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="metadata must be a JSON object")
     except Exception as e:
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await form.close()
+        if path:
+            os.remove(path)
 
 
-@router.post("/embed")
+@router.post("/embed", dependencies=[Depends(require_chroma_ready)])
 async def embed_text(doc: DocumentUpload):
     """
     Embed raw text content into a collection.
+
+    Long content is split into overlapping chunks that share the returned
+    document_id as their parent_id.
     """
     try:
         doc_id = str(uuid.uuid4())
-        success = chroma_service.add_documents(
+        documents, metadatas, ids = build_chunk_records(doc.content, doc.metadata, doc_id)
+        success = await run_in_threadpool(
+            chroma_service.add_documents,
             collection_name=doc.collection,
-            documents=[doc.content],
-            metadatas=[doc.metadata],
-            ids=[doc_id],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids,
         )
 
         if success:
@@ -77,6 +190,7 @@ async def embed_text(doc: DocumentUpload):
                 "message": "Document embedded successfully",
                 "document_id": doc_id,
                 "collection": doc.collection,
+                "chunks": len(ids),
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to embed document")
@@ -86,7 +200,39 @@ async def embed_text(doc: DocumentUpload):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/collections")
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that can send while the request body is still read.
+
+    Starlette's StreamingResponse watches for disconnects by consuming
+    receive(), which would swallow the body chunks the generator reads.
+    Here the body iterator owns receive() and a disconnect ends the stream.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/bulk", dependencies=[Depends(require_chroma_ready)])
+async def bulk_ingest(request: Request, collection: Optional[str] = None):
+    """
+    Ingest many documents from a streamed NDJSON body.
+
+    Each line is {"content", "collection"?, "metadata"?, "id"?}; records
+    without a collection use the `collection` query parameter. Records are
+    embedded and upserted in batches as they arrive, and one NDJSON progress
+    event per record (then a final summary) is streamed back.
+    """
+    async def ndjson():
+        async for event in bulk_ingestor.ingest(request.stream(), collection):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return _DuplexStreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/collections", dependencies=[Depends(require_chroma_ready)])
 async def list_collections():
     """List all available collections and their document counts."""
     try:
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, Depends
+from app.api.dependencies import require_chroma_ready
+from app.services.embedding_jobs import submit_initial_data, submit_github_embedding
 from app.services.rag_service import rag_service
 import logging
-import os
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,48 +22,17 @@ async def get_stats():
 
 
 @router.post("/embed-initial-data")
-async def embed_initial_data(background_tasks: BackgroundTasks):
-    """Trigger initial data embedding (run in background)."""
-    def run_embedding():
-        try:
-            logger.info("Starting background embedding task...")
-            import sys
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-            # Import and run the embedding script functions
-            from scripts.embed_initial_data import embed_portfolio_data, embed_documentation, embed_security_logs
-            from scripts.fetch_github_repos import embed_github_repos
-
-            logger.info("Embedding portfolio data...")
-            embed_portfolio_data()
-
-            logger.info("Embedding documentation...")
-            embed_documentation()
-
-            logger.info("Embedding security logs...")
-            embed_security_logs()
-
-            # Embed GitHub repos
-            github_token = os.getenv("GITHUB_TOKEN")
-            if github_token:
-                logger.info("Embedding GitHub repositories...")
-                embed_github_repos(github_token)
-            else:
-                logger.warning("GITHUB_TOKEN not found, skipping GitHub repos")
-
-            logger.info("Background embedding complete!")
-
-        except Exception as e:
-            logger.error(f"Error in background embedding: {e}")
-
-    background_tasks.add_task(run_embedding)
+async def embed_initial_data():
+    """Trigger initial data embedding (run in background); private notes are admin-only."""
+    job, created = submit_initial_data()
     return {
-        "status": "embedding_started",
+        "status": "embedding_started" if created else "already_running",
+        "job_id": job.id,
         "message": "Initial data embedding started in background. Check /api/health/stats in a few minutes."
     }
 
 
-@router.delete("/github-embeddings")
+@router.delete("/github-embeddings", dependencies=[Depends(require_chroma_ready)])
 async def delete_github_embeddings():
     """Delete all GitHub repository embeddings from portfolio collection."""
     try:
@@ -89,7 +59,7 @@ async def delete_github_embeddings():
         logger.info(f"Found {len(github_ids)} GitHub repositories to delete")
 
         # Delete all GitHub repos
-        collection.delete(ids=github_ids)
+        chroma_service.delete_documents("portfolio", github_ids)
 
         logger.info(f"Deleted {len(github_ids)} GitHub repositories from portfolio collection")
 
@@ -109,30 +79,11 @@ async def delete_github_embeddings():
 
 
 @router.post("/embed-github-repos")
-async def embed_github_repos_endpoint(background_tasks: BackgroundTasks):
+async def embed_github_repos_endpoint():
     """Trigger GitHub repository embedding (run in background)."""
-    def run_github_embedding():
-        try:
-            logger.info("Starting GitHub repository embedding...")
-            import sys
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-            from scripts.fetch_github_repos import embed_github_repos
-
-            github_token = os.getenv("GITHUB_TOKEN")
-            if not github_token:
-                logger.error("GITHUB_TOKEN not found")
-                return
-
-            logger.info("Embedding GitHub repositories...")
-            embed_github_repos(github_token)
-            logger.info("GitHub repository embedding complete!")
-
-        except Exception as e:
-            logger.error(f"Error in GitHub embedding: {e}")
-
-    background_tasks.add_task(run_github_embedding)
+    job, created = submit_github_embedding()
     return {
-        "status": "embedding_started",
+        "status": "embedding_started" if created else "already_running",
+        "job_id": job.id,
         "message": "GitHub repository embedding started in background. Check /api/health/stats in a few minutes."
     }
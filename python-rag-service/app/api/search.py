@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.dependencies import require_chroma_ready
 from app.models.schemas import SearchRequest, SearchResponse
 from app.services.rag_service import rag_service
 import logging
@@ -7,7 +8,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/", response_model=SearchResponse)
+@router.post("/", response_model=SearchResponse, dependencies=[Depends(require_chroma_ready)])
 async def search_documents(request: SearchRequest):
     """
     Search for similar documents in a collection.
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
 from app.services.rag_service import rag_service
 from app.services.database_service import db_service
+from app.services.security_ingest import security_ingestor
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,7 +13,7 @@ router = APIRouter()
 
 
 @router.get("/analyze")
-async def analyze_security_patterns():
+async def analyze_security_patterns(refresh: bool = False):
     """
     Analyze security attack patterns using RAG.
 
@@ -17,9 +22,13 @@ async def analyze_security_patterns():
     - Common attack types
     - Severity distribution
     - Mitigation recommendations
+
+    The last analysis is returned instantly with its `age_seconds`; when new
+    logs have arrived it is marked `stale` and recomputed in the background.
+    Pass `refresh=true` to wait for a fresh analysis.
     """
     try:
-        analysis = await rag_service.analyze_security_patterns()
+        analysis = await rag_service.analyze_security_patterns(refresh=refresh)
         return analysis
     except Exception as e:
         logger.error(f"Error analyzing security patterns: {e}")
@@ -30,19 +39,67 @@ async def analyze_security_patterns():
 async def get_security_logs(limit: int = 100):
     """Get recent security logs from database."""
     try:
-        logs = db_service.get_security_logs(limit=limit)
+        logs = await db_service.fetch_security_logs(limit=limit)
         return {"logs": logs, "count": len(logs)}
     except Exception as e:
         logger.error(f"Error fetching security logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/logs/export")
+async def export_security_logs(since: Optional[datetime] = None):
+    """
+    Stream all security logs (oldest first) as NDJSON.
+
+    Rows are read through a server-side cursor, so the export doesn't load
+    the whole table into memory.
+    """
+    async def ndjson():
+        try:
+            async for log in db_service.stream_security_logs(since=since):
+                yield json.dumps(log, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming security logs: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.get("/patterns")
 async def get_attack_patterns():
-    """Get aggregated attack patterns."""
+    """Get aggregated attack patterns (from the incremental rollups once ingested)."""
     try:
-        patterns = db_service.get_attack_patterns()
-        return {"patterns": patterns, "count": len(patterns)}
+        patterns, source = await security_ingestor.get_attack_patterns()
+        return {
+            "patterns": patterns,
+            "count": len(patterns),
+            "source": source,
+            "totals": security_ingestor.rollup.totals(),
+            "as_of": security_ingestor.watermark,
+        }
     except Exception as e:
         logger.error(f"Error fetching attack patterns: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/trends")
+async def get_attack_trends(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    activity_type: Optional[str] = None,
+    severity: Optional[str] = None,
+):
+    """Get attack counts per hour or day over a recent window."""
+    buckets = security_ingestor.rollup.trend(hours, bucket, activity_type, severity)
+    return {
+        "buckets": buckets,
+        "total": sum(b["count"] for b in buckets),
+        "bucket": bucket,
+        "as_of": security_ingestor.watermark,
+    }
+
+
+@router.get("/ingest/status")
+async def get_ingest_status():
+    """Get the incremental security log ingestion watermark and last run."""
+    return security_ingestor.get_status()
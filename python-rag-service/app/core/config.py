@@ -3,20 +3,88 @@ from typing import List
 
 
 class Settings(BaseSettings):
-    # AI Provider (OpenAI)
+    # AI Providers
     AI_PROVIDER_API_KEY: str = ""  # Will be set via Railway environment variables
     AI_PROVIDER_BASE_URL: str = "https://api.openai.com/v1"
     AI_PROVIDER_MODEL: str = "gpt-4o-mini"
+    DEEPSEEK_API_KEY: str = ""
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
+    DEEPSEEK_MODEL: str = "deepseek-chat"
+    LLM_PROVIDERS: str = "openai"  # Failover order, e.g. "openai,deepseek" (openai uses AI_PROVIDER_*)
+    LLM_HEDGE_ENABLED: bool = True  # Start the next provider when the first is slower than its p95
+    LLM_HEDGE_DELAY_MS: int = 8000  # Hedge deadline until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY_MS: int = 1000
+
+    # LLM HTTP client
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_READ_TIMEOUT: float = 60.0
+    LLM_WRITE_TIMEOUT: float = 10.0
+    LLM_POOL_TIMEOUT: float = 5.0  # Max wait for a free pooled connection
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_HTTP2: bool = True  # Needs the h2 package (httpx[http2])
+    LLM_MAX_RETRIES: int = 3  # Retries on 429/5xx and connection errors
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0  # Longer Retry-After values are not waited for
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures before failing fast
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
 
     # Database
     POSTGRES_URL: str = ""  # Will be set via Railway environment variables
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0  # Max wait for a pooled connection
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STREAM_BATCH_SIZE: int = 500  # Rows per server-side cursor fetch
+    SECURITY_INGEST_INTERVAL_SECONDS: int = 300  # 0 disables scheduled log ingestion
+    SECURITY_INGEST_BATCH_SIZE: int = 500
+    SECURITY_INGEST_STATE_PATH: str = "./embeddings/security_ingest_state.json"  # Watermark + rollups
+    SECURITY_INGEST_OVERLAP_SECONDS: int = 300  # Re-read this far behind the watermark for rows that commit late
+    SECURITY_ROLLUP_RETENTION_DAYS: int = 90  # Hourly trend buckets kept
+    SECURITY_ANALYSIS_MAX_AGE_SECONDS: int = 3600  # Recompute at least this often, even without new logs
 
     # GitHub
     GITHUB_TOKEN: str = ""
+    GITHUB_MAX_CONCURRENCY: int = 8
+    GITHUB_CACHE_PATH: str = "./embeddings/github_http_cache.json"
 
     # ChromaDB
     CHROMA_PERSIST_DIR: str = "./embeddings/chroma_db"
+    KB_VERSION_PATH: str = ""  # Per-collection write counters; defaults to kb_versions.json next to CHROMA_PERSIST_DIR
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "sentence-transformers"  # sentence-transformers, onnx or onnx-int8
+    EMBEDDING_ONNX_PATH: str = ""  # Local model.onnx; downloaded from the model repo when empty
+    EMBEDDING_ONNX_THREADS: int = 0  # 0 lets ONNX Runtime decide
+    EMBEDDING_MODEL_CACHE_DIR: str = "./embeddings/models"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_WORKERS: int = 0  # >0 embeds in that many worker processes, each loading the model once
+    EMBEDDING_WORKER_THREADS: int = 1  # Torch/ONNX threads per worker process
+    EMBEDDING_WORKER_QUERIES: bool = True  # Also send query embeddings to the workers (queued ahead of ingest)
+    EMBEDDING_WORKER_START_TIMEOUT_SECONDS: int = 300
+    EMBEDDING_WORKER_BATCH_TIMEOUT_SECONDS: float = 120.0  # A worker silent this long on one batch is killed and restarted
+    WARMUP_TIMEOUT_SECONDS: int = 300  # How long requests wait for the model to load
+    CHUNK_SIZE: int = 1000  # Characters per chunk (~256 MiniLM tokens)
+    CHUNK_OVERLAP: int = 150
+    CONTEXT_TOKEN_BUDGET: int = 3000  # Max tokens of retrieved context per prompt
+    CONTEXT_MAX_DISTANCE: float = 1.0  # Cosine distance cut-off for candidates
+    CONTEXT_DEDUP_THRESHOLD: float = 0.85  # Word-shingle Jaccard for near-duplicates
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_BATCH_SIZE: int = 16
+    RERANKER_TIMEOUT_MS: int = 300  # Fall back to vector order past this budget
+    RERANKER_MAX_CANDIDATES: int = 30
+    RETRIEVAL_MAX_WORKERS: int = 5
+    HYBRID_SEARCH_ENABLED: bool = True  # BM25 + vector fusion for unfiltered queries
+    LEXICAL_INDEX_DIR: str = ""  # Defaults to lexical_index/ next to CHROMA_PERSIST_DIR
+    LEXICAL_INDEX_FLUSH_SECONDS: float = 5.0  # Write the BM25 files at most this long after a change (0 = every write)
+    RRF_K: int = 60
+    QUERY_ROUTER_ENABLED: bool = True  # Pick collections per query intent instead of searching all
+    QUERY_ROUTER_MIN_SIMILARITY: float = 0.45  # Min cosine to an intent prototype for the embedding fallback
+    EMBEDDING_CACHE_SIZE: int = 1024  # 0 disables the query embedding cache
+    EMBEDDING_CACHE_TTL_SECONDS: int = 0  # 0 means entries never expire
+    RESPONSE_CACHE_SIZE: int = 256  # 0 disables the semantic answer cache
+    RESPONSE_CACHE_SIMILARITY: float = 0.95  # Minimum cosine similarity for a hit
 
     # API
     API_HOST: str = "0.0.0.0"
@@ -26,11 +94,19 @@ class Settings(BaseSettings):
     # Security
     MAX_UPLOAD_SIZE_MB: int = 10
     ALLOWED_FILE_TYPES: str = ".pdf,.md,.txt,.json"
+    BULK_INGEST_BATCH_SIZE: int = 128  # Chunks embedded and upserted per batch
+    BULK_INGEST_MAX_LINE_KB: int = 1024  # Largest accepted NDJSON record
+    EXTRACTION_WORKERS: int = 1  # Worker processes for upload text/PDF extraction
+    EXTRACTION_TIMEOUT_SECONDS: int = 120
 
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def llm_providers_list(self) -> List[str]:
+        return [name.strip() for name in self.LLM_PROVIDERS.split(",") if name.strip()]
+
     @property
     def allowed_file_types_list(self) -> List[str]:
         return [ext.strip() for ext in self.ALLOWED_FILE_TYPES.split(",")]
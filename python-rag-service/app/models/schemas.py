@@ -30,6 +30,21 @@ class DocumentUpload(BaseModel):
     )
 
 
+class BulkDocumentRecord(BaseModel):
+    """One line of a bulk NDJSON ingestion request."""
+
+    content: str = Field(..., description="Document content to embed")
+    collection: Optional[str] = Field(
+        default=None, description="Collection (defaults to the request's collection)"
+    )
+    metadata: Dict[str, Any] = Field(
+        default_factory=dict, description="Document metadata"
+    )
+    id: Optional[str] = Field(
+        default=None, description="Document ID; re-sending an ID replaces its chunks"
+    )
+
+
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
     collection: str = Field(..., description="Collection to search")
@@ -1,6 +1,17 @@
-from .chroma_service import ChromaService
-from .openai_service import OpenAIService
-from .rag_service import RAGService
-from .database_service import DatabaseService
+# Services are imported lazily so that worker processes can import a single
+# module (e.g. embedding_backends) without building every service singleton.
+_EXPORTS = {
+    "ChromaService": ".chroma_service",
+    "LLMService": ".llm_service",
+    "RAGService": ".rag_service",
+    "DatabaseService": ".database_service",
+}
 
-__all__ = ["ChromaService", "OpenAIService", "RAGService", "DatabaseService"]
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
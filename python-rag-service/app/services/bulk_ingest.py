@@ -0,0 +1,243 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from pydantic import ValidationError
+from app.core.config import settings
+from app.models.schemas import BulkDocumentRecord
+from app.services.chroma_service import chroma_service
+from app.services.chunking import build_chunk_records
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+METADATA_TYPES = (str, int, float, bool)
+
+
+class LineTooLongError(ValueError):
+    """An NDJSON line exceeded the configured size limit."""
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into (line number, line) pairs as it arrives.
+
+    Only the current partial line is buffered. Raises LineTooLongError when
+    a line grows past max_line_bytes, since the rest of the stream can't be
+    resynchronized reliably.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(f"line {line_number} exceeds {max_line_bytes} bytes")
+            yield line_number, line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLongError(f"line {line_number + 1} exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+class _Batch:
+    """Chunk records pending upsert into one collection."""
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.ids: List[str] = []
+        self.id_set: set = set()
+        # (line number, document id, chunk count) per record in the batch
+        self.records: List[Tuple[int, str, int]] = []
+
+    def add(self, line: int, doc_id: str, documents, metadatas, ids) -> None:
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self.ids.extend(ids)
+        self.id_set.update(ids)
+        self.records.append((line, doc_id, len(ids)))
+
+
+class BulkIngestor:
+    """
+    Streams NDJSON records into Chroma in batches.
+
+    Each line is a BulkDocumentRecord. Records are chunked as they are
+    parsed and their chunks grouped per collection; a group is embedded and
+    upserted (via sync_documents, so unchanged chunks aren't re-embedded,
+    and chunks left over from a longer earlier version of a record are
+    deleted) once BULK_INGEST_BATCH_SIZE chunks are pending. One batch is written on
+    the ingest thread while the next is being read, and reading waits for
+    the previous batch, which bounds memory to about two batches. A progress
+    event is produced per record once its batch is stored.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.BULK_INGEST_BATCH_SIZE
+        self.max_line_bytes = settings.BULK_INGEST_MAX_LINE_KB * 1024
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-ingest")
+
+    def _store(self, batch: _Batch) -> List[Dict[str, Any]]:
+        stats = chroma_service.sync_documents(
+            collection_name=batch.collection,
+            documents=batch.documents,
+            metadatas=batch.metadatas,
+            ids=batch.ids,
+            prune=False,
+            prune_parents=True,
+        )
+        events = []
+        for line, doc_id, chunks in batch.records:
+            event = {"line": line, "id": doc_id, "collection": batch.collection, "chunks": chunks}
+            if stats is None:
+                event.update(status="error", error="Failed to embed batch")
+            else:
+                event["status"] = "ok"
+            events.append(event)
+        return events
+
+    def _store_document(
+        self, collection: str, content: str, metadata: Dict[str, Any], doc_id: str, markdown: bool
+    ) -> Optional[int]:
+        documents, metadatas, ids = build_chunk_records(content, metadata, doc_id, markdown=markdown)
+        stats = chroma_service.sync_documents(
+            collection_name=collection,
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids,
+            prune=False,
+            prune_parents=True,
+        )
+        return None if stats is None else len(ids)
+
+    async def ingest_document(
+        self,
+        collection: str,
+        content: str,
+        metadata: Dict[str, Any],
+        doc_id: str,
+        markdown: bool = True,
+    ) -> Optional[int]:
+        """
+        Chunk, embed and store one document on the ingest thread.
+
+        Returns:
+            Number of chunks stored, or None if storing failed
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._store_document, collection, content, metadata, doc_id, markdown
+        )
+
+    def _parse(
+        self, line: bytes, default_collection: Optional[str], collections
+    ) -> Tuple[Optional[BulkDocumentRecord], Optional[str]]:
+        try:
+            record = BulkDocumentRecord(**json.loads(line))
+        except (ValueError, TypeError) as e:
+            # json.JSONDecodeError and pydantic's ValidationError are ValueErrors
+            message = e.errors()[0]["msg"] if isinstance(e, ValidationError) else str(e)
+            return None, f"Invalid record: {message}"
+
+        record.collection = record.collection or default_collection
+        if not record.collection:
+            return None, "No collection given for the record or the request"
+        if record.collection not in collections:
+            return None, f"Unknown collection: {record.collection}"
+        if not record.content.strip():
+            return None, "Empty content"
+        for key, value in record.metadata.items():
+            if not isinstance(value, METADATA_TYPES):
+                return None, f"Metadata value for '{key}' must be a string, number or boolean"
+        return record, None
+
+    async def ingest(
+        self, chunks: AsyncIterator[bytes], default_collection: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ingest an NDJSON byte stream, yielding progress events.
+
+        Yields {'line', 'id', 'collection', 'chunks', 'status': 'ok'} per
+        stored record, {'line', 'status': 'error', 'error'} per rejected one,
+        and a final {'status': 'done', ...} summary (with 'error' set if the
+        stream was aborted).
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, chroma_service.wait_until_ready)
+        collections = set(chroma_service.collections)
+
+        summary = {"status": "done", "records": 0, "stored": 0, "failed": 0, "chunks": 0}
+        pending: Dict[str, _Batch] = {}
+        in_flight: Optional[asyncio.Future] = None
+
+        def tally(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            for event in events:
+                if event["status"] == "ok":
+                    summary["stored"] += 1
+                    summary["chunks"] += event["chunks"]
+                else:
+                    summary["failed"] += 1
+            return events
+
+        async def submit(batch: _Batch) -> List[Dict[str, Any]]:
+            # Wait for the previous batch, then start this one in the background
+            nonlocal in_flight
+            events = tally(await in_flight) if in_flight is not None else []
+            in_flight = loop.run_in_executor(self._executor, self._store, batch)
+            return events
+
+        try:
+            async for line_number, line in iter_ndjson_lines(chunks, self.max_line_bytes):
+                if not line.strip():
+                    continue
+                summary["records"] += 1
+
+                record, error = self._parse(line, default_collection, collections)
+                if error:
+                    summary["failed"] += 1
+                    yield {"line": line_number, "status": "error", "error": error}
+                    continue
+
+                doc_id = record.id or str(uuid.uuid4())
+                documents, metadatas, ids = build_chunk_records(record.content, record.metadata, doc_id)
+
+                batch = pending.get(record.collection)
+                # Chroma rejects duplicate IDs in one upsert, so a repeated record starts a new batch
+                if batch is not None and batch.id_set.intersection(ids):
+                    for event in await submit(pending.pop(record.collection)):
+                        yield event
+                    batch = None
+                if batch is None:
+                    batch = pending[record.collection] = _Batch(record.collection)
+                batch.add(line_number, doc_id, documents, metadatas, ids)
+
+                if len(batch.ids) >= self.batch_size:
+                    for event in await submit(pending.pop(record.collection)):
+                        yield event
+        except Exception as e:
+            logger.error(f"Bulk ingestion aborted: {e}")
+            summary["error"] = str(e)
+
+        for batch in list(pending.values()):
+            for event in await submit(batch):
+                yield event
+        if in_flight is not None:
+            for event in tally(await in_flight):
+                yield event
+        await loop.run_in_executor(self._executor, chroma_service.flush_lexical)
+
+        logger.info(f"Bulk ingestion finished: {summary}")
+        yield summary
+
+
+# Singleton instance
+bulk_ingestor = BulkIngestor()
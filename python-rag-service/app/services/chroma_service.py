@@ -2,47 +2,186 @@ import os
 # Disable default embedding function to avoid onnxruntime DLL issues on Windows
 os.environ["ANONYMIZED_TELEMETRY"] = "False"
 
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from app.core.config import settings
+from app.services.embedding_backends import EmbeddingBackend, create_embedding_backend
+from app.services.embedding_cache import EmbeddingCache
+from app.services.kb_versions import KnowledgeBaseVersions
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion
+import atexit
+import hashlib
+import json
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+COLLECTION_NAMES = [
+    "portfolio",
+    "documentation",
+    "security_logs",
+    "chat_history",
+    "custom_docs",
+]
+
+
+class ChromaNotReadyError(RuntimeError):
+    """ChromaDB or the embedding model is still loading, or failed to load."""
+
 
 class ChromaService:
-    """Service for managing ChromaDB vector store."""
+    """
+    Service for managing ChromaDB vector store.
+
+    The Chroma client and embedding model are loaded by a background warm-up
+    thread so the API can bind its port immediately. Accessing client,
+    embedding_backend or collections blocks until the warm-up has finished,
+    so async code must check is_ready (or use COLLECTION_NAMES) first, or
+    reach them from a worker thread.
+    """
 
     def __init__(self):
-        # Ensure persist directory exists
-        os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
+        self._client = None
+        self._embedding_backend: Optional[EmbeddingBackend] = None
+        self._query_backend: Optional[EmbeddingBackend] = None
+        self._collections: Dict[str, Any] = {}
+        self._lexical: Dict[str, BM25Index] = {}
+        self._lexical_flush_timer: Optional[threading.Timer] = None
+        self._lexical_flush_lock = threading.Lock()
+        # CLI scripts write through this service too and exit without close()
+        atexit.register(self.flush_lexical)
+
+        self._ready = threading.Event()
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.warmup_error: Optional[Exception] = None
+        self.warmup_seconds: Optional[float] = None
+
+        # Per-collection write counters, shared with other processes through
+        # a stamp file so cached answers and indexes can detect stale context
+        self._kb_versions = KnowledgeBaseVersions(self._kb_version_path())
 
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_PERSIST_DIR,
-            settings=ChromaSettings(anonymized_telemetry=False),
+        # Per-thread embedding progress callbacks (see track_progress)
+        self._progress = threading.local()
+
+        # Cached query embeddings are only valid for the same model and backend
+        self.embedding_key = f"{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_BACKEND}"
+
+        # Cache for repeated query embeddings
+        self.embedding_cache = EmbeddingCache(
+            max_size=settings.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
         )
 
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    def start_warmup(self) -> None:
+        """Start loading the Chroma client and embedding model in the background."""
+        with self._warmup_lock:
+            if self._warmup_thread is not None:
+                return
+            self._warmup_thread = threading.Thread(
+                target=self._warmup, name="chroma-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+    def _warmup(self) -> None:
+        started = time.monotonic()
+        try:
+            # Heavy imports are deferred so importing this module stays cheap
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+
+            # Ensure persist directory exists
+            os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
 
-        # Create or get collections
-        self.collections = {
-            "portfolio": self._get_or_create_collection("portfolio"),
-            "documentation": self._get_or_create_collection("documentation"),
-            "security_logs": self._get_or_create_collection("security_logs"),
-            "chat_history": self._get_or_create_collection("chat_history"),
-            "custom_docs": self._get_or_create_collection("custom_docs"),
+            # Initialize ChromaDB client
+            self._client = chromadb.PersistentClient(
+                path=settings.CHROMA_PERSIST_DIR,
+                settings=ChromaSettings(anonymized_telemetry=False),
+            )
+
+            # Initialize embedding backend, in worker processes if configured
+            if settings.EMBEDDING_WORKERS > 0:
+                from app.services.embedding_workers import EmbeddingWorkerPool
+                self._embedding_backend = EmbeddingWorkerPool(settings.EMBEDDING_WORKERS)
+                self._query_backend = (
+                    self._embedding_backend if settings.EMBEDDING_WORKER_QUERIES
+                    else create_embedding_backend()
+                )
+            else:
+                self._embedding_backend = self._query_backend = create_embedding_backend()
+
+            # Create or get collections
+            self._collections = {
+                name: self._get_or_create_collection(name) for name in COLLECTION_NAMES
+            }
+
+            # Load (or rebuild) the BM25 index kept next to each collection
+            if settings.HYBRID_SEARCH_ENABLED:
+                self._lexical = {
+                    name: self._load_lexical_index(name, collection)
+                    for name, collection in self._collections.items()
+                }
+
+            self.warmup_seconds = round(time.monotonic() - started, 2)
+            logger.info(f"ChromaDB initialized successfully in {self.warmup_seconds}s")
+        except Exception as e:
+            self.warmup_error = e
+            logger.error(f"ChromaDB warm-up failed: {e}", exc_info=True)
+        finally:
+            self._ready.set()
+
+    @property
+    def is_ready(self) -> bool:
+        """True once warm-up finished successfully."""
+        return self._ready.is_set() and self.warmup_error is None
+
+    def readiness(self) -> Dict[str, Any]:
+        """Describe warm-up state for the readiness probe."""
+        if not self._ready.is_set():
+            status = "warming_up"
+        elif self.warmup_error is not None:
+            status = "failed"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "warmup_seconds": self.warmup_seconds,
+            "error": str(self.warmup_error) if self.warmup_error else None,
         }
 
-        logger.info("ChromaDB initialized successfully")
+    def wait_until_ready(self, timeout: Optional[float] = None) -> None:
+        """Block until warm-up has finished, starting it if necessary."""
+        if not self._ready.is_set():
+            self.start_warmup()
+            if timeout is None:
+                timeout = settings.WARMUP_TIMEOUT_SECONDS
+            if not self._ready.wait(timeout):
+                raise ChromaNotReadyError("ChromaDB is still warming up")
+        if self.warmup_error is not None:
+            raise ChromaNotReadyError(f"ChromaDB failed to initialize: {self.warmup_error}")
+
+    @property
+    def client(self):
+        self.wait_until_ready()
+        return self._client
+
+    @property
+    def embedding_backend(self) -> EmbeddingBackend:
+        self.wait_until_ready()
+        return self._embedding_backend
+
+    @property
+    def collections(self) -> Dict[str, Any]:
+        self.wait_until_ready()
+        return self._collections
 
     def _get_or_create_collection(self, name: str):
         """Get or create a collection."""
         try:
-            return self.client.get_or_create_collection(
+            return self._client.get_or_create_collection(
                 name=name,
                 metadata={"hnsw:space": "cosine"},
                 embedding_function=None  # We'll handle embeddings manually
@@ -51,10 +190,125 @@ class ChromaService:
             logger.error(f"Error creating collection {name}: {e}")
             raise
 
+    @staticmethod
+    def _kb_version_path() -> str:
+        return settings.KB_VERSION_PATH or os.path.join(
+            os.path.dirname(os.path.abspath(settings.CHROMA_PERSIST_DIR)), "kb_versions.json"
+        )
+
+    @staticmethod
+    def _lexical_index_path(name: str) -> str:
+        index_dir = settings.LEXICAL_INDEX_DIR or os.path.join(
+            os.path.dirname(os.path.abspath(settings.CHROMA_PERSIST_DIR)), "lexical_index"
+        )
+        return os.path.join(index_dir, f"{name}.json")
+
+    def _load_lexical_index(self, name: str, collection) -> BM25Index:
+        """Load a persisted BM25 index, rebuilding it if it's out of sync."""
+        index = BM25Index.load(self._lexical_index_path(name))
+        count = collection.count()
+        if len(index) != count:
+            logger.info(f"Rebuilding lexical index for {name} ({len(index)} != {count} docs)")
+            index.clear()
+            existing = collection.get(include=["documents"])
+            index.add(existing["ids"], existing["documents"])
+            index.save()
+        return index
+
+    def _update_lexical(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        documents: Optional[List[str]] = None,
+        removed_ids: Optional[List[str]] = None,
+    ) -> None:
+        """Mirror a collection write into its lexical index and schedule a flush."""
+        index = self._lexical.get(collection_name)
+        if index is None:
+            return
+        if removed_ids:
+            index.remove(removed_ids)
+        if ids:
+            index.add(ids, documents)
+        self._schedule_lexical_flush()
+
+    def _schedule_lexical_flush(self) -> None:
+        """Flush LEXICAL_INDEX_FLUSH_SECONDS after the first unsaved write."""
+        delay = settings.LEXICAL_INDEX_FLUSH_SECONDS
+        if delay <= 0:
+            self.flush_lexical()
+            return
+        with self._lexical_flush_lock:
+            if self._lexical_flush_timer is not None:
+                return
+            timer = threading.Timer(delay, self.flush_lexical)
+            timer.name = "lexical-flush"
+            timer.daemon = True
+            self._lexical_flush_timer = timer
+        timer.start()
+
+    def flush_lexical(self) -> None:
+        """
+        Persist every lexical index changed since its last save.
+
+        Called on a timer after writes, and directly at the end of a job,
+        ingest run or bulk request and at shutdown, so a batch of writes
+        rewrites each index file once instead of once per write.
+        """
+        with self._lexical_flush_lock:
+            timer, self._lexical_flush_timer = self._lexical_flush_timer, None
+        if timer is not None:
+            timer.cancel()
+        for index in list(self._lexical.values()):
+            index.flush()
+
     def embed_text(self, text: str) -> List[float]:
-        """Generate embeddings for text."""
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        """Generate embeddings for text, served from the query cache when possible."""
+        cached = self.embedding_cache.get(text, self.embedding_key)
+        if cached is not None:
+            return cached
+
+        self.wait_until_ready()
+        embedding = self._query_backend.encode_query([text])[0].tolist()
+
+        self.embedding_cache.put(text, self.embedding_key, embedding)
+        return embedding
+
+    def embed_texts(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> np.ndarray:
+        """Generate normalized float32 embeddings for many texts in batches."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        callback = getattr(self._progress, "callback", None)
+        if callback is None:
+            return self.embedding_backend.encode(texts, batch_size=batch_size)
+
+        # One batch per worker at a time, so progress (and cancellation) is seen between batches
+        step = batch_size * max(1, settings.EMBEDDING_WORKERS)
+        parts = []
+        for start in range(0, len(texts), step):
+            parts.append(self.embedding_backend.encode(texts[start:start + step], batch_size=batch_size))
+            callback(len(parts[-1]))
+        return np.concatenate(parts)
+
+    @contextmanager
+    def track_progress(self, callback: Callable[[int], None]) -> Iterator[None]:
+        """
+        Report documents embedded on this thread to callback(count).
+
+        Background jobs use this to count only their own documents. The
+        callback runs after each batch and may raise (e.g. JobCancelled) to
+        stop the write before anything is stored.
+        """
+        previous = getattr(self._progress, "callback", None)
+        self._progress.callback = callback
+        try:
+            yield
+        finally:
+            self._progress.callback = previous
 
     def add_documents(
         self,
@@ -69,9 +323,11 @@ class ChromaService:
             if not collection:
                 logger.error(f"Collection {collection_name} not found")
                 return False
+            if not documents:
+                return True
 
-            # Generate embeddings
-            embeddings = [self.embed_text(doc) for doc in documents]
+            # Generate embeddings in batches
+            embeddings = self.embed_texts(documents)
 
             # Generate IDs if not provided
             if ids is None:
@@ -81,25 +337,134 @@ class ChromaService:
             # Add to collection
             collection.add(
                 documents=documents,
-                embeddings=embeddings,
+                embeddings=embeddings.tolist(),
                 metadatas=metadatas,
                 ids=ids,
             )
+            self._update_lexical(collection_name, ids, documents)
 
+            self.bump_kb_version(collection_name)
             logger.info(f"Added {len(documents)} documents to {collection_name}")
             return True
         except Exception as e:
             logger.error(f"Error adding documents to {collection_name}: {e}")
             return False
 
+    @staticmethod
+    def content_hash(document: str, metadata: Dict[str, Any]) -> str:
+        """Hash a document together with its metadata (excluding the hash itself)."""
+        meta = {k: v for k, v in metadata.items() if k != "content_hash"}
+        payload = json.dumps([document, meta], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def sync_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        where: Optional[Dict[str, Any]] = None,
+        prune: bool = True,
+        prune_parents: bool = False,
+    ) -> Optional[Dict[str, int]]:
+        """
+        Incrementally sync a source's documents into a collection.
+
+        Every document's content hash is stored in its metadata, which acts as
+        the collection's manifest. Only new or changed documents are embedded
+        and upserted. With prune=True, IDs matching `where` (the scope owned
+        by this source) that are no longer in `ids` are deleted. With
+        prune_parents=True, other chunks of the incoming documents' parents
+        (by parent_id) are deleted, so a document re-ingested with fewer
+        chunks doesn't keep its old trailing ones.
+
+        Returns:
+            Counts of added/updated/unchanged/deleted documents, or None on error
+        """
+        try:
+            collection = self.collections.get(collection_name)
+            if not collection:
+                logger.error(f"Collection {collection_name} not found")
+                return None
+
+            # Without pruning only the incoming IDs' hashes are needed
+            if prune:
+                existing = collection.get(where=where, include=["metadatas"])
+            else:
+                existing = collection.get(ids=list(ids), where=where, include=["metadatas"])
+            manifest = {
+                doc_id: (meta or {}).get("content_hash")
+                for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+            }
+
+            changed_docs, changed_metas, changed_ids = [], [], []
+            added = updated = 0
+            for doc, meta, doc_id in zip(documents, metadatas, ids):
+                digest = self.content_hash(doc, meta)
+                if manifest.get(doc_id) == digest:
+                    continue
+                if doc_id in manifest:
+                    updated += 1
+                else:
+                    added += 1
+                changed_docs.append(doc)
+                changed_metas.append({**meta, "content_hash": digest})
+                changed_ids.append(doc_id)
+
+            if changed_ids:
+                embeddings = self.embed_texts(changed_docs)
+                collection.upsert(
+                    documents=changed_docs,
+                    embeddings=embeddings.tolist(),
+                    metadatas=changed_metas,
+                    ids=changed_ids,
+                )
+
+            stale_ids = []
+            current_ids = set(ids)
+            if prune:
+                stale_ids = [doc_id for doc_id in manifest if doc_id not in current_ids]
+            if prune_parents:
+                parent_ids = sorted({meta["parent_id"] for meta in metadatas if meta.get("parent_id")})
+                if parent_ids:
+                    siblings = collection.get(where={"parent_id": {"$in": parent_ids}}, include=[])
+                    stale_ids.extend(
+                        doc_id for doc_id in siblings["ids"]
+                        if doc_id not in current_ids and doc_id not in stale_ids
+                    )
+            if stale_ids:
+                collection.delete(ids=stale_ids)
+
+            if changed_ids or stale_ids:
+                self._update_lexical(collection_name, changed_ids, changed_docs, stale_ids)
+                self.bump_kb_version(collection_name)
+
+            stats = {
+                "added": added,
+                "updated": updated,
+                "unchanged": len(ids) - len(changed_ids),
+                "deleted": len(stale_ids),
+            }
+            logger.info(f"Synced {collection_name}: {stats}")
+            return stats
+        except Exception as e:
+            logger.error(f"Error syncing documents to {collection_name}: {e}")
+            return None
+
     def query(
         self,
         collection_name: str,
         query_text: str,
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> Dict[str, Any]:
-        """Query a collection for similar documents."""
+        """
+        Query a collection for similar documents.
+
+        A precomputed query_embedding can be passed to skip re-encoding the
+        same query text when several collections are searched in one turn.
+        """
         try:
             collection = self.collections.get(collection_name)
             if not collection:
@@ -107,7 +472,8 @@ class ChromaService:
                 return {"documents": [], "metadatas": [], "distances": []}
 
             # Generate query embedding
-            query_embedding = self.embed_text(query_text)
+            if query_embedding is None:
+                query_embedding = self.embed_text(query_text)
 
             # Query collection
             results = collection.query(
@@ -116,16 +482,74 @@ class ChromaService:
                 where=where,
             )
 
-            return {
+            vector_results = {
                 "documents": results["documents"][0] if results["documents"] else [],
                 "metadatas": results["metadatas"][0] if results["metadatas"] else [],
                 "distances": results["distances"][0] if results["distances"] else [],
                 "ids": results["ids"][0] if results["ids"] else [],
             }
+
+            # Lexical index has no metadata filters, so filtered queries stay vector-only
+            if where is None and query_text and collection_name in self._lexical:
+                return self._hybrid_results(
+                    collection, collection_name, query_text, query_embedding,
+                    vector_results, n_results,
+                )
+            return vector_results
         except Exception as e:
             logger.error(f"Error querying {collection_name}: {e}")
             return {"documents": [], "metadatas": [], "distances": []}
 
+    def _hybrid_results(
+        self,
+        collection,
+        collection_name: str,
+        query_text: str,
+        query_embedding: List[float],
+        vector_results: Dict[str, Any],
+        n_results: int,
+    ) -> Dict[str, Any]:
+        """Fuse vector and BM25 rankings with reciprocal rank fusion."""
+        lexical = self._lexical[collection_name].search(query_text, n_results)
+        if not lexical:
+            return vector_results
+
+        fused = reciprocal_rank_fusion(
+            [vector_results["ids"], [doc_id for doc_id, _ in lexical]],
+            k=settings.RRF_K,
+        )[:n_results]
+
+        by_id = {
+            doc_id: (doc, meta, distance)
+            for doc, meta, distance, doc_id in zip(
+                vector_results["documents"],
+                vector_results["metadatas"],
+                vector_results["distances"],
+                vector_results["ids"],
+            )
+        }
+
+        # Lexical-only hits need their documents and a cosine distance
+        missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+        if missing:
+            extra = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = float(np.linalg.norm(query)) or 1.0
+            for doc_id, doc, meta, embedding in zip(
+                extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]
+            ):
+                vector = np.asarray(embedding, dtype=np.float32)
+                similarity = float(vector @ query) / ((float(np.linalg.norm(vector)) or 1.0) * query_norm)
+                by_id[doc_id] = (doc, meta, 1 - similarity)
+
+        ordered = [doc_id for doc_id, _ in fused if doc_id in by_id]
+        return {
+            "documents": [by_id[doc_id][0] for doc_id in ordered],
+            "metadatas": [by_id[doc_id][1] for doc_id in ordered],
+            "distances": [by_id[doc_id][2] for doc_id in ordered],
+            "ids": ordered,
+        }
+
     def search_all_collections(
         self, query_text: str, n_results: int = 3
     ) -> Dict[str, Any]:
@@ -137,6 +561,33 @@ class ChromaService:
             )
         return results
 
+    def bump_kb_version(self, collection_name: str) -> int:
+        """Mark a collection as changed (seen by every process on its next check)."""
+        return self._kb_versions.bump(collection_name)
+
+    def kb_versions(self, collection_names: Optional[List[str]] = None) -> Dict[str, int]:
+        """Current version of each collection (every written one by default)."""
+        return self._kb_versions.get(collection_names)
+
+    def kb_version_for(self, collection_names: List[str]) -> int:
+        """A version that changes whenever any of the given collections changes."""
+        return self._kb_versions.version(collection_names)
+
+    def delete_documents(self, collection_name: str, ids: List[str]) -> bool:
+        """Delete documents by ID from a collection."""
+        try:
+            collection = self.collections.get(collection_name)
+            if not collection:
+                logger.error(f"Collection {collection_name} not found")
+                return False
+            collection.delete(ids=ids)
+            self._update_lexical(collection_name, removed_ids=ids)
+            self.bump_kb_version(collection_name)
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting documents from {collection_name}: {e}")
+            return False
+
     def get_collection_count(self, collection_name: str) -> int:
         """Get the number of documents in a collection."""
         try:
@@ -154,12 +605,24 @@ class ChromaService:
             self.client.delete_collection(collection_name)
             if collection_name in self.collections:
                 del self.collections[collection_name]
+            index = self._lexical.pop(collection_name, None)
+            if index is not None and os.path.exists(index.path):
+                os.remove(index.path)
+            self.bump_kb_version(collection_name)
             logger.info(f"Deleted collection {collection_name}")
             return True
         except Exception as e:
             logger.error(f"Error deleting collection {collection_name}: {e}")
             return False
 
+    def close(self) -> None:
+        """Flush the lexical indexes and stop embedding worker processes, if any."""
+        self.flush_lexical()
+        if self._query_backend is not None and self._query_backend is not self._embedding_backend:
+            self._query_backend.close()
+        if self._embedding_backend is not None:
+            self._embedding_backend.close()
+
     def get_stats(self) -> Dict[str, int]:
         """Get statistics for all collections."""
         stats = {}
@@ -0,0 +1,146 @@
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+import re
+
+HEADING_PATTERN = re.compile(r"^#{1,6}[ \t]+\S.*$", re.MULTILINE)
+
+# Preferred split points, best first
+BREAK_PATTERNS = ["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " "]
+
+
+def _markdown_sections(text: str) -> List[Tuple[int, int, Optional[str]]]:
+    """Split text at markdown headings into (start, end, heading) spans."""
+    starts = [m.start() for m in HEADING_PATTERN.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+
+    sections = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        match = HEADING_PATTERN.match(text, start)
+        heading = match.group(0).lstrip("#").strip() if match else None
+        sections.append((start, end, heading))
+    return sections
+
+
+def _find_break(text: str, start: int, end: int) -> int:
+    """Find the best split position in the second half of text[start:end]."""
+    floor = start + (end - start) // 2
+    for pattern in BREAK_PATTERNS:
+        pos = text.rfind(pattern, floor, end)
+        if pos != -1:
+            return pos + len(pattern)
+    return end
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink a span so it doesn't start or end with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def chunk_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    markdown: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Split text into overlapping chunks of at most chunk_size characters.
+
+    With markdown=True, chunks don't cross heading boundaries unless whole
+    small sections are packed together. Each chunk records its character
+    offsets in the source text and the heading of its section.
+
+    Returns:
+        List of dicts with 'text', 'start', 'end' and 'section'
+    """
+    chunk_size = chunk_size or settings.CHUNK_SIZE
+    chunk_overlap = settings.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+    chunk_overlap = min(chunk_overlap, chunk_size // 2)
+
+    sections = _markdown_sections(text) if markdown else [(0, len(text), None)]
+
+    # Pack consecutive small sections together while they fit
+    packed: List[Tuple[int, int, Optional[str]]] = []
+    for start, end, heading in sections:
+        if packed and end - packed[-1][0] <= chunk_size:
+            prev_start, _, prev_heading = packed[-1]
+            packed[-1] = (prev_start, end, prev_heading or heading)
+        else:
+            packed.append((start, end, heading))
+
+    chunks = []
+    for section_start, section_end, heading in packed:
+        pos = section_start
+        while pos < section_end:
+            end = min(pos + chunk_size, section_end)
+            if end < section_end:
+                end = _find_break(text, pos, end)
+
+            chunk_start, chunk_end = _trim(text, pos, end)
+            if chunk_end > chunk_start:
+                chunks.append({
+                    "text": text[chunk_start:chunk_end],
+                    "start": chunk_start,
+                    "end": chunk_end,
+                    "section": heading,
+                })
+
+            if end >= section_end:
+                break
+
+            # Step back by the overlap, snapping to a word boundary
+            next_pos = max(end - chunk_overlap, pos + 1)
+            if chunk_overlap:
+                space = text.find(" ", next_pos, end)
+                if space != -1:
+                    next_pos = space + 1
+            pos = next_pos
+
+    return chunks
+
+
+def build_chunk_records(
+    document: str,
+    metadata: Dict[str, Any],
+    parent_id: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    markdown: bool = True,
+) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+    """
+    Chunk a document into (documents, metadatas, ids) ready for Chroma.
+
+    Chunk IDs are '{parent_id}#{index}' and each chunk's metadata carries the
+    parent ID, chunk index/count and offsets so results can be regrouped.
+    """
+    chunks = chunk_text(document, chunk_size, chunk_overlap, markdown) or [
+        {"text": document, "start": 0, "end": len(document), "section": None}
+    ]
+
+    documents, metadatas, ids = [], [], []
+    for index, chunk in enumerate(chunks):
+        chunk_meta = {
+            **metadata,
+            "parent_id": parent_id,
+            "chunk_index": index,
+            "chunk_count": len(chunks),
+            "start_offset": chunk["start"],
+            "end_offset": chunk["end"],
+        }
+        chunk_doc = chunk["text"]
+        if chunk["section"]:
+            chunk_meta["section"] = chunk["section"]
+            # Keep the section title in view when the chunk starts mid-section
+            if not chunk_doc.lstrip("#").strip().startswith(chunk["section"]):
+                chunk_doc = f"[{chunk['section']}]\n{chunk_doc}"
+
+        documents.append(chunk_doc)
+        metadatas.append(chunk_meta)
+        ids.append(f"{parent_id}#{index}")
+
+    return documents, metadatas, ids
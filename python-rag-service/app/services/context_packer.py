@@ -0,0 +1,156 @@
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken, falling back to a character estimate.
+
+    The encoding is loaded on first use rather than at import: tiktoken
+    downloads its BPE file (without a timeout) unless TIKTOKEN_CACHE_DIR
+    already holds it.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._encoding = self._load_encoding()
+                    self._loaded = True
+        return self._encoding
+
+    def _load_encoding(self):
+        try:
+            import tiktoken
+
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable ({e}); estimating tokens from characters")
+            return None
+
+    def count(self, text: str) -> int:
+        encoding = self.encoding
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return max(1, len(text) // 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        encoding = self.encoding
+        if encoding is not None:
+            tokens = encoding.encode(text, disallowed_special=())
+            return encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 4]
+
+
+class ContextPacker:
+    """
+    Selects retrieved documents for the prompt under a token budget.
+
+    Candidates from all collections are ranked together by distance (pinned
+    candidates, e.g. chronologically sorted temporal results, go first in
+    their given order). Near-duplicates are dropped and documents are added
+    until the budget is full.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        dedup_threshold: Optional[float] = None,
+        min_chunk_tokens: int = 100,
+    ):
+        self.token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+        self.max_distance = max_distance if max_distance is not None else settings.CONTEXT_MAX_DISTANCE
+        self.dedup_threshold = dedup_threshold if dedup_threshold is not None else settings.CONTEXT_DEDUP_THRESHOLD
+        self.min_chunk_tokens = min_chunk_tokens
+        self.counter = TokenCounter(settings.AI_PROVIDER_MODEL)
+
+    @staticmethod
+    def _shingles(text: str, size: int = 3) -> set:
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) < size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    def _is_duplicate(self, shingles: set, selected: List[set]) -> bool:
+        for other in selected:
+            union = len(shingles | other)
+            if union and len(shingles & other) / union >= self.dedup_threshold:
+                return True
+        return False
+
+    def pack(
+        self, candidates: List[Dict[str, Any]], presorted: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Pick candidates for the prompt.
+
+        Args:
+            candidates: Dicts with 'collection', 'document', 'metadata',
+                'distance' and optional 'pinned'
+            presorted: Keep the given order instead of sorting by distance
+                (e.g. after reranking)
+
+        Returns:
+            Dict with the selected candidates (each with 'tokens') in rank
+            order, total 'tokens' used and counts of dropped candidates
+        """
+        # Pinned candidates were chosen for a non-semantic reason, so keep them
+        eligible = [
+            c for c in candidates if c.get("pinned") or c["distance"] < self.max_distance
+        ]
+        pinned = [c for c in eligible if c.get("pinned")]
+        unpinned = [c for c in eligible if not c.get("pinned")]
+        if not presorted:
+            unpinned.sort(key=lambda c: c["distance"])
+        ranked = pinned + unpinned
+
+        selected = []
+        selected_shingles: List[set] = []
+        used = 0
+        duplicates = over_budget = 0
+
+        for candidate in ranked:
+            shingles = self._shingles(candidate["document"])
+            if self._is_duplicate(shingles, selected_shingles):
+                duplicates += 1
+                continue
+
+            document = candidate["document"]
+            tokens = self.counter.count(document)
+            remaining = self.token_budget - used
+            if tokens > remaining:
+                if remaining < self.min_chunk_tokens:
+                    over_budget += 1
+                    continue
+                document = self.counter.truncate(document, remaining)
+                tokens = self.counter.count(document)
+
+            selected.append({**candidate, "document": document, "tokens": tokens})
+            selected_shingles.append(shingles)
+            used += tokens
+
+        return {
+            "selected": selected,
+            "tokens": used,
+            "dropped_duplicates": duplicates,
+            "dropped_over_budget": over_budget,
+            "filtered_by_distance": len(candidates) - len(eligible),
+        }
@@ -1,126 +1,306 @@
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from typing import List, Dict, Any
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from typing import List, Dict, Any, Optional, AsyncIterator
+from datetime import datetime, timezone
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+SECURITY_LOGS_QUERY = text("""
+    SELECT
+        id,
+        "sessionId",
+        "activityType",
+        severity,
+        details,
+        "ipAddress",
+        "userAgent",
+        timestamp
+    FROM security_audit_logs
+    ORDER BY timestamp DESC
+    LIMIT :limit
+""")
+
+SECURITY_LOGS_STREAM_SQL = """
+    SELECT
+        id,
+        "sessionId",
+        "activityType",
+        severity,
+        details,
+        "ipAddress",
+        "userAgent",
+        timestamp
+    FROM security_audit_logs
+    {where}
+    ORDER BY timestamp ASC, id ASC
+"""
+
+SECURITY_LOGS_PAGE_SQL = """
+    SELECT
+        id,
+        "sessionId",
+        "activityType",
+        severity,
+        details,
+        "ipAddress",
+        "userAgent",
+        timestamp
+    FROM security_audit_logs
+    {where}
+    ORDER BY timestamp ASC, id ASC
+    LIMIT :limit
+"""
+
+CHAT_MESSAGES_QUERY = text("""
+    SELECT
+        id,
+        "sessionId",
+        role,
+        content,
+        timestamp,
+        sanitized,
+        flagged
+    FROM chat_messages
+    ORDER BY timestamp DESC
+    LIMIT :limit
+""")
+
+ATTACK_PATTERNS_QUERY = text("""
+    SELECT
+        "activityType",
+        severity,
+        COUNT(*) as count,
+        MAX(timestamp) as last_occurrence
+    FROM security_audit_logs
+    GROUP BY "activityType", severity
+    ORDER BY count DESC
+""")
+
+
+def _security_log(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "sessionId": row.sessionId,
+        "activityType": row.activityType,
+        "severity": row.severity,
+        "details": row.details,
+        "ipAddress": row.ipAddress,
+        "userAgent": row.userAgent,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+    }
+
+
+def _chat_message(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "sessionId": row.sessionId,
+        "role": row.role,
+        "content": row.content,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        "sanitized": row.sanitized,
+        "flagged": row.flagged,
+    }
+
+
+def _attack_pattern(row) -> Dict[str, Any]:
+    return {
+        "activityType": row.activityType,
+        "severity": row.severity,
+        "count": row.count,
+        "last_occurrence": row.last_occurrence.isoformat() if row.last_occurrence else None,
+    }
+
+
+def naive_utc(value: datetime) -> datetime:
+    """
+    The audit log timestamps are 'timestamp without time zone' in UTC, and
+    asyncpg refuses to compare them with aware datetimes.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def async_database_url(database_url: str) -> URL:
+    """Point a postgres:// URL at the asyncpg driver (sslmode becomes ssl)."""
+    url = make_url(database_url.replace("postgres://", "postgresql://", 1))
+    url = url.set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url
+
 
 class DatabaseService:
-    """Read-only database service for accessing security logs and chat data."""
+    """
+    Read-only database service for accessing security logs and chat data.
+
+    The API uses the async methods, which run on a pooled asyncpg engine so
+    Postgres round-trips don't block the event loop. The sync get_* methods
+    run the same queries on a psycopg2 engine for the embedding scripts.
+    Both engines are created on first use.
+    """
 
     def __init__(self):
-        # Create read-only engine
-        self.engine = create_engine(
-            settings.POSTGRES_URL,
-            pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
-        )
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self._async_engine: Optional[AsyncEngine] = None
+        self._sync_engine = None
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._async_engine = create_async_engine(
+                async_database_url(settings.POSTGRES_URL),
+                pool_pre_ping=True,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            )
+        return self._async_engine
+
+    @property
+    def engine(self):
+        if self._sync_engine is None:
+            # Create read-only engine
+            self._sync_engine = create_engine(
+                settings.POSTGRES_URL,
+                pool_pre_ping=True,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+            )
+        return self._sync_engine
+
+    async def _fetch_all(self, query, params: Dict[str, Any], mapper) -> List[Dict[str, Any]]:
+        async with self.async_engine.connect() as conn:
+            conn = await conn.execution_options(postgresql_readonly=True)
+            result = await conn.execute(query, params)
+            return [mapper(row) for row in result]
+
+    def _fetch_all_sync(self, query, params: Dict[str, Any], mapper) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            result = conn.execute(query, params)
+            return [mapper(row) for row in result]
+
+    async def fetch_security_logs(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Fetch recent security audit logs, newest first."""
+        try:
+            return await self._fetch_all(SECURITY_LOGS_QUERY, {"limit": limit}, _security_log)
+        except Exception as e:
+            logger.error(f"Error fetching security logs: {e}")
+            return []
+
+    async def fetch_chat_messages(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Fetch recent chat messages, newest first."""
+        try:
+            return await self._fetch_all(CHAT_MESSAGES_QUERY, {"limit": limit}, _chat_message)
+        except Exception as e:
+            logger.error(f"Error fetching chat messages: {e}")
+            return []
+
+    async def fetch_attack_patterns(self) -> List[Dict[str, Any]]:
+        """Count security events per activity type and severity."""
+        try:
+            return await self._fetch_all(ATTACK_PATTERNS_QUERY, {}, _attack_pattern)
+        except Exception as e:
+            logger.error(f"Error fetching attack patterns: {e}")
+            return []
+
+    async def stream_security_logs(
+        self,
+        since: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream security logs oldest first through a server-side cursor.
+
+        Rows are fetched batch_size at a time, so memory stays flat however
+        large the table is. Errors propagate to the caller, since a partial
+        stream can't be silently turned into an empty one.
+
+        Args:
+            since: Only logs with a timestamp after this one (aware values
+                are converted to UTC)
+            batch_size: Rows per cursor fetch (default: DB_STREAM_BATCH_SIZE)
+        """
+        batch_size = batch_size or settings.DB_STREAM_BATCH_SIZE
+        async with self.async_engine.connect() as conn:
+            conn = await conn.execution_options(postgresql_readonly=True, yield_per=batch_size)
+            where = "WHERE timestamp > :since" if since is not None else ""
+            result = await conn.stream(
+                text(SECURITY_LOGS_STREAM_SQL.format(where=where)),
+                {"since": naive_utc(since)} if since is not None else {},
+            )
+            async for row in result:
+                yield _security_log(row)
 
     def get_security_logs(self, limit: int = 1000) -> List[Dict[str, Any]]:
-        """Fetch recent security audit logs for embedding."""
+        """Fetch recent security audit logs for embedding (sync, for scripts)."""
         try:
-            with self.SessionLocal() as session:
-                query = text("""
-                    SELECT
-                        id,
-                        "sessionId",
-                        "activityType",
-                        severity,
-                        details,
-                        "ipAddress",
-                        "userAgent",
-                        timestamp
-                    FROM security_audit_logs
-                    ORDER BY timestamp DESC
-                    LIMIT :limit
-                """)
-                result = session.execute(query, {"limit": limit})
-                logs = []
-                for row in result:
-                    logs.append({
-                        "id": row.id,
-                        "sessionId": row.sessionId,
-                        "activityType": row.activityType,
-                        "severity": row.severity,
-                        "details": row.details,
-                        "ipAddress": row.ipAddress,
-                        "userAgent": row.userAgent,
-                        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
-                    })
-                return logs
+            return self._fetch_all_sync(SECURITY_LOGS_QUERY, {"limit": limit}, _security_log)
         except Exception as e:
             logger.error(f"Error fetching security logs: {e}")
             return []
 
+    def get_security_logs_page(
+        self,
+        after_timestamp: Optional[datetime] = None,
+        after_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch the next page of security logs in (timestamp, id) order (sync).
+
+        Keyset pagination: pass the timestamp and id of the last row seen to
+        get the rows after it, without OFFSET scans. Errors propagate so an
+        ingestion run can stop without advancing its watermark.
+        """
+        params: Dict[str, Any] = {"limit": limit}
+        where = ""
+        if after_timestamp is not None:
+            where = "WHERE (timestamp, id) > (:after_timestamp, :after_id)"
+            params.update(after_timestamp=after_timestamp, after_id=after_id or "")
+        return self._fetch_all_sync(
+            text(SECURITY_LOGS_PAGE_SQL.format(where=where)), params, _security_log
+        )
+
     def get_chat_messages(self, limit: int = 1000) -> List[Dict[str, Any]]:
-        """Fetch recent chat messages for context."""
+        """Fetch recent chat messages for context (sync, for scripts)."""
         try:
-            with self.SessionLocal() as session:
-                query = text("""
-                    SELECT
-                        id,
-                        "sessionId",
-                        role,
-                        content,
-                        timestamp,
-                        sanitized,
-                        flagged
-                    FROM chat_messages
-                    ORDER BY timestamp DESC
-                    LIMIT :limit
-                """)
-                result = session.execute(query, {"limit": limit})
-                messages = []
-                for row in result:
-                    messages.append({
-                        "id": row.id,
-                        "sessionId": row.sessionId,
-                        "role": row.role,
-                        "content": row.content,
-                        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
-                        "sanitized": row.sanitized,
-                        "flagged": row.flagged,
-                    })
-                return messages
+            return self._fetch_all_sync(CHAT_MESSAGES_QUERY, {"limit": limit}, _chat_message)
         except Exception as e:
             logger.error(f"Error fetching chat messages: {e}")
             return []
 
     def get_attack_patterns(self) -> List[Dict[str, Any]]:
-        """Analyze and return attack patterns from security logs."""
+        """Analyze and return attack patterns from security logs (sync, for scripts)."""
         try:
-            with self.SessionLocal() as session:
-                query = text("""
-                    SELECT
-                        "activityType",
-                        severity,
-                        COUNT(*) as count,
-                        MAX(timestamp) as last_occurrence
-                    FROM security_audit_logs
-                    GROUP BY "activityType", severity
-                    ORDER BY count DESC
-                """)
-                result = session.execute(query)
-                patterns = []
-                for row in result:
-                    patterns.append({
-                        "activityType": row.activityType,
-                        "severity": row.severity,
-                        "count": row.count,
-                        "last_occurrence": row.last_occurrence.isoformat() if row.last_occurrence else None,
-                    })
-                return patterns
+            return self._fetch_all_sync(ATTACK_PATTERNS_QUERY, {}, _attack_pattern)
         except Exception as e:
             logger.error(f"Error fetching attack patterns: {e}")
             return []
 
-    def close(self):
-        """Close database connection."""
-        self.engine.dispose()
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage of the async engine."""
+        if self._async_engine is None:
+            return {"initialized": False}
+        pool = self._async_engine.pool
+        return {
+            "initialized": True,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    async def close(self):
+        """Close database connections."""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._sync_engine is not None:
+            self._sync_engine.dispose()
 
 
 # Singleton instance
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from app.core.config import settings
+from app.workers.extraction import ExtractionError, extract_text
+import asyncio
+import logging
+import multiprocessing
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentExtractor:
+    """
+    Extracts text from uploaded files in a pool of worker processes.
+
+    PDF parsing is CPU-heavy pure Python, so it runs outside the API
+    process: it neither blocks the event loop nor holds the GIL against
+    request handling, and a pathological file can only take down a worker.
+    Workers are spawned (not forked from the threaded API process) on
+    first use, and the pool is rebuilt if a worker dies.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.EXTRACTION_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(self, path: str, extension: str) -> str:
+        """
+        Extract a file's text in a worker process.
+
+        Raises:
+            ExtractionError: The file is unreadable, timed out or crashed its worker
+        """
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, extract_text, path, extension),
+                timeout=settings.EXTRACTION_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            # The busy worker can't be interrupted; it exits once done and new
+            # uploads get a fresh pool
+            logger.warning(f"Text extraction timed out after {settings.EXTRACTION_TIMEOUT_SECONDS}s")
+            self._reset_pool(pool)
+            raise ExtractionError("Text extraction timed out")
+        except BrokenProcessPool:
+            logger.error("Text extraction worker died; restarting the pool")
+            self._reset_pool(pool)
+            raise ExtractionError("Text extraction failed")
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+document_extractor = DocumentExtractor()
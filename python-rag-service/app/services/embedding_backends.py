@@ -0,0 +1,213 @@
+"""
+Embedding backends used by ChromaService.
+
+All backends return L2-normalized float32 arrays of shape (n, dimension):
+- sentence-transformers: PyTorch SentenceTransformer (default)
+- onnx: ONNX Runtime with the model's exported onnx/model.onnx
+- onnx-int8: the same graph with dynamically int8-quantized weights
+
+With EMBEDDING_WORKERS > 0 the selected backend runs in worker processes
+instead (see embedding_workers.EmbeddingWorkerPool).
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend(ABC):
+    """Interface for text embedding backends."""
+
+    name: str = ""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Embedding vector dimension."""
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Embed texts into normalized float32 vectors."""
+
+    def encode_query(self, texts: List[str]) -> np.ndarray:
+        """Embed query-time texts (backends with a work queue serve these first)."""
+        return self.encode(texts)
+
+    def close(self) -> None:
+        """Release resources held outside the process (worker pools)."""
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "model": self.model_name,
+            "dimension": self.dimension,
+        }
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """PyTorch SentenceTransformer backend."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX Runtime backend with mean pooling, matching the sentence-transformers
+    pipeline of MiniLM-style models.
+
+    The graph is taken from the model's Hugging Face repo (onnx/model.onnx),
+    or from EMBEDDING_ONNX_PATH when set.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name: str, max_seq_length: int = 256):
+        super().__init__(model_name)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(self.repo_id)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.EMBEDDING_ONNX_THREADS > 0:
+            options.intra_op_num_threads = settings.EMBEDDING_ONNX_THREADS
+
+        self.model_path = self._resolve_model_path()
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"Loaded ONNX embedding model from {self.model_path}")
+
+    def _base_model_path(self) -> str:
+        if settings.EMBEDDING_ONNX_PATH:
+            return settings.EMBEDDING_ONNX_PATH
+
+        from huggingface_hub import hf_hub_download
+
+        return hf_hub_download(repo_id=self.repo_id, filename="onnx/model.onnx")
+
+    def _resolve_model_path(self) -> str:
+        return self._base_model_path()
+
+    @property
+    def dimension(self) -> int:
+        if isinstance(self._dimension, int):
+            return self._dimension
+        # Symbolic output shape; probe once
+        return int(self.encode(["dimension probe"]).shape[1])
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            tokens = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {
+                name: tokens[name].astype(np.int64)
+                for name in ("input_ids", "attention_mask", "token_type_ids")
+                if name in self._input_names and name in tokens
+            }
+            if "token_type_ids" in self._input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over non-padding tokens
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            batches.append((pooled / np.clip(norms, 1e-12, None)).astype(np.float32))
+
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(batches)
+
+
+class QuantizedOnnxBackend(OnnxBackend):
+    """ONNX backend with int8 dynamically quantized weights."""
+
+    name = "onnx-int8"
+
+    def _resolve_model_path(self) -> str:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        cache_dir = settings.EMBEDDING_MODEL_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        quantized_path = os.path.join(
+            cache_dir, f"{self.repo_id.replace('/', '__')}-int8.onnx"
+        )
+
+        if not os.path.exists(quantized_path):
+            logger.info(f"Quantizing ONNX model to int8 at {quantized_path}...")
+            quantize_dynamic(
+                self._base_model_path(),
+                quantized_path,
+                weight_type=QuantType.QInt8,
+            )
+
+        return quantized_path
+
+
+EMBEDDING_BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxBackend.name: OnnxBackend,
+    QuantizedOnnxBackend.name: QuantizedOnnxBackend,
+}
+
+
+def create_embedding_backend(
+    backend_name: Optional[str] = None, model_name: Optional[str] = None
+) -> EmbeddingBackend:
+    """Build the embedding backend selected by EMBEDDING_BACKEND."""
+    backend_name = backend_name or settings.EMBEDDING_BACKEND
+    model_name = model_name or settings.EMBEDDING_MODEL
+
+    backend_cls = EMBEDDING_BACKENDS.get(backend_name)
+    if backend_cls is None:
+        raise ValueError(
+            f"Unknown EMBEDDING_BACKEND '{backend_name}'. "
+            f"Choose one of: {', '.join(EMBEDDING_BACKENDS)}"
+        )
+
+    logger.info(f"Loading embedding backend {backend_name} ({model_name})")
+    return backend_cls(model_name)
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache for query embeddings with optional TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace and lowercase (the default MiniLM model is uncased)."""
+        return " ".join(text.split()).lower()
+
+    def _key(self, text: str, model_name: str) -> Tuple[str, str]:
+        return (model_name, self.normalize(text))
+
+    def get(self, text: str, model_name: str) -> Optional[List[float]]:
+        """Return the cached embedding, or None on a miss or expired entry."""
+        if self.max_size <= 0:
+            return None
+
+        key = self._key(text, model_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, embedding = entry
+                if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(embedding)
+            self.misses += 1
+            return None
+
+    def put(self, text: str, model_name: str, embedding: List[float]) -> None:
+        """Store an embedding, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+
+        key = self._key(text, model_name)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), tuple(embedding))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
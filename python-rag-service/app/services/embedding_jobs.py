@@ -0,0 +1,87 @@
+from typing import Any, Callable, List, Tuple
+from app.core.config import settings
+from app.services.chroma_service import chroma_service
+from app.services.job_manager import Job, JobSkipped, job_manager
+import importlib
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Project root (where the scripts package lives)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _import_script(module: str):
+    if APP_ROOT not in sys.path:
+        sys.path.insert(0, APP_ROOT)
+    return importlib.import_module(f"scripts.{module}")
+
+
+def _script_stage(module: str, function: str) -> Callable[[], Any]:
+    """A stage that calls scripts.<module>.<function>(), imported on first run."""
+    def run():
+        getattr(_import_script(module), function)()
+    return run
+
+
+def _embed_github_repos() -> None:
+    github_token = settings.GITHUB_TOKEN or os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        logger.warning("[jobs] GITHUB_TOKEN not set — skipping GitHub repos.")
+        return
+    _import_script("fetch_github_repos").embed_github_repos(github_token)
+
+
+def _require_empty_store() -> None:
+    """Wait for the model warm-up, then skip the job if the store is populated."""
+    chroma_service.wait_until_ready()
+    portfolio_count = chroma_service.get_collection_count("portfolio")
+    if portfolio_count:
+        raise JobSkipped(f"Collections already populated (portfolio: {portfolio_count} docs)")
+    logger.info(
+        "Portfolio collection is empty — starting background embedding. "
+        "RAG responses will be limited until embedding completes (~1-2 min)."
+    )
+
+
+PORTFOLIO = ("portfolio", _script_stage("embed_initial_data", "embed_portfolio_data"))
+DOCUMENTATION = ("documentation", _script_stage("embed_initial_data", "embed_documentation"))
+PRIVATE_NOTES = ("private_notes", _script_stage("embed_initial_data", "embed_private_readmes"))
+SECURITY_LOGS = ("security_logs", _script_stage("embed_initial_data", "embed_security_logs"))
+GITHUB_REPOS = ("github_repos", _embed_github_repos)
+
+
+def _invalidate_answers(job: Job) -> None:
+    # Cached answers may reference replaced documents
+    from app.services.rag_service import rag_service
+    rag_service.response_cache.invalidate()
+
+
+def _submit(kind: str, stages: List[Tuple[str, Callable[[], Any]]], invalidate: bool = True) -> Tuple[Job, bool]:
+    return job_manager.submit(kind, stages, on_finish=_invalidate_answers if invalidate else None)
+
+
+def submit_initial_embedding() -> Tuple[Job, bool]:
+    """Embed portfolio, docs and GitHub repos if the store is empty (startup)."""
+    return _submit(
+        "initial_embedding",
+        [("check_empty", _require_empty_store), PORTFOLIO, DOCUMENTATION, GITHUB_REPOS],
+        invalidate=False,
+    )
+
+
+def submit_initial_data() -> Tuple[Job, bool]:
+    """Re-embed the public sources: portfolio, docs, security logs and GitHub (no private notes)."""
+    return _submit("initial_data", [PORTFOLIO, DOCUMENTATION, SECURITY_LOGS, GITHUB_REPOS])
+
+
+def submit_reembed() -> Tuple[Job, bool]:
+    """Re-embed every source: portfolio, docs, private notes, security logs and GitHub."""
+    return _submit("reembed", [PORTFOLIO, DOCUMENTATION, PRIVATE_NOTES, SECURITY_LOGS, GITHUB_REPOS])
+
+
+def submit_github_embedding() -> Tuple[Job, bool]:
+    """Re-embed GitHub repositories only."""
+    return _submit("github_embedding", [GITHUB_REPOS])
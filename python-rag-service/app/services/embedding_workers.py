@@ -0,0 +1,286 @@
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.services.embedding_backends import EmbeddingBackend, create_embedding_backend
+from app.workers.embedding import serve
+import itertools
+import logging
+import multiprocessing
+import numpy as np
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+QUERY_PRIORITY = 0
+INGEST_PRIORITY = 1
+
+# Delay before retrying a worker that failed to restart, doubling up to the max
+RESTART_BACKOFF_SECONDS = 5.0
+RESTART_BACKOFF_MAX_SECONDS = 300.0
+
+
+class _Worker:
+    """One embedding process and the pipe to it."""
+
+    def __init__(self, index: int, backend_name: str, model_name: str, threads: int):
+        self.index = index
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=serve,
+            args=(child_conn, backend_name, model_name, threads),
+            name=f"embedding-worker-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout: float) -> int:
+        if not self.conn.poll(timeout):
+            raise RuntimeError(f"embedding worker {self.index} did not start within {timeout}s")
+        status, payload = self.conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"embedding worker {self.index} failed to load: {payload}")
+        return payload
+
+    def kill(self) -> None:
+        """Stop a hung worker without waiting for it to answer."""
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class EmbeddingWorkerPool(EmbeddingBackend):
+    """
+    Embedding backend that runs the configured backend in worker processes.
+
+    Each of EMBEDDING_WORKERS spawned processes loads the model once. Texts
+    are split into EMBEDDING_BATCH_SIZE batches and sent over pipes, so a
+    large ingest is spread over all workers (and cores) instead of competing
+    with request handling for the API process's CPU and GIL. Query-time
+    batches (encode_query) are queued ahead of ingest batches, so a query
+    waits for at most one in-flight batch.
+
+    A worker that dies, or doesn't answer a batch within
+    EMBEDDING_WORKER_BATCH_TIMEOUT_SECONDS, is killed and restarted, and its
+    batch fails. While a slot's worker can't be restarted, its dispatcher
+    embeds with an in-process backend and retries the restart with backoff.
+    """
+
+    name = "worker-pool"
+
+    def __init__(
+        self,
+        workers: int,
+        backend_name: Optional[str] = None,
+        model_name: Optional[str] = None,
+        threads: Optional[int] = None,
+    ):
+        super().__init__(model_name or settings.EMBEDDING_MODEL)
+        self.backend_name = backend_name or settings.EMBEDDING_BACKEND
+        self.threads = threads or settings.EMBEDDING_WORKER_THREADS
+        self.stats = {
+            "batches": 0, "texts": 0, "query_batches": 0, "errors": 0,
+            "timeouts": 0, "restarts": 0, "fallback_batches": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._closed = False
+
+        # In-process backend for slots whose worker failed to restart (loaded on first use)
+        self._fallback: Optional[EmbeddingBackend] = None
+        self._fallback_lock = threading.Lock()
+        self._restart_failures = [0] * workers
+        self._retry_at = [0.0] * workers
+
+        logger.info(f"Starting {workers} embedding workers ({self.backend_name}, {self.model_name})")
+        self._workers: List[Optional[_Worker]] = [self._start_worker(index) for index in range(workers)]
+        try:
+            dimensions = {
+                worker.wait_ready(settings.EMBEDDING_WORKER_START_TIMEOUT_SECONDS)
+                for worker in self._workers
+            }
+        except Exception:
+            for worker in self._workers:
+                worker.stop()
+            raise
+        self._dimension = dimensions.pop()
+
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, args=(index,), name=f"embedding-dispatch-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    def _start_worker(self, index: int) -> _Worker:
+        return _Worker(index, self.backend_name, self.model_name, self.threads)
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _dispatch(self, index: int) -> None:
+        """Feed one worker from the shared queue, restarting it if it dies or hangs."""
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                return
+            texts, batch_size, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            worker = self._workers[index]
+            if worker is None and not self._closed and time.monotonic() >= self._retry_at[index]:
+                worker = self._restart_worker(index)
+            if worker is None:
+                self._encode_in_process(texts, batch_size, future)
+                continue
+
+            timeout = settings.EMBEDDING_WORKER_BATCH_TIMEOUT_SECONDS
+            try:
+                worker.conn.send((texts, batch_size))
+                if not worker.conn.poll(timeout):
+                    raise TimeoutError(f"no answer within {timeout}s")
+                status, payload = worker.conn.recv()
+            except TimeoutError as e:
+                self._count(errors=1, timeouts=1)
+                future.set_exception(RuntimeError(f"embedding worker {index} hung: {e}"))
+                logger.error(f"Embedding worker {index} hung; killing and restarting it")
+                worker.kill()
+                if not self._closed:
+                    self._restart_worker(index)
+                continue
+            except (OSError, EOFError) as e:
+                self._count(errors=1)
+                future.set_exception(RuntimeError(f"embedding worker {index} died: {e}"))
+                logger.error(f"Embedding worker {index} died; restarting it")
+                if not self._closed:
+                    self._restart_worker(index)
+                continue
+
+            if status == "ok":
+                future.set_result(payload)
+            else:
+                self._count(errors=1)
+                future.set_exception(RuntimeError(payload))
+
+    def _restart_worker(self, index: int) -> Optional[_Worker]:
+        """Replace a slot's worker; None (and a backoff) if the new one fails to start."""
+        self._count(restarts=1)
+        old = self._workers[index]
+        self._workers[index] = None
+        if old is not None:
+            old.stop()
+
+        worker = self._start_worker(index)
+        try:
+            worker.wait_ready(settings.EMBEDDING_WORKER_START_TIMEOUT_SECONDS)
+        except Exception as e:
+            worker.stop()
+            self._restart_failures[index] += 1
+            delay = min(
+                RESTART_BACKOFF_SECONDS * 2 ** (self._restart_failures[index] - 1),
+                RESTART_BACKOFF_MAX_SECONDS,
+            )
+            self._retry_at[index] = time.monotonic() + delay
+            logger.error(
+                f"Embedding worker {index} failed to restart: {e}; "
+                f"embedding in-process, retrying in {delay:.0f}s"
+            )
+            return None
+
+        self._restart_failures[index] = 0
+        self._workers[index] = worker
+        return worker
+
+    def _encode_in_process(self, texts: List[str], batch_size: int, future: Future) -> None:
+        """Embed a batch in this process while the slot has no worker."""
+        try:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    logger.warning("Loading the embedding model in the API process as a worker fallback")
+                    self._fallback = create_embedding_backend(self.backend_name, self.model_name)
+                embeddings = self._fallback.encode(texts, batch_size=batch_size)
+        except Exception as e:
+            self._count(errors=1)
+            future.set_exception(e)
+            return
+        self._count(fallback_batches=1)
+        future.set_result(embeddings)
+
+    def _submit(self, texts: List[str], batch_size: int, priority: int) -> Future:
+        if self._closed:
+            raise RuntimeError("embedding worker pool is closed")
+        future: Future = Future()
+        self._queue.put((priority, next(self._sequence), (texts, batch_size, future)))
+        return future
+
+    def _encode(self, texts: List[str], batch_size: int, priority: int) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        futures = [
+            self._submit(texts[start:start + batch_size], batch_size, priority)
+            for start in range(0, len(texts), batch_size)
+        ]
+        self._count(
+            batches=len(futures),
+            texts=len(texts),
+            query_batches=len(futures) if priority == QUERY_PRIORITY else 0,
+        )
+        return np.concatenate([future.result() for future in futures])
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self._encode(texts, batch_size, INGEST_PRIORITY)
+
+    def encode_query(self, texts: List[str]) -> np.ndarray:
+        return self._encode(texts, settings.EMBEDDING_BATCH_SIZE, QUERY_PRIORITY)
+
+    def info(self) -> Dict[str, Any]:
+        workers = list(self._workers)
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **super().info(),
+            "worker_backend": self.backend_name,
+            "workers": len(workers),
+            "alive": sum(worker is not None and worker.process.is_alive() for worker in workers),
+            "unavailable": sum(worker is None for worker in workers),
+            "queued": self._queue.qsize(),
+            **stats,
+        }
+
+    def close(self) -> None:
+        """Stop the dispatchers and worker processes."""
+        if self._closed:
+            return
+        self._closed = True
+        # Sentinels sort after every pending batch, so queued work finishes first
+        for _ in self._dispatchers:
+            self._queue.put((INGEST_PRIORITY + 1, next(self._sequence), None))
+        for dispatcher in self._dispatchers:
+            dispatcher.join(timeout=5)
+        for worker in self._workers:
+            if worker is not None:
+                worker.stop()
+        if self._fallback is not None:
+            self._fallback.close()
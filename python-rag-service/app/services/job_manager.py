@@ -0,0 +1,272 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from app.services.chroma_service import chroma_service
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+SKIPPED = "skipped"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED, SKIPPED)
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job once cancellation was requested.
+
+    A BaseException (like asyncio.CancelledError) so the stores' broad
+    `except Exception` handlers don't turn it into an ordinary failure.
+    """
+
+
+class JobSkipped(Exception):
+    """Raised by a stage to end its job early without error (e.g. nothing to do)."""
+
+
+class Job:
+    """
+    A background job made of named stages run in order.
+
+    Progress is tracked per stage as documents embedded (reported by
+    ChromaService.track_progress for embeddings made on the job's own
+    thread) and elapsed time. Cancellation is cooperative and takes effect
+    between stages and between embedding batches, or within a stage that
+    calls check_cancelled().
+    """
+
+    def __init__(self, kind: str, key: str, stages: List[Tuple[str, Callable[[], Any]]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.message: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stages = [
+            {"name": name, "status": QUEUED, "docs": 0, "seconds": None,
+             "_fn": fn, "_started": None}
+            for name, fn in stages
+        ]
+        self._cancel = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def _stage_progress(self, stage: Dict[str, Any]) -> Callable[[int], None]:
+        """Embedding callback for one stage: count the batch, then honor cancellation."""
+        def progress(count: int) -> None:
+            stage["docs"] += count
+            self.check_cancelled()
+        return progress
+
+    def to_dict(self, stage_estimates: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Status with per-stage throughput and, once a previous run is known, an ETA."""
+        now = time.monotonic()
+        stages, total_docs, total_seconds = [], 0, 0.0
+        eta: Optional[float] = 0.0 if not self.done else None
+
+        for stage in self.stages:
+            docs, seconds = stage["docs"], stage["seconds"]
+            if stage["status"] == RUNNING:
+                seconds = now - stage["_started"]
+            rate = round(docs / seconds, 2) if seconds else None
+            stages.append({
+                "name": stage["name"],
+                "status": stage["status"],
+                "docs": docs,
+                "seconds": round(seconds, 3) if seconds is not None else None,
+                "docs_per_second": rate,
+            })
+            total_docs += docs
+            total_seconds += seconds or 0.0
+
+            if eta is not None and stage["status"] in (QUEUED, RUNNING):
+                estimate = (stage_estimates or {}).get(stage["name"])
+                if estimate is None:
+                    eta = None
+                else:
+                    eta += max(0.0, estimate - (seconds or 0.0))
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "cancel_requested": self._cancel.is_set(),
+            "stages": stages,
+            "docs_embedded": total_docs,
+            "docs_per_second": round(total_docs / total_seconds, 2) if total_seconds else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+
+class JobManager:
+    """
+    Runs embedding jobs one at a time on a single worker thread.
+
+    Submitting a job while an unfinished one with the same key exists
+    returns the existing job instead of queueing a duplicate. Finished jobs
+    are kept (up to history_size) for the status endpoint, and each
+    stage's last duration is remembered per job kind to estimate ETAs.
+    """
+
+    def __init__(self, history_size: int = 50):
+        self.history_size = history_size
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._stage_seconds: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs")
+
+    def submit(
+        self,
+        kind: str,
+        stages: List[Tuple[str, Callable[[], Any]]],
+        key: Optional[str] = None,
+        on_finish: Optional[Callable[[Job], None]] = None,
+    ) -> Tuple[Job, bool]:
+        """
+        Queue a job unless an identical one is already queued or running.
+
+        Args:
+            kind: Job type, shown in the status and used for ETA estimates
+            stages: (name, callable) pairs run in order on the job thread
+            key: Deduplication key (default: kind)
+            on_finish: Called on the job thread after the job ends, however it ends
+
+        Returns:
+            Tuple of (job, created) where created is False for a deduplicated submit
+        """
+        key = key or kind
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and not job.done:
+                    return job, False
+
+            job = Job(kind, key, stages)
+            self._jobs[job.id] = job
+            self._trim()
+
+        self._executor.submit(self._run, job, on_finish)
+        logger.info(f"[jobs] Queued {kind} job {job.id}")
+        return job, True
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, on_finish: Optional[Callable[[Job], None]]) -> None:
+        job.started_at = datetime.utcnow()
+        try:
+            job.check_cancelled()
+            job.status = RUNNING
+            for stage in job.stages:
+                job.check_cancelled()
+                stage["_started"] = time.monotonic()
+                stage["status"] = RUNNING
+                logger.info(f"[jobs] {job.kind} {job.id}: {stage['name']}...")
+                try:
+                    with chroma_service.track_progress(job._stage_progress(stage)):
+                        stage["_fn"]()
+                    stage["status"] = SUCCEEDED
+                except JobCancelled:
+                    stage["status"] = CANCELLED
+                    raise
+                except JobSkipped:
+                    stage["status"] = SKIPPED
+                    raise
+                except Exception:
+                    stage["status"] = FAILED
+                    raise
+                finally:
+                    stage["seconds"] = time.monotonic() - stage["_started"]
+                if stage["status"] == SUCCEEDED:
+                    self._stage_seconds[(job.kind, stage["name"])] = stage["seconds"]
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+            logger.info(f"[jobs] {job.kind} {job.id} cancelled")
+        except JobSkipped as e:
+            job.status = SKIPPED
+            job.message = str(e) or None
+            logger.info(f"[jobs] {job.kind} {job.id} skipped: {e}")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"[jobs] {job.kind} {job.id} failed: {e}", exc_info=True)
+        finally:
+            for stage in job.stages:
+                if stage["status"] == QUEUED:
+                    stage["status"] = SKIPPED if job.status != CANCELLED else CANCELLED
+            job.finished_at = datetime.utcnow()
+            chroma_service.flush_lexical()
+            if job.status == SUCCEEDED:
+                logger.info(f"[jobs] {job.kind} {job.id} finished in {(job.finished_at - job.started_at).total_seconds():.1f}s")
+            if on_finish is not None:
+                try:
+                    on_finish(job)
+                except Exception as e:
+                    logger.error(f"[jobs] on_finish for {job.id} failed: {e}")
+
+    def _estimates(self, job: Job) -> Dict[str, float]:
+        return {
+            stage["name"]: self._stage_seconds[(job.kind, stage["name"])]
+            for stage in job.stages
+            if (job.kind, stage["name"]) in self._stage_seconds
+        }
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return job.to_dict(self._estimates(job)) if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All tracked jobs, newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict(self._estimates(job)) for job in reversed(jobs)]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation; returns the job's status or None if unknown."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.done:
+            job.cancel()
+        return job.to_dict(self._estimates(job))
+
+    def is_running(self, kind: Optional[str] = None) -> bool:
+        return any(
+            not job.done and (kind is None or job.kind == kind) for job in list(self._jobs.values())
+        )
+
+    def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+job_manager = JobManager()
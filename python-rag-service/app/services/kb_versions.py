@@ -0,0 +1,94 @@
+from typing import Dict, Iterable, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps from concurrent processes may race
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeBaseVersions:
+    """
+    Per-collection write counters kept in a JSON stamp file.
+
+    Every process that writes to the vector store (the API and the CLI
+    scripts) bumps the counter of the collection it changed in the same
+    file, and readers re-read the file whenever it's replaced. Caches
+    key on the versions of the collections they depend on, so a script run
+    invalidates them in the API process, and security log ingestion doesn't
+    invalidate answers built only from the portfolio.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._versions: Dict[str, int] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _read_file(self) -> Dict[str, int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            return {name: int(version) for name, version in payload.items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable knowledge base versions {self.path}: {e}")
+            return {}
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        # Every write replaces the file, so the inode changes even when two
+        # writes land within the filesystem's mtime resolution
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _refresh_locked(self) -> None:
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            self._versions = self._read_file() if stamp is not None else {}
+            self._stamp = stamp
+
+    def get(self, collections: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Current version of each collection (every known one by default)."""
+        with self._lock:
+            self._refresh_locked()
+            if collections is None:
+                return dict(self._versions)
+            return {name: self._versions.get(name, 0) for name in collections}
+
+    def version(self, collections: Iterable[str]) -> int:
+        """One number that changes whenever any of the collections changes."""
+        return sum(self.get(collections).values())
+
+    def bump(self, collection: str) -> int:
+        """Record a write to a collection; returns its new version."""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(f"{self.path}.lock", "a") as lock_file:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    versions = self._read_file()
+                    versions[collection] = versions.get(collection, 0) + 1
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(versions, f)
+                    os.replace(tmp_path, self.path)
+            except Exception as e:
+                # Still invalidate this process's caches
+                logger.warning(f"Could not persist knowledge base version for {collection}: {e}")
+                versions = dict(self._versions)
+                versions[collection] = versions.get(collection, 0) + 1
+                self._versions = versions
+                return versions[collection]
+            self._versions = versions
+            self._stamp = self._file_stamp()
+            return versions[collection]
@@ -0,0 +1,187 @@
+from collections import Counter
+from typing import List, Dict, Optional, Tuple, Iterable
+import json
+import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_CAMEL_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+# Letters NFKD doesn't decompose
+_FOLD_TABLE = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "đ": "d", "Đ": "D", "ß": "ss"})
+
+
+def _fold(token: str) -> str:
+    """Strip diacritics so 'protokół' also matches 'protokol'."""
+    decomposed = unicodedata.normalize("NFKD", token.translate(_FOLD_TABLE))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+
+    Adds diacritic-free variants and camelCase/snake_case parts, so
+    'skanerLekow' is indexed as 'skanerlekow', 'skaner' and 'lekow'.
+    """
+    terms = []
+    for raw in _TOKEN_PATTERN.findall(text):
+        token = raw.lower()
+        terms.append(token)
+
+        folded = _fold(token)
+        if folded != token:
+            terms.append(folded)
+
+        parts = [p.lower() for part in raw.split("_") for p in _CAMEL_PATTERN.findall(part)]
+        if len(parts) > 1:
+            terms.extend(_fold(p) for p in parts)
+    return terms
+
+
+class BM25Index:
+    """
+    In-process BM25 index over an inverted index, persisted as JSON.
+
+    Kept alongside a Chroma collection so exact names that embed poorly can
+    still be found lexically. Writes only mark the index dirty; flush()
+    persists it when something changed.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self._total_length -= self.doc_lengths.pop(doc_id, 0)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Index documents, replacing any existing entries with the same ID."""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                self._remove_locked(doc_id)
+                counts = Counter(tokenize(text or ""))
+                self.doc_terms[doc_id] = dict(counts)
+                length = sum(counts.values())
+                self.doc_lengths[doc_id] = length
+                self._total_length += length
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[doc_id] = tf
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove_locked(doc_id)
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.postings.clear()
+            self.doc_terms.clear()
+            self.doc_lengths.clear()
+            self._total_length = 0
+            self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the index changed since it was last saved."""
+        return self._dirty
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """Return up to n_results (doc_id, score) pairs, best first."""
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def save(self) -> None:
+        """Write the index atomically to its path."""
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"k1": self.k1, "b": self.b, "doc_terms": self.doc_terms}
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"Could not save lexical index {self.path}: {e}")
+
+    def flush(self) -> None:
+        """Save the index if it changed since the last save."""
+        if self._dirty:
+            self.save()
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index from disk, or return an empty one if missing/corrupt."""
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            index.k1 = payload.get("k1", index.k1)
+            index.b = payload.get("b", index.b)
+            for doc_id, terms in payload.get("doc_terms", {}).items():
+                index.doc_terms[doc_id] = terms
+                length = sum(terms.values())
+                index.doc_lengths[doc_id] = length
+                index._total_length += length
+                for term, tf in terms.items():
+                    index.postings.setdefault(term, {})[doc_id] = tf
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable lexical index {path}: {e}")
+            index.clear()
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(d) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,376 @@
+import httpx
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
+from app.core.config import settings
+from app.services.http_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    RETRYABLE_EXCEPTIONS,
+)
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency samples needed before the observed p95 replaces the configured default
+MIN_LATENCY_SAMPLES = 20
+
+
+class ProviderError(Exception):
+    """A provider failed to produce a completion."""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class LatencyWindow:
+    """Rolling window of recent latencies (seconds) with a p95 estimate."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class LLMProvider(ABC):
+    """Interface for a chat-completion provider."""
+
+    name: str
+    model: str
+
+    def __init__(self):
+        self.latency = LatencyWindow()
+        self.first_token_latency = LatencyWindow()
+
+    @property
+    @abstractmethod
+    def configured(self) -> bool:
+        """Whether the provider has the credentials it needs."""
+
+    @property
+    def available(self) -> bool:
+        """Whether a call is worth attempting right now."""
+        return self.configured
+
+    @abstractmethod
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        """Return the completion text or raise ProviderError."""
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas; raise ProviderError on failure."""
+
+    async def close(self) -> None:
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        p95 = self.latency.p95()
+        ttft_p95 = self.first_token_latency.p95()
+        return {
+            "model": self.model,
+            "configured": self.configured,
+            "latency_p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "first_token_p95_ms": round(ttft_p95 * 1000) if ttft_p95 is not None else None,
+        }
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Provider for any OpenAI-compatible /chat/completions API.
+
+    Keeps one pooled (HTTP/2 when available) client, retries 429/5xx and
+    transport errors with jittered backoff honoring Retry-After, and fails
+    fast through a circuit breaker while the provider is down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        api_key: str,
+        base_url: str,
+        model: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__()
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+
+        self.http2 = settings.LLM_HTTP2 and transport is None and _http2_available()
+        if settings.LLM_HTTP2 and not self.http2 and transport is None:
+            logger.warning(f"h2 package not installed; {name} client falls back to HTTP/1.1")
+
+        # One long-lived pooled client so connections are reused across requests
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=settings.LLM_CONNECT_TIMEOUT,
+                read=settings.LLM_READ_TIMEOUT,
+                write=settings.LLM_WRITE_TIMEOUT,
+                pool=settings.LLM_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            ),
+            http2=self.http2,
+            transport=transport,
+        )
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.LLM_MAX_RETRIES,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+        )
+        self.circuit = CircuitBreaker(
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.LLM_CIRCUIT_RESET_SECONDS,
+        )
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+        if not self.api_key:
+            logger.warning(f"No API key set for LLM provider '{name}'; it will be skipped.")
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def available(self) -> bool:
+        return self.configured and self.circuit.state != "open"
+
+    def _request(self, payload: Dict[str, Any], stream: bool = False) -> Dict[str, Any]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        if stream:
+            headers["Accept"] = "text/event-stream"
+        return {
+            "method": "POST",
+            "url": f"{self.base_url}/chat/completions",
+            "headers": headers,
+            "json": {"model": self.model, **payload, **({"stream": True} if stream else {})},
+        }
+
+    async def _send(self, request_kwargs: Dict[str, Any], stream: bool = False) -> httpx.Response:
+        """
+        Send a request with retries and the circuit breaker.
+
+        Retries 429/5xx responses and transport errors with jittered backoff,
+        honoring Retry-After. Returns the last response (which may still be an
+        error status); with stream=True the body is left unread and the caller
+        must close the response. The circuit breaker gets one verdict per
+        call, once it succeeds or its retries run out, so a single failing
+        request counts as one failure however often it was retried.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            httpx.TransportError: If the last attempt failed without a response
+        """
+        self.stats["requests"] += 1
+        if not self.circuit.allow_request():
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        attempt = 0
+        try:
+            while True:
+                request = self.client.build_request(**request_kwargs)
+                try:
+                    response = await self.client.send(request, stream=stream)
+                except RETRYABLE_EXCEPTIONS as e:
+                    delay = self.retry_policy.delay(attempt)
+                    if delay is None:
+                        raise
+                    logger.warning(f"{self.name} request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                else:
+                    if not self.retry_policy.is_retryable_status(response.status_code):
+                        self.circuit.record_success()
+                        return response
+
+                    delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                    if delay is None:
+                        self.stats["failures"] += 1
+                        self.circuit.record_failure()
+                        return response
+                    if stream:
+                        await response.aclose()
+                    logger.warning(f"{self.name} returned {response.status_code}, retrying in {delay:.2f}s")
+
+                self.stats["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+        except Exception:
+            self.stats["failures"] += 1
+            self.circuit.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (hedge loser, client disconnect): no verdict on the provider
+            self.circuit.release_trial()
+            raise
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        if not self.configured:
+            raise ProviderError(self.name, "API key not configured")
+
+        started = time.monotonic()
+        try:
+            response = await self._send(self._request({
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }))
+        except CircuitOpenError as e:
+            raise ProviderError(self.name, str(e)) from e
+        except httpx.HTTPError as e:
+            raise ProviderError(self.name, f"{type(e).__name__}: {e}") from e
+
+        if response.status_code >= 400:
+            logger.error(f"{self.name} API error: {response.status_code} - {response.text[:500]}")
+            raise ProviderError(self.name, f"HTTP {response.status_code}", response.status_code)
+
+        data = response.json()
+        if not data.get("choices"):
+            logger.error(f"Unexpected {self.name} response format: {data}")
+            raise ProviderError(self.name, "response has no choices")
+
+        self.latency.add(time.monotonic() - started)
+        return data["choices"][0]["message"]["content"]
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        if not self.configured:
+            raise ProviderError(self.name, "API key not configured")
+
+        started = time.monotonic()
+        try:
+            # Retries only happen before the first byte is streamed
+            response = await self._send(self._request({
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }, stream=True), stream=True)
+        except CircuitOpenError as e:
+            raise ProviderError(self.name, str(e)) from e
+        except httpx.HTTPError as e:
+            raise ProviderError(self.name, f"{type(e).__name__}: {e}") from e
+
+        try:
+            if response.status_code >= 400:
+                body = await response.aread()
+                logger.error(f"{self.name} API error: {response.status_code} - {body.decode(errors='replace')[:500]}")
+                raise ProviderError(self.name, f"HTTP {response.status_code}", response.status_code)
+
+            first = True
+            # Provider sends "data: {json}" lines terminated by "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+
+                try:
+                    chunk = json.loads(payload)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed stream chunk: {payload[:200]}")
+                    continue
+
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    if first:
+                        self.first_token_latency.add(time.monotonic() - started)
+                        first = False
+                    yield delta
+        except httpx.HTTPError as e:
+            raise ProviderError(self.name, f"{type(e).__name__}: {e}") from e
+        finally:
+            await response.aclose()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            **self.stats,
+            "http2": self.http2,
+            "circuit": self.circuit.snapshot(),
+        }
+
+
+# Provider name -> factory reading that provider's settings
+PROVIDER_REGISTRY: Dict[str, Callable[[], LLMProvider]] = {
+    "openai": lambda: OpenAICompatibleProvider(
+        "openai",
+        settings.AI_PROVIDER_API_KEY,
+        settings.AI_PROVIDER_BASE_URL,
+        settings.AI_PROVIDER_MODEL,
+    ),
+    "deepseek": lambda: OpenAICompatibleProvider(
+        "deepseek",
+        settings.DEEPSEEK_API_KEY,
+        settings.DEEPSEEK_BASE_URL,
+        settings.DEEPSEEK_MODEL,
+    ),
+}
+
+
+def create_providers(names: Optional[List[str]] = None) -> List[LLMProvider]:
+    """Instantiate providers in failover order (default: LLM_PROVIDERS)."""
+    names = names or settings.llm_providers_list
+    providers = []
+    for name in names:
+        factory = PROVIDER_REGISTRY.get(name)
+        if factory is None:
+            logger.error(f"Unknown LLM provider '{name}'; choose from {sorted(PROVIDER_REGISTRY)}")
+            continue
+        providers.append(factory())
+    return providers
@@ -0,0 +1,244 @@
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Awaitable, Tuple
+from app.core.config import settings
+from app.services.llm_providers import LLMProvider, LatencyWindow, ProviderError, create_providers
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+NOT_CONFIGURED_MESSAGE = "AI service is not configured. Please contact the administrator to set up the API key."
+UNAVAILABLE_MESSAGE = "Sorry, the AI service is temporarily unavailable. Please try again shortly."
+GENERIC_ERROR_MESSAGE = "Sorry, I encountered an error while processing your request."
+
+
+class LLMService:
+    """
+    Chat completions over an ordered list of providers.
+
+    The first available provider is asked first. If it hasn't answered by
+    its p95 latency (LLM_HEDGE_DELAY_MS until enough samples exist), the
+    next provider is started as a hedge; whichever answers first wins and
+    the other request is cancelled. When a provider fails outright, the
+    next one is tried in order. Streams are hedged on time to first token
+    and can only fail over before any content has been sent.
+    """
+
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        self.providers = providers if providers is not None else create_providers()
+        self.hedge_enabled = settings.LLM_HEDGE_ENABLED
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "errors": 0}
+
+        if not any(provider.configured for provider in self.providers):
+            logger.warning("No LLM provider has an API key! Chat will not work until one is configured.")
+
+    def _hedge_delay(self, window: LatencyWindow) -> float:
+        p95 = window.p95()
+        delay = p95 if p95 is not None else settings.LLM_HEDGE_DELAY_MS / 1000
+        return max(delay, settings.LLM_HEDGE_MIN_DELAY_MS / 1000)
+
+    async def _race(
+        self,
+        providers: List[LLMProvider],
+        start: Callable[[LLMProvider], Awaitable[Any]],
+        window: Callable[[LLMProvider], LatencyWindow],
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ) -> Tuple[LLMProvider, Any]:
+        """
+        Run start(provider) with one hedge and ordered failover.
+
+        Returns:
+            Tuple of (winning provider, its result)
+
+        Raises:
+            The last provider error if every provider failed
+        """
+        queue = list(providers)
+        tasks: Dict[asyncio.Task, LLMProvider] = {}
+        launched_at: Dict[asyncio.Task, float] = {}
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            provider = queue.pop(0)
+            task = asyncio.create_task(start(provider))
+            tasks[task] = provider
+            launched_at[task] = time.monotonic()
+
+        launch()
+        try:
+            while tasks:
+                timeout = None
+                if self.hedge_enabled and not hedged and queue and len(tasks) == 1:
+                    task, provider = next(iter(tasks.items()))
+                    deadline = launched_at[task] + self._hedge_delay(window(provider))
+                    timeout = max(0.0, deadline - time.monotonic())
+
+                done, _ = await asyncio.wait(
+                    tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    self.stats["hedged"] += 1
+                    logger.info(f"{next(iter(tasks.values())).name} is slow; hedging with {queue[0].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider is not providers[0]:
+                            self.stats["hedge_wins"] += 1
+                        return provider, task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM provider {provider.name} failed: {last_error}")
+
+                if not tasks and queue:
+                    self.stats["failovers"] += 1
+                    logger.info(f"Failing over to LLM provider {queue[0].name}")
+                    launch()
+
+            raise last_error
+        finally:
+            # Wait for the losers to unwind so their circuit trials and
+            # connections are released before returning
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if discard:
+                for task in tasks:
+                    if not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    def _error_message(self, error: BaseException) -> str:
+        self.stats["errors"] += 1
+        if isinstance(error, ProviderError) and error.status_code:
+            return f"API error: {error.status_code}"
+        return GENERIC_ERROR_MESSAGE
+
+    def _candidates(self) -> Tuple[List[LLMProvider], Optional[str]]:
+        """Providers worth calling now, or a fallback message when there are none."""
+        if not any(provider.configured for provider in self.providers):
+            logger.error("No LLM provider configured. Set AI_PROVIDER_API_KEY (or another provider's key).")
+            return [], NOT_CONFIGURED_MESSAGE
+        providers = [provider for provider in self.providers if provider.available]
+        if not providers:
+            logger.error("All LLM providers are failing fast (circuits open)")
+            self.stats["errors"] += 1
+            return [], UNAVAILABLE_MESSAGE
+        return providers, None
+
+    @staticmethod
+    def _format_messages(
+        messages: List[Dict[str, str]], system_prompt: Optional[str]
+    ) -> List[Dict[str, str]]:
+        formatted_messages = []
+        if system_prompt:
+            formatted_messages.append({
+                "role": "system",
+                "content": system_prompt,
+            })
+        formatted_messages.extend(messages)
+        return formatted_messages
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+    ) -> str:
+        """Get a chat completion, returning a fallback message on failure."""
+        self.stats["requests"] += 1
+        providers, fallback = self._candidates()
+        if fallback:
+            return fallback
+
+        formatted_messages = self._format_messages(messages, system_prompt)
+        try:
+            _, content = await self._race(
+                providers,
+                lambda provider: provider.complete(formatted_messages, temperature, max_tokens),
+                lambda provider: provider.latency,
+            )
+            return content
+        except Exception as e:
+            logger.error(f"Error getting chat completion: {e}")
+            return self._error_message(e)
+
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas (or a fallback message)."""
+        self.stats["requests"] += 1
+        providers, fallback = self._candidates()
+        if fallback:
+            yield fallback
+            return
+
+        formatted_messages = self._format_messages(messages, system_prompt)
+
+        async def open_stream(provider: LLMProvider):
+            stream = provider.stream(formatted_messages, temperature, max_tokens)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        async def discard(opened) -> None:
+            await opened[0].aclose()
+
+        try:
+            provider, (stream, first) = await self._race(
+                providers, open_stream, lambda provider: provider.first_token_latency, discard
+            )
+        except Exception as e:
+            logger.error(f"Error opening chat completion stream: {e}")
+            yield self._error_message(e)
+            return
+
+        try:
+            if first is None:
+                return
+            yield first
+            async for delta in stream:
+                yield delta
+        except Exception as e:
+            # Content was already sent, so switching providers isn't possible here
+            logger.error(f"Error streaming from {provider.name}: {e}")
+            yield self._error_message(e)
+        finally:
+            await stream.aclose()
+
+    @staticmethod
+    def is_error_response(text: str) -> bool:
+        """Check whether text is one of the fallback messages returned on failure."""
+        return text.startswith("API error:") or text in (
+            NOT_CONFIGURED_MESSAGE,
+            UNAVAILABLE_MESSAGE,
+            GENERIC_ERROR_MESSAGE,
+            "Sorry, I couldn't generate a response.",
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedging/failover counters and per-provider stats, in failover order."""
+        return {
+            **self.stats,
+            "hedge_enabled": self.hedge_enabled,
+            "providers": {provider.name: provider.get_stats() for provider in self.providers},
+        }
+
+    async def close(self):
+        """Close every provider's HTTP client."""
+        for provider in self.providers:
+            await provider.close()
+
+
+# Singleton instance
+llm_service = LLMService()
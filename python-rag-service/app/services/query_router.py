@@ -0,0 +1,343 @@
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from app.core.config import settings
+from app.services.chroma_service import COLLECTION_NAMES
+from app.services.lexical_index import _fold
+import numpy as np
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR_PATTERN = re.compile(r"[\s\-_/.,!?;:()\[\]\"'`]+")
+
+# Intent -> (collections to search, results per collection)
+ROUTE_PLANS: Dict[str, Tuple[List[str], int]] = {
+    "temporal": (["portfolio", "custom_docs"], 10),
+    "security": (["security_logs", "documentation"], 10),
+    "repo": (["custom_docs", "portfolio"], 6),
+    "skills": (["portfolio", "documentation", "custom_docs"], 6),
+    "general": (["portfolio", "documentation", "custom_docs"], 10),
+    "chitchat": ([], 0),
+}
+
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "earliest": ["earliest", "first", "oldest", "initial", "when did you start", "beginning"],
+    "latest": ["latest", "most recent", "newest", "last", "current", "currently", "recent", "recently"],
+    "commit": ["commit", "commits", "committed", "update", "updated", "updates"],
+    "security": [
+        "security", "attack", "attacks", "attacker", "threat", "threats", "vulnerability",
+        "vulnerabilities", "exploit", "intrusion", "malicious", "xss", "sql injection",
+        "injection", "brute force", "ddos", "csrf", "breach", "suspicious", "firewall",
+        "honeypot", "security log", "security logs", "bot traffic",
+    ],
+    "skills": [
+        "skill", "skills", "tech stack", "stack", "technologies", "technology", "languages",
+        "programming language", "frameworks", "framework", "experience", "experienced",
+        "proficient", "expertise", "good at", "know how", "familiar with", "resume", "cv",
+    ],
+    "chitchat": [
+        "hi", "hello", "hey", "yo", "thanks", "thank you", "thx", "good morning",
+        "good evening", "how are you", "who are you", "bye", "goodbye", "cheers", "ok", "okay",
+    ],
+}
+
+# Example queries per intent for the embedding fallback
+INTENT_PROTOTYPES: Dict[str, List[str]] = {
+    "security": [
+        "Have there been any attacks on the website?",
+        "Show me suspicious activity from the logs",
+        "What threats were detected recently?",
+    ],
+    "skills": [
+        "What technologies does Jakub work with?",
+        "Which programming languages do you know?",
+        "Tell me about your professional background",
+    ],
+    "repo": [
+        "Tell me about this project",
+        "What does this repository do?",
+        "Which projects have you built?",
+    ],
+    "chitchat": [
+        "Hello there",
+        "Thanks a lot!",
+        "How are you doing today?",
+    ],
+}
+
+CHITCHAT_MAX_WORDS = 6
+
+# Words that may accompany a greeting without making it a question
+CHITCHAT_FILLER = {
+    "a", "again", "all", "alright", "and", "bot", "buddy", "cool", "doing", "everyone",
+    "great", "guys", "lot", "man", "mate", "much", "nice", "oh", "so", "there", "today",
+    "too", "very", "well",
+}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, fold diacritics and collapse separators to single spaces."""
+    return f" {_SEPARATOR_PATTERN.sub(' ', _fold(text.lower())).strip()} "
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton for matching many phrases in one pass.
+
+    Phrases are matched on whole words only: text is normalized with
+    normalize_query, which pads it with spaces, and phrases are stored
+    padded the same way.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+    def add(self, phrase: str, label: str) -> None:
+        state = 0
+        for char in normalize_query(phrase):
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if label not in self._output[state]:
+            self._output[state].append(label)
+
+    def build(self) -> "AhoCorasick":
+        """Compute failure links; call once after adding every phrase."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state].extend(
+                    label for label in self._output[self._fail[next_state]]
+                    if label not in self._output[next_state]
+                )
+        return self
+
+    def find(self, normalized_text: str) -> Dict[str, int]:
+        """Count matches per label in text already passed through normalize_query."""
+        counts: Dict[str, int] = {}
+        state = 0
+        for char in normalized_text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for label in self._output[state]:
+                counts[label] = counts.get(label, 0) + 1
+        return counts
+
+
+def _repo_name_variants(name: str) -> Iterable[str]:
+    """'skanerLekow-app' -> 'skanerlekow app', 'skaner lekow app'."""
+    yield name
+    yield re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", name)
+
+
+_CHITCHAT_PATTERN = re.compile(
+    "(?: " + "|".join(
+        re.escape(normalize_query(phrase).strip())
+        for phrase in sorted(INTENT_KEYWORDS["chitchat"], key=len, reverse=True)
+    ) + ")(?= )"
+)
+
+
+def is_chitchat(normalized_text: str) -> bool:
+    """
+    Whether a normalized query is nothing but chit-chat.
+
+    'hi', 'thanks a lot' and 'hey, who are you?' qualify; 'hi, what projects
+    have you built?' does not, since words other than chit-chat phrases and
+    filler remain.
+    """
+    words = normalized_text.split()
+    if not words or len(words) > CHITCHAT_MAX_WORDS:
+        return False
+    remainder = _CHITCHAT_PATTERN.sub(" ", normalized_text).split()
+    return len(remainder) < len(words) and all(word in CHITCHAT_FILLER for word in remainder)
+
+
+# Where repo names for the repo automaton come from: (collection, filter, metadata field)
+REPO_NAME_SOURCES = [
+    ("portfolio", {"type": "github_repo"}, "repo_name"),
+    ("custom_docs", {"type": "repo_note"}, "repo"),
+]
+REPO_NAME_COLLECTIONS = [collection_name for collection_name, _, _ in REPO_NAME_SOURCES]
+
+
+class QueryRouter:
+    """
+    Classifies a query and picks the collections and result count to use.
+
+    Keyword intents (temporal, security, skills, chit-chat) and repo names
+    are matched with Aho-Corasick automata. Queries with no keyword hit fall
+    back to the nearest intent prototype by embedding similarity, and
+    otherwise to the general plan. The repo-name automaton is rebuilt when
+    a collection it reads repo names from changes.
+    """
+
+    def __init__(self, chroma, enabled: Optional[bool] = None, min_similarity: Optional[float] = None):
+        self.chroma = chroma
+        self.enabled = settings.QUERY_ROUTER_ENABLED if enabled is None else enabled
+        self.min_similarity = (
+            settings.QUERY_ROUTER_MIN_SIMILARITY if min_similarity is None else min_similarity
+        )
+
+        self._keywords = AhoCorasick()
+        for label, phrases in INTENT_KEYWORDS.items():
+            for phrase in phrases:
+                self._keywords.add(phrase, label)
+        self._keywords.build()
+
+        self._lock = threading.Lock()
+        self._repos: Optional[AhoCorasick] = None
+        self._repos_version: Optional[int] = None
+        self._prototype_labels: List[str] = []
+        self._prototypes: Optional[np.ndarray] = None
+        self.stats: Dict[str, int] = {intent: 0 for intent in ROUTE_PLANS}
+
+    def _repo_automaton(self) -> AhoCorasick:
+        version = self.chroma.kb_version_for(REPO_NAME_COLLECTIONS)
+        if self._repos is not None and self._repos_version == version:
+            return self._repos
+        with self._lock:
+            if self._repos is not None and self._repos_version == version:
+                return self._repos
+
+            names = set()
+            for collection_name, where, field in REPO_NAME_SOURCES:
+                collection = self.chroma.collections.get(collection_name)
+                if not collection:
+                    continue
+                try:
+                    entries = collection.get(where=where, include=["metadatas"])
+                    names.update(meta[field] for meta in entries["metadatas"] if meta.get(field))
+                except Exception as e:
+                    logger.warning(f"Could not load repo names from {collection_name}: {e}")
+
+            automaton = AhoCorasick()
+            for name in names:
+                for variant in _repo_name_variants(name):
+                    automaton.add(variant, name)
+            self._repos = automaton.build()
+            self._repos_version = version
+            logger.info(f"Built query router repo automaton with {len(names)} repos")
+            return self._repos
+
+    def _prototype_matrix(self) -> np.ndarray:
+        if self._prototypes is None:
+            with self._lock:
+                if self._prototypes is None:
+                    labels, texts = [], []
+                    for label, examples in INTENT_PROTOTYPES.items():
+                        labels.extend([label] * len(examples))
+                        texts.extend(examples)
+                    self._prototype_labels = labels
+                    self._prototypes = np.asarray(self.chroma.embed_texts(texts), dtype=np.float32)
+        return self._prototypes
+
+    def _nearest_prototype(self, query_embedding: List[float]) -> Tuple[Optional[str], float]:
+        prototypes = self._prototype_matrix()
+        if not len(prototypes):
+            return None, 0.0
+        similarities = prototypes @ np.asarray(query_embedding, dtype=np.float32)
+        best = int(np.argmax(similarities))
+        return self._prototype_labels[best], float(similarities[best])
+
+    def route(self, query: str, query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        Classify query and build its retrieval plan.
+
+        Returns:
+            Dict with 'intents', 'collections', 'n_results', 'method' and
+            'temporal' ({'type', 'field'} or None)
+        """
+        text = normalize_query(query)
+        hits = self._keywords.find(text)
+
+        temporal = None
+        for temporal_type in ("earliest", "latest"):
+            if temporal_type in hits:
+                if "commit" in hits:
+                    field = "last_commit" if temporal_type == "latest" else "first_commit"
+                else:
+                    field = "created_at"
+                temporal = {"type": temporal_type, "field": field}
+                break
+
+        intents = []
+        if temporal:
+            intents.append("temporal")
+        for intent in ("security", "skills"):
+            if intent in hits:
+                intents.append(intent)
+
+        if not self.enabled:
+            # Keyword temporal detection only; search everything as before
+            return {
+                "intents": intents[:1] or ["general"],
+                "collections": list(COLLECTION_NAMES),
+                "n_results": 10,
+                "method": "disabled",
+                "temporal": temporal,
+                "repos": [],
+            }
+
+        repos: List[str] = []
+        try:
+            repos = sorted(self._repo_automaton().find(text))
+        except Exception as e:
+            logger.warning(f"Repo name matching unavailable: {e}")
+        if repos:
+            intents.append("repo")
+
+        method = "keywords"
+        # A greeting followed by a question ("hi, what have you built?") is a question
+        if not intents and "chitchat" in hits and is_chitchat(text):
+            intents.append("chitchat")
+        elif not intents and query_embedding is not None:
+            try:
+                label, similarity = self._nearest_prototype(query_embedding)
+            except Exception as e:
+                logger.warning(f"Prototype routing unavailable: {e}")
+                label, similarity = None, 0.0
+            if label and similarity >= self.min_similarity:
+                # Long questions that only resemble chit-chat, and greetings
+                # with a question attached, still get context
+                if label != "chitchat" or (
+                    len(text.split()) <= CHITCHAT_MAX_WORDS and "chitchat" not in hits
+                ):
+                    intents.append(label)
+                    method = "prototype"
+        if not intents:
+            intents.append("general")
+            method = "default"
+
+        collections: List[str] = []
+        n_results = 0
+        for intent in intents:
+            plan_collections, plan_results = ROUTE_PLANS[intent]
+            collections.extend(c for c in plan_collections if c not in collections)
+            n_results = max(n_results, plan_results)
+            self.stats[intent] += 1
+
+        return {
+            "intents": intents,
+            "collections": collections,
+            "n_results": n_results,
+            "method": method,
+            "temporal": temporal,
+            "repos": repos,
+        }
@@ -1,9 +1,20 @@
-from typing import List, Dict, Any, Optional
-from app.services.chroma_service import chroma_service
-from app.services.openai_service import openai_service
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from app.core.config import settings
+from app.services.chroma_service import COLLECTION_NAMES, chroma_service
+from app.services.llm_service import llm_service
 from app.services.database_service import db_service
-from datetime import datetime
+from app.services.security_ingest import security_ingestor
+from app.services.response_cache import SemanticResponseCache
+from app.services.context_packer import ContextPacker
+from app.services.reranker import Reranker
+from app.services.temporal_index import TemporalIndex, recency_note
+from app.services.query_router import REPO_NAME_COLLECTIONS, QueryRouter
+from app.services.single_flight import SingleFlight, flight_key
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -13,42 +24,27 @@ class RAGService:
 
     def __init__(self):
         self.chroma = chroma_service
-        self.openai = openai_service
+        self.llm = llm_service
         self.db = db_service
-
-    def _detect_temporal_query(self, query: str) -> Optional[Dict[str, str]]:
-        """
-        Detect if query involves chronological/temporal aspects.
-
-        Args:
-            query: User query text
-
-        Returns:
-            Dict with 'type' (earliest/latest) and 'field' (created_at/first_commit/last_commit)
-            or None if not temporal
-        """
-        query_lower = query.lower()
-
-        temporal_patterns = {
-            'earliest': ['earliest', 'first', 'oldest', 'initial', 'when did you start', 'beginning'],
-            'latest': ['latest', 'most recent', 'newest', 'last', 'current', 'recent'],
-        }
-
-        for query_type, keywords in temporal_patterns.items():
-            if any(keyword in query_lower for keyword in keywords):
-                # Determine field based on context
-                if 'commit' in query_lower or 'update' in query_lower:
-                    field = 'last_commit' if query_type == 'latest' else 'first_commit'
-                else:
-                    field = 'created_at'
-
-                logger.info(f"Detected temporal query: type={query_type}, field={field}")
-                return {
-                    'type': query_type,
-                    'field': field
-                }
-
-        return None
+        # Bounded pool for blocking embedding and HNSW lookups
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_MAX_WORKERS,
+            thread_name_prefix="retrieval",
+        )
+        self.context_packer = ContextPacker()
+        self.reranker = Reranker()
+        self.temporal_index = TemporalIndex(self.chroma)
+        self.router = QueryRouter(self.chroma)
+        # Concurrent identical chat/search requests share one execution
+        self._flights = SingleFlight()
+        # Last security analysis, keyed by the attack rollup version
+        self._security_analysis: Optional[Dict[str, Any]] = None
+        self._security_analysis_task: Optional[asyncio.Task] = None
+        # Near-duplicate first questions are answered from here
+        self.response_cache = SemanticResponseCache(
+            max_size=settings.RESPONSE_CACHE_SIZE,
+            similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY,
+        )
 
     def _temporal_search(
         self,
@@ -56,76 +52,37 @@ class RAGService:
         temporal_type: str,
         date_field: str,
         query_text: str,
-        n_results: int = 10
+        n_results: int = 10,
+        query_embedding: Optional[List[float]] = None,
     ) -> Dict[str, Any]:
         """
-        Perform temporal search by combining metadata filtering and sorting.
+        Perform temporal search over the precomputed temporal index.
 
         Args:
             collection_name: Collection to search
             temporal_type: 'earliest' or 'latest'
             date_field: Metadata field to sort by (created_at, first_commit, last_commit)
-            query_text: Original query for semantic filtering
+            query_text: Original query (used by the semantic fallback)
             n_results: Number of results to return
+            query_embedding: Precomputed embedding of query_text (optional)
 
         Returns:
             Query results sorted chronologically
         """
         try:
-            # Get GitHub repositories with higher limit
-            results = self.chroma.query(
-                collection_name=collection_name,
-                query_text=query_text,
-                n_results=50,  # Get more results to ensure we have all relevant repos
-                where={"type": "github_repo"}  # Filter only GitHub repos
+            results = self.temporal_index.top(
+                date_field=date_field,
+                temporal_type=temporal_type,
+                n_results=n_results,
+                query_embedding=query_embedding,
             )
 
             if not results["documents"]:
                 logger.info("No GitHub repos found in temporal search")
-                return results
-
-            # Combine results with metadata for sorting
-            combined = list(zip(
-                results["documents"],
-                results["metadatas"],
-                results["distances"],
-                results["ids"]
-            ))
-
-            # Sort by date field
-            def get_sort_key(item):
-                metadata = item[1]
-                date_str = metadata.get(date_field, "")
-
-                # Parse ISO date
-                try:
-                    if date_str:
-                        return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    else:
-                        # Put items without dates at the end
-                        return datetime.max if temporal_type == "earliest" else datetime.min
-                except Exception as e:
-                    logger.warning(f"Error parsing date {date_str}: {e}")
-                    return datetime.max if temporal_type == "earliest" else datetime.min
-
-            combined.sort(key=get_sort_key, reverse=(temporal_type == "latest"))
-
-            logger.info(f"Temporal search sorted {len(combined)} repos by {date_field}, order={temporal_type}")
-
-            # Take top n_results after sorting
-            combined = combined[:n_results]
-
-            # Unzip back to separate lists
-            if combined:
-                docs, metas, dists, ids = zip(*combined)
-                return {
-                    "documents": list(docs),
-                    "metadatas": list(metas),
-                    "distances": list(dists),
-                    "ids": list(ids)
-                }
             else:
-                return {"documents": [], "metadatas": [], "distances": [], "ids": []}
+                logger.info(f"Temporal search returned {len(results['ids'])} repos by {date_field}, order={temporal_type}")
+
+            return results
 
         except Exception as e:
             logger.error(f"Error in temporal search: {e}")
@@ -134,8 +91,288 @@ class RAGService:
                 collection_name=collection_name,
                 query_text=query_text,
                 n_results=n_results,
+                query_embedding=query_embedding,
             )
 
+    def _retrieve(
+        self,
+        collection_name: str,
+        query_text: str,
+        query_embedding: List[float],
+        temporal_info: Optional[Dict[str, str]] = None,
+        n_results: int = 10,
+    ) -> Dict[str, Any]:
+        """Run the blocking lookup for a single collection."""
+        # Use temporal search for portfolio collection if temporal query detected
+        if temporal_info and collection_name == "portfolio":
+            logger.info(f"Using temporal search for {collection_name}")
+            return self._temporal_search(
+                collection_name=collection_name,
+                temporal_type=temporal_info['type'],
+                date_field=temporal_info['field'],
+                query_text=query_text,
+                n_results=max(n_results, 10),  # Get more results for temporal queries
+                query_embedding=query_embedding,
+            )
+
+        # Standard semantic search
+        return self._regroup_chunks(self.chroma.query(
+            collection_name=collection_name,
+            query_text=query_text,
+            n_results=n_results,
+            query_embedding=query_embedding,
+        ))
+
+    @staticmethod
+    def _regroup_chunks(results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge chunk hits that share a parent document into one result.
+
+        Chunks are joined in document order, the best distance is kept and
+        results stay sorted by that distance. Unchunked documents pass through.
+        """
+        groups: Dict[str, Dict[str, Any]] = {}
+        for doc, meta, distance, doc_id in zip(
+            results.get("documents", []),
+            results.get("metadatas", []),
+            results.get("distances", []),
+            results.get("ids", []),
+        ):
+            meta = meta or {}
+            parent_id = meta.get("parent_id") or doc_id
+            group = groups.get(parent_id)
+            if group is None:
+                groups[parent_id] = {
+                    "chunks": [(meta.get("chunk_index", 0), doc)],
+                    "metadata": meta,
+                    "distance": distance,
+                }
+            else:
+                group["chunks"].append((meta.get("chunk_index", 0), doc))
+                group["distance"] = min(group["distance"], distance)
+
+        grouped = sorted(groups.items(), key=lambda item: item[1]["distance"])
+        return {
+            "documents": [
+                "\n...\n".join(text for _, text in sorted(group["chunks"]))
+                for _, group in grouped
+            ],
+            "metadatas": [
+                {**group["metadata"], "matched_chunks": len(group["chunks"])}
+                if "parent_id" in group["metadata"] else group["metadata"]
+                for _, group in grouped
+            ],
+            "distances": [group["distance"] for _, group in grouped],
+            "ids": [parent_id for parent_id, _ in grouped],
+        }
+
+    async def _embed_query(self, query_text: str) -> List[float]:
+        """Embed query text off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._retrieval_executor, self.chroma.embed_text, query_text
+        )
+
+    def _response_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        use_rag: bool,
+        collections: Optional[List[str]],
+    ) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        """
+        Return (query text, collection set) when a request may use the answer cache.
+
+        Only single-message conversations are cached, since answers to later
+        turns depend on the rest of the history.
+        """
+        if not self.response_cache.enabled or not use_rag or len(messages) != 1:
+            return None
+        message = messages[0]
+        if message["role"] != "user" or not message["content"].strip():
+            return None
+        # Static names: the live collections would block until warm-up finishes
+        collection_set = tuple(sorted(collections or COLLECTION_NAMES))
+        return message["content"], collection_set
+
+    @staticmethod
+    def _answer_sources(
+        collections: Optional[List[str]], metadata: Dict[str, Any]
+    ) -> Optional[List[str]]:
+        """
+        Collections a cached answer has to be invalidated with.
+
+        These are the collections that were searched, plus the ones the router
+        reads repo names from when it picked them. None (all of the requested
+        set) when retrieval didn't get as far as routing.
+        """
+        if collections:
+            return list(collections)
+        route = metadata.get("route")
+        if route is None:
+            return None
+        sources = set(route["collections"])
+        if route["method"] != "disabled":
+            sources.update(REPO_NAME_COLLECTIONS)
+        return sorted(sources)
+
+    async def _rerank(
+        self, query_text: str, candidates: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Rerank unpinned candidates off the event loop; pinned ones stay first."""
+        pinned = [c for c in candidates if c.get("pinned")]
+        pool = [
+            c for c in candidates
+            if not c.get("pinned") and c["distance"] < self.context_packer.max_distance
+        ]
+
+        loop = asyncio.get_running_loop()
+        reranked, info = await loop.run_in_executor(
+            self._retrieval_executor, self.reranker.rerank, query_text, pool
+        )
+        return pinned + reranked, info
+
+    async def _retrieve_all(
+        self,
+        collection_names: List[str],
+        query_text: str,
+        query_embedding: List[float],
+        temporal_info: Optional[Dict[str, str]] = None,
+        n_results: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query every collection concurrently with one shared embedding.
+
+        Results are returned in the same order as collection_names.
+        """
+        loop = asyncio.get_running_loop()
+
+        return await asyncio.gather(*[
+            loop.run_in_executor(
+                self._retrieval_executor,
+                self._retrieve,
+                collection_name,
+                query_text,
+                query_embedding,
+                temporal_info,
+                n_results,
+            )
+            for collection_name in collection_names
+        ])
+
+    async def _prepare_context(
+        self,
+        messages: List[Dict[str, str]],
+        use_rag: bool = True,
+        collections: Optional[List[str]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Retrieve context for the last user message and build the system prompt.
+
+        Returns:
+            Tuple of (system prompt, metadata with sources)
+        """
+        # Get the last user message for context retrieval
+        user_messages = [m for m in messages if m["role"] == "user"]
+        last_user_message = user_messages[-1]["content"] if user_messages else ""
+
+        context_parts = []
+        metadata = {"sources": [], "rag_enabled": use_rag}
+
+        if use_rag and last_user_message:
+            loop = asyncio.get_running_loop()
+            query_embedding = await self._embed_query(last_user_message)
+
+            # Classify the query to pick collections and result counts
+            route = await loop.run_in_executor(
+                self._retrieval_executor, self.router.route, last_user_message, query_embedding
+            )
+            temporal_info = route["temporal"]
+            metadata["route"] = {
+                "intents": route["intents"],
+                "method": route["method"],
+                "collections": route["collections"],
+            }
+            if route["repos"]:
+                metadata["route"]["repos"] = route["repos"]
+
+            # Explicitly requested collections take precedence over the route
+            search_collections = collections or route["collections"]
+            n_results = route["n_results"] or 10
+
+            # Search the chosen collections concurrently with one shared embedding
+            all_results = await self._retrieve_all(
+                search_collections, last_user_message, query_embedding, temporal_info, n_results
+            )
+
+            if temporal_info and "portfolio" in search_collections:
+                metadata["temporal_query"] = True
+                metadata["temporal_type"] = temporal_info['type']
+                metadata["temporal_field"] = temporal_info['field']
+
+            candidates = []
+            for collection_name, results in zip(search_collections, all_results):
+                # Temporal results keep their chronological order
+                pinned = bool(temporal_info) and collection_name == "portfolio"
+                for doc, meta, distance in zip(
+                    results["documents"],
+                    results["metadatas"],
+                    results["distances"],
+                ):
+                    candidates.append({
+                        "collection": collection_name,
+                        "document": doc,
+                        "metadata": meta,
+                        "distance": distance,
+                        "pinned": pinned,
+                    })
+
+            # Optionally rerank the merged pool (pinned results keep their place)
+            presorted = False
+            if self.reranker.enabled:
+                candidates, rerank_info = await self._rerank(last_user_message, candidates)
+                metadata["rerank"] = rerank_info
+                presorted = rerank_info["reranked"]
+
+            # Rank globally, dedupe and fit the token budget (off the event
+            # loop: the first call loads the tokenizer)
+            packed = await loop.run_in_executor(
+                self._retrieval_executor, self.context_packer.pack, candidates, presorted
+            )
+            metadata["context_tokens"] = packed["tokens"]
+
+            # Group selected documents by collection, ordered by best rank
+            by_collection: Dict[str, List[str]] = {}
+            for item in packed["selected"]:
+                document = item["document"]
+                note = recency_note(item["metadata"] or {})
+                if note:
+                    document = f"{document}\n{note}"
+                by_collection.setdefault(item["collection"], []).append(document)
+                source = {
+                    "collection": item["collection"],
+                    "metadata": item["metadata"],
+                    "relevance": 1 - item["distance"],
+                }
+                if "rerank_score" in item:
+                    source["rerank_score"] = item["rerank_score"]
+                metadata["sources"].append(source)
+
+            for collection_name, docs in by_collection.items():
+                context_parts.append(f"\n### Context from {collection_name}:")
+                context_parts.extend(f"\n{doc}" for doc in docs)
+
+        # Build system prompt with context
+        return self._build_system_prompt(context_parts), metadata
+
+    @staticmethod
+    def _chat_flight_key(
+        kind: str,
+        messages: List[Dict[str, str]],
+        use_rag: bool,
+        collections: Optional[List[str]],
+    ) -> str:
+        return flight_key(kind, messages, use_rag, sorted(collections) if collections else None)
+
     async def chat(
         self,
         messages: List[Dict[str, str]],
@@ -145,6 +382,9 @@ class RAGService:
         """
         Process a chat request with optional RAG.
 
+        Identical concurrent requests (same messages, use_rag and
+        collections) are coalesced into a single retrieval and LLM call.
+
         Args:
             messages: List of chat messages
             use_rag: Whether to use RAG for context retrieval
@@ -153,71 +393,50 @@ class RAGService:
         Returns:
             Dict with response and context metadata
         """
+        result, shared = await self._flights.do(
+            self._chat_flight_key("chat", messages, use_rag, collections),
+            lambda: self._chat(messages, use_rag, collections),
+        )
+        if shared:
+            return {**result, "metadata": {**result["metadata"], "coalesced": True}}
+        return result
+
+    async def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        use_rag: bool,
+        collections: Optional[List[str]],
+    ) -> Dict[str, Any]:
+        """Run one chat request (see chat)."""
         try:
-            # Get the last user message for context retrieval
-            user_messages = [m for m in messages if m["role"] == "user"]
-            last_user_message = user_messages[-1]["content"] if user_messages else ""
-
-            context_parts = []
-            metadata = {"sources": [], "rag_enabled": use_rag}
-
-            if use_rag and last_user_message:
-                # Detect temporal queries
-                temporal_info = self._detect_temporal_query(last_user_message)
-
-                # Determine which collections to search
-                search_collections = collections or list(self.chroma.collections.keys())
-
-                # Search each collection for relevant context
-                for collection_name in search_collections:
-                    # Use temporal search for portfolio collection if temporal query detected
-                    if temporal_info and collection_name == "portfolio":
-                        logger.info(f"Using temporal search for {collection_name}")
-                        results = self._temporal_search(
-                            collection_name=collection_name,
-                            temporal_type=temporal_info['type'],
-                            date_field=temporal_info['field'],
-                            query_text=last_user_message,
-                            n_results=10  # Get more results for temporal queries
-                        )
-                        metadata["temporal_query"] = True
-                        metadata["temporal_type"] = temporal_info['type']
-                        metadata["temporal_field"] = temporal_info['field']
-                    else:
-                        # Standard semantic search
-                        results = self.chroma.query(
-                            collection_name=collection_name,
-                            query_text=last_user_message,
-                            n_results=10,
-                        )
-
-                    if results["documents"]:
-                        context_parts.append(f"\n### Context from {collection_name}:")
-                        for i, (doc, meta, distance) in enumerate(
-                            zip(
-                                results["documents"],
-                                results["metadatas"],
-                                results["distances"],
-                            )
-                        ):
-                            # Only include relevant results (distance < 1.0)
-                            if distance < 1.0:
-                                context_parts.append(f"\n{doc}")
-                                metadata["sources"].append({
-                                    "collection": collection_name,
-                                    "metadata": meta,
-                                    "relevance": 1 - distance,
-                                })
-
-            # Build system prompt with context
-            system_prompt = self._build_system_prompt(context_parts)
-
-            # Get response from OpenAI
-            response = await self.openai.chat_completion(
+            cache_key = self._response_cache_key(messages, use_rag, collections)
+            if cache_key:
+                query_text, collection_set = cache_key
+                kb_versions = self.chroma.kb_versions()
+                query_embedding = await self._embed_query(query_text)
+                cached = self.response_cache.get(query_embedding, collection_set, kb_versions)
+                if cached:
+                    return {
+                        "response": cached["response"],
+                        "metadata": self._cached_metadata(cached),
+                    }
+
+            system_prompt, metadata = await self._prepare_context(
+                messages, use_rag, collections
+            )
+
+            # Get response from the LLM providers
+            response = await self.llm.chat_completion(
                 messages=messages,
                 system_prompt=system_prompt,
             )
 
+            if cache_key and not self.llm.is_error_response(response):
+                self.response_cache.put(
+                    query_embedding, collection_set, kb_versions, response, metadata,
+                    depends_on=self._answer_sources(collections, metadata),
+                )
+
             return {
                 "response": response,
                 "metadata": metadata,
@@ -230,6 +449,76 @@ class RAGService:
                 "metadata": {"error": str(e)},
             }
 
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        use_rag: bool = True,
+        collections: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chat request with optional RAG, streaming the response.
+
+        Yields events of the form {"event": name, "data": payload}: a single
+        "sources" event with the RAG metadata, then one "token" event per
+        content delta, and finally "done" (or "error").
+        """
+        try:
+            cache_key = self._response_cache_key(messages, use_rag, collections)
+            if cache_key:
+                query_text, collection_set = cache_key
+                kb_versions = self.chroma.kb_versions()
+                query_embedding = await self._embed_query(query_text)
+                cached = self.response_cache.get(query_embedding, collection_set, kb_versions)
+                if cached:
+                    yield {"event": "sources", "data": self._cached_metadata(cached)}
+                    yield {"event": "token", "data": {"content": cached["response"]}}
+                    yield {"event": "done", "data": {}}
+                    return
+
+            # Concurrent identical streams share the retrieval step
+            (system_prompt, metadata), _ = await self._flights.do(
+                self._chat_flight_key("context", messages, use_rag, collections),
+                lambda: self._prepare_context(messages, use_rag, collections),
+            )
+        except Exception as e:
+            logger.error(f"Error in RAG chat stream: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+            return
+
+        yield {"event": "sources", "data": metadata}
+
+        deltas = []
+        try:
+            async for delta in self.llm.chat_completion_stream(
+                messages=messages,
+                system_prompt=system_prompt,
+            ):
+                deltas.append(delta)
+                yield {"event": "token", "data": {"content": delta}}
+        except Exception as e:
+            logger.error(f"Error streaming chat completion: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+            return
+
+        response = "".join(deltas)
+        if cache_key and response and not self.llm.is_error_response(response):
+            self.response_cache.put(
+                query_embedding, collection_set, kb_versions, response, metadata,
+                depends_on=self._answer_sources(collections, metadata),
+            )
+
+        yield {"event": "done", "data": {}}
+
+    @staticmethod
+    def _cached_metadata(cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Metadata for an answer served from the response cache."""
+        return {
+            **cached["metadata"],
+            "cached": True,
+            "cache_similarity": cached["similarity"],
+            "cache_age_seconds": cached["age_seconds"],
+        }
+
     def _build_system_prompt(self, context_parts: List[str]) -> str:
         """Build system prompt with retrieved context."""
         base_prompt = """You are an AI assistant for Jakub Skwierawski's portfolio website with RAG (Retrieval-Augmented Generation) capabilities.
@@ -276,12 +565,35 @@ Remember: You represent Jakub Skwierawski professionally using enhanced context
     async def search_similar(
         self, query: str, collection_name: str, n_results: int = 10
     ) -> List[Dict[str, Any]]:
-        """Search for similar documents in a specific collection."""
+        """
+        Search for similar documents in a specific collection.
+
+        Identical concurrent searches share one lookup.
+        """
+        results, shared = await self._flights.do(
+            flight_key("search", query, collection_name, n_results),
+            lambda: self._search_similar(query, collection_name, n_results),
+        )
+        return [dict(doc) for doc in results] if shared else results
+
+    async def _search_similar(
+        self, query: str, collection_name: str, n_results: int
+    ) -> List[Dict[str, Any]]:
+        """Run one similarity search (see search_similar)."""
         try:
-            results = self.chroma.query(
-                collection_name=collection_name,
-                query_text=query,
-                n_results=n_results,
+            # With reranking, pull a wider pool and keep the best n_results
+            pool_size = n_results
+            if self.reranker.enabled:
+                pool_size = max(n_results, min(n_results * 3, self.reranker.max_candidates))
+
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._retrieval_executor,
+                lambda: self._regroup_chunks(self.chroma.query(
+                    collection_name=collection_name,
+                    query_text=query,
+                    n_results=pool_size,
+                )),
             )
 
             similar_docs = []
@@ -296,18 +608,100 @@ Remember: You represent Jakub Skwierawski professionally using enhanced context
                     "content": doc,
                     "metadata": meta,
                     "similarity": 1 - distance,
+                    "distance": distance,
                 })
 
-            return similar_docs
+            if self.reranker.enabled:
+                similar_docs, _ = await loop.run_in_executor(
+                    self._retrieval_executor,
+                    lambda: self.reranker.rerank(query, similar_docs, text_key="content"),
+                )
+
+            for doc in similar_docs:
+                doc.pop("distance", None)
+            return similar_docs[:n_results]
         except Exception as e:
             logger.error(f"Error searching similar documents: {e}")
             return []
 
-    async def analyze_security_patterns(self) -> Dict[str, Any]:
-        """Analyze security attack patterns from database."""
+    async def analyze_security_patterns(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the LLM analysis of security attack patterns.
+
+        The analysis is cached and keyed by the attack rollup version. While
+        no new logs have been ingested and it is younger than
+        SECURITY_ANALYSIS_MAX_AGE_SECONDS it is returned as-is; otherwise the
+        cached analysis is still returned immediately (marked stale) and a
+        recompute starts in the background. Only the first call, or one with
+        refresh=True, waits for the LLM. If that recompute fails, the previous
+        analysis is returned marked stale, with the failure in 'error'.
+        """
+        cached = self._security_analysis
+        if cached and not refresh:
+            stale = self._security_analysis_is_stale(cached)
+            if stale:
+                self._start_security_analysis()
+            return self._security_analysis_response(cached, stale)
+
+        task = self._start_security_analysis()
+        result = await asyncio.shield(task)
+        if self._security_analysis is None:
+            # Failed analyses aren't cached; report the error as before
+            return result
+        if self._security_analysis_failed(result):
+            # Keep serving the previous analysis, flagged as out of date
+            return {
+                **self._security_analysis_response(self._security_analysis, stale=True),
+                "error": result.get("error") or result.get("summary"),
+            }
+        return self._security_analysis_response(self._security_analysis, stale=False)
+
+    def _security_analysis_failed(self, result: Dict[str, Any]) -> bool:
+        return "error" in result or self.llm.is_error_response(result.get("summary", ""))
+
+    def _security_analysis_is_stale(self, cached: Dict[str, Any]) -> bool:
+        if cached["rollup_version"] != security_ingestor.rollup.version:
+            return True
+        # The rollup can stand still (ingestion paused or failing), so also cap the age
+        age = time.time() - cached["computed_at"]
+        return age > settings.SECURITY_ANALYSIS_MAX_AGE_SECONDS
+
+    def _start_security_analysis(self) -> asyncio.Task:
+        """Start a recompute unless one is already running."""
+        if self._security_analysis_task is None or self._security_analysis_task.done():
+            self._security_analysis_task = asyncio.ensure_future(self._compute_security_analysis())
+        return self._security_analysis_task
+
+    async def _compute_security_analysis(self) -> Dict[str, Any]:
+        rollup_version = security_ingestor.rollup.version
+        result = await self._analyze_security_patterns()
+        if not self._security_analysis_failed(result):
+            self._security_analysis = {
+                "result": result,
+                "rollup_version": rollup_version,
+                "computed_at": time.time(),
+            }
+        return result
+
+    def _security_analysis_response(self, cached: Dict[str, Any], stale: bool) -> Dict[str, Any]:
+        computed_at = cached["computed_at"]
+        return {
+            **cached["result"],
+            "rollup_version": cached["rollup_version"],
+            "computed_at": datetime.fromtimestamp(computed_at, timezone.utc).isoformat(),
+            "age_seconds": round(time.time() - computed_at, 1),
+            "stale": stale,
+            "refreshing": self._security_analysis_task is not None and not self._security_analysis_task.done(),
+        }
+
+    async def _analyze_security_patterns(self) -> Dict[str, Any]:
+        """Analyze security attack patterns with the LLM (uncached)."""
         try:
-            # Get attack patterns from database
-            patterns = self.db.get_attack_patterns()
+            # Get attack patterns and recent security logs from database
+            (patterns, _), recent_logs = await asyncio.gather(
+                security_ingestor.get_attack_patterns(),
+                self.db.fetch_security_logs(limit=10),
+            )
 
             if not patterns:
                 return {
@@ -315,9 +709,6 @@ Remember: You represent Jakub Skwierawski professionally using enhanced context
                     "patterns": [],
                 }
 
-            # Get recent security logs
-            recent_logs = self.db.get_security_logs(limit=100)
-
             # Search for similar attacks in vector DB
             if recent_logs:
                 latest_attack = recent_logs[0]
@@ -331,7 +722,7 @@ Remember: You represent Jakub Skwierawski professionally using enhanced context
             else:
                 similar_attacks = []
 
-            # Use DeepSeek to analyze patterns
+            # Use the LLM to analyze patterns
             analysis_prompt = f"""Analyze these security attack patterns and provide insights:
 
 Attack Statistics:
@@ -351,7 +742,7 @@ Please provide:
 """
 
             messages = [{"role": "user", "content": analysis_prompt}]
-            analysis = await self.openai.chat_completion(messages)
+            analysis = await self.llm.chat_completion(messages)
 
             return {
                 "summary": analysis,
@@ -369,9 +760,30 @@ Please provide:
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about the RAG system."""
+        if not self.chroma.is_ready:
+            return {
+                "ready": self.chroma.readiness(),
+                "embedding_cache": self.chroma.embedding_cache.stats(),
+                "response_cache": self.response_cache.stats(),
+                "reranker": {"enabled": self.reranker.enabled, **self.reranker.stats},
+                "query_router": {"enabled": self.router.enabled, **self.router.stats},
+                "llm": self.llm.get_stats(),
+                "coalescing": self._flights.get_stats(),
+                "database_pool": self.db.get_pool_stats(),
+            }
+
         return {
+            "ready": self.chroma.readiness(),
             "collections": self.chroma.get_stats(),
-            "embedding_model": self.chroma.embedding_model.get_sentence_embedding_dimension(),
+            "embedding_model": self.chroma.embedding_backend.dimension,
+            "embedding_backend": self.chroma.embedding_backend.info(),
+            "embedding_cache": self.chroma.embedding_cache.stats(),
+            "response_cache": self.response_cache.stats(),
+            "reranker": {"enabled": self.reranker.enabled, **self.reranker.stats},
+            "query_router": {"enabled": self.router.enabled, **self.router.stats},
+            "llm": self.llm.get_stats(),
+            "coalescing": self._flights.get_stats(),
+            "database_pool": self.db.get_pool_stats(),
         }
 
 
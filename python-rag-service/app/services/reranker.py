@@ -0,0 +1,122 @@
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """
+    Optional cross-encoder reranking stage with a per-request time budget.
+
+    Scores (query, document) pairs in batches. If the budget runs out before
+    every batch is scored, or the model isn't loaded yet, the candidates are
+    returned in their original vector order.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        timeout_ms: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+    ):
+        self.enabled = settings.RERANKER_ENABLED if enabled is None else enabled
+        self.model_name = model_name or settings.RERANKER_MODEL
+        self.batch_size = batch_size or settings.RERANKER_BATCH_SIZE
+        self.timeout_ms = timeout_ms or settings.RERANKER_TIMEOUT_MS
+        self.max_candidates = max_candidates or settings.RERANKER_MAX_CANDIDATES
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._load_started = False
+        self.stats = {"reranked": 0, "timeouts": 0, "not_loaded": 0, "errors": 0}
+
+    def start_loading(self) -> None:
+        """Load the cross-encoder in the background (no-op when disabled)."""
+        if not self.enabled:
+            return
+        with self._load_lock:
+            if self._load_started:
+                return
+            self._load_started = True
+        threading.Thread(target=self._load, name="reranker-load", daemon=True).start()
+
+    def _load(self) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.model_name)
+            logger.info(f"Loaded reranker model {self.model_name}")
+        except Exception as e:
+            logger.error(f"Failed to load reranker model {self.model_name}: {e}")
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        text_key: str = "document",
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Reorder candidates by cross-encoder relevance.
+
+        Only the top max_candidates (by distance) are scored; the rest follow
+        in distance order. Scored candidates get a 'rerank_score' in [0, 1].
+
+        Returns:
+            Tuple of (candidates, info) where info['reranked'] tells whether
+            the new order was applied
+        """
+        info: Dict[str, Any] = {"reranked": False, "candidates": len(candidates)}
+        if not self.enabled or not candidates:
+            return candidates, info
+
+        if self._model is None:
+            self.start_loading()
+            self.stats["not_loaded"] += 1
+            info["reason"] = "model_loading"
+            return candidates, info
+
+        ordered = sorted(candidates, key=lambda c: c["distance"])
+        pool, rest = ordered[:self.max_candidates], ordered[self.max_candidates:]
+
+        started = time.monotonic()
+        scores: List[float] = []
+        try:
+            for start in range(0, len(pool), self.batch_size):
+                elapsed_ms = (time.monotonic() - started) * 1000
+                if start and elapsed_ms > self.timeout_ms:
+                    self.stats["timeouts"] += 1
+                    info.update(reason="timeout", elapsed_ms=round(elapsed_ms, 1))
+                    return candidates, info
+
+                batch = pool[start:start + self.batch_size]
+                logits = self._model.predict(
+                    [(query, c[text_key]) for c in batch],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                )
+                scores.extend(float(logit) for logit in logits)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Reranking failed, keeping vector order: {e}")
+            info["reason"] = "error"
+            return candidates, info
+
+        scored = [
+            {**candidate, "rerank_score": 1 / (1 + math.exp(-score))}
+            for candidate, score in zip(pool, scores)
+        ]
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+
+        self.stats["reranked"] += 1
+        info.update(
+            reranked=True,
+            scored=len(scored),
+            elapsed_ms=round((time.monotonic() - started) * 1000, 1),
+        )
+        return scored + rest, info
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import threading
+import time
+import uuid
+
+
+class SemanticResponseCache:
+    """
+    LRU cache of RAG answers looked up by query-embedding similarity.
+
+    An entry is only reused for the same collection set, and only while the
+    collections its answer was built from are still at the versions it was
+    produced against: writes to collections the answer never read (e.g.
+    security logs under a portfolio question) leave it valid. Embeddings are
+    expected to be L2-normalized, so cosine similarity is a plain dot product.
+    """
+
+    def __init__(self, max_size: int = 256, similarity_threshold: float = 0.95):
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(
+        self,
+        query_embedding: List[float],
+        collections: Tuple[str, ...],
+        kb_versions: Dict[str, int],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the closest cached answer above the threshold, or None.
+
+        kb_versions holds the current version of each collection; entries
+        whose source collections have changed since are skipped.
+        """
+        if not self.enabled:
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry["collections"] == collections and all(
+                    kb_versions.get(name, 0) == version
+                    for name, version in entry["kb_versions"].items()
+                )
+            ]
+            if keys:
+                matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    entry = self._entries[key]
+                    return {
+                        "response": entry["response"],
+                        "metadata": entry["metadata"],
+                        "similarity": float(scores[best]),
+                        "age_seconds": round(time.time() - entry["created_at"], 1),
+                    }
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        query_embedding: List[float],
+        collections: Tuple[str, ...],
+        kb_versions: Dict[str, int],
+        response: str,
+        metadata: Dict[str, Any],
+        depends_on: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Store an answer, evicting the least recently used entry when full.
+
+        kb_versions are the collection versions taken before retrieval, and
+        depends_on the collections the answer was built from (default: all
+        of collections).
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[str(uuid.uuid4())] = {
+                "embedding": np.asarray(query_embedding, dtype=np.float32),
+                "collections": collections,
+                "kb_versions": {
+                    name: kb_versions.get(name, 0)
+                    for name in (collections if depends_on is None else depends_on)
+                },
+                "response": response,
+                "metadata": metadata,
+                "created_at": time.time(),
+            }
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop all cached answers (e.g. after the knowledge base was re-embedded)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
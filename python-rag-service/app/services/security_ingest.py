@@ -0,0 +1,326 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.services.chroma_service import chroma_service
+from app.services.database_service import db_service
+from app.services.job_manager import JobSkipped, job_manager
+from app.services.security_rollup import AttackRollup
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: only runs within this process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "security_logs"
+SUMMARY_ID = "attack_pattern_summary"
+
+
+def security_log_document(log: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Build the (document, metadata) pair embedded for one security log."""
+    doc_text = f"""
+Activity: {log['activityType']}
+Severity: {log['severity']}
+IP Address: {log['ipAddress']}
+User Agent: {log.get('userAgent', 'Unknown')}
+Details: {log.get('details', {})}
+Timestamp: {log['timestamp']}
+"""
+    metadata = {
+        "type": "security_log",
+        "activityType": log['activityType'],
+        "severity": log['severity'],
+        "timestamp": log['timestamp'],
+    }
+    return doc_text.strip(), metadata
+
+
+def attack_summary_document(patterns: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """Build the attack pattern summary document from pattern counts."""
+    total_attacks = sum(p['count'] for p in patterns)
+    pattern_lines = '\n'.join(
+        f"- {p['activityType']} ({p['severity']}): {p['count']} occurrences, last seen {p['last_occurrence']}"
+        for p in patterns
+    )
+    summary_doc = f"""Guardian Security System — Attack Pattern Summary
+
+Total prompt injection attempts: {total_attacks}
+
+Attack breakdown:
+{pattern_lines}
+
+This portfolio uses a multi-layer security system (Guardian) that detects and logs prompt injection attempts,
+role manipulation, jailbreak attempts, system prompt extraction, and other adversarial inputs.
+Sessions with 5+ injection attempts are automatically suspended for 48 hours.
+IPs can be permanently blocked by the admin.
+"""
+    return summary_doc.strip(), {"type": "attack_summary", "total_attacks": total_attacks}
+
+
+class SecurityLogIngestor:
+    """
+    Incremental security log ingestion with attack rollups.
+
+    A persisted high-water mark (timestamp, id) records the newest ingested
+    row. Each run pulls rows with keyset pagination, embeds them page by page
+    and updates the AttackRollup counters; the watermark and rollups are
+    saved together after every page, so a crash never counts a row twice.
+
+    Rows don't necessarily commit in timestamp order (the timestamp is set
+    before commit, by several app instances), so every run starts
+    SECURITY_INGEST_OVERLAP_SECONDS behind the watermark. The ids ingested
+    inside that window are kept in the state and skipped, so a row that
+    commits late is picked up once and counted once. Only rows committing
+    more than the overlap behind the newest ingested row are missed.
+
+    A run holds an exclusive lock on the state file, so the API scheduler
+    and the CLI script never ingest at the same time.
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path or settings.SECURITY_INGEST_STATE_PATH
+        self.batch_size = settings.SECURITY_INGEST_BATCH_SIZE
+        self.rollup = AttackRollup(retention_days=settings.SECURITY_ROLLUP_RETENTION_DAYS)
+        self.watermark: Optional[Dict[str, str]] = None
+        # id -> timestamp of rows ingested inside the overlap window
+        self.recent_ids: Dict[str, str] = {}
+        self.last_run: Optional[Dict[str, Any]] = None
+
+        self._run_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="security-ingest")
+        self._scheduler: Optional[asyncio.Task] = None
+        self._load_state()
+
+    def _load_state(self) -> None:
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            self.watermark = payload.get("watermark")
+            self.recent_ids = payload.get("recent_ids", {})
+            self.rollup.load(payload.get("rollup", {}))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable security ingest state {self.state_path}: {e}")
+
+    def _save_state(self) -> None:
+        payload = {
+            "watermark": self.watermark,
+            "recent_ids": self.recent_ids,
+            "rollup": self.rollup.to_dict(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _acquire_state_lock(self):
+        """Lock the state file against runs in other processes; None if one holds it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        lock_file = open(f"{self.state_path}.lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return None
+        return lock_file
+
+    def _remember(self, logs: List[Dict[str, Any]]) -> None:
+        """Record ingested ids and drop those that fell out of the overlap window."""
+        for log in logs:
+            self.recent_ids[str(log["id"])] = log["timestamp"]
+        cutoff = datetime.fromisoformat(self.watermark["timestamp"]) - timedelta(
+            seconds=settings.SECURITY_INGEST_OVERLAP_SECONDS
+        )
+        self.recent_ids = {
+            log_id: timestamp for log_id, timestamp in self.recent_ids.items()
+            if datetime.fromisoformat(timestamp) >= cutoff
+        }
+
+    @staticmethod
+    def _position(log: Dict[str, Any]) -> Tuple[datetime, str]:
+        return datetime.fromisoformat(log["timestamp"]), str(log["id"])
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Ingest every log not seen before, from the overlap window onwards (blocking).
+
+        Returns:
+            Dict with 'ingested' row count, 'pages', 'watermark' and
+            'elapsed_seconds'; 'skipped' if another run is in progress and
+            'error' if a page failed (the watermark stays before that page)
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return {"skipped": True, "reason": "already_running"}
+        try:
+            lock_file = self._acquire_state_lock()
+        except Exception:
+            self._run_lock.release()
+            raise
+        if lock_file is None:
+            self._run_lock.release()
+            return {"skipped": True, "reason": "running_in_another_process"}
+
+        started = time.monotonic()
+        result: Dict[str, Any] = {"ingested": 0, "pages": 0}
+        try:
+            # Another process (e.g. the CLI script) may have advanced the state
+            self._load_state()
+            chroma_service.wait_until_ready()
+
+            # The vector store was wiped under us: start over from the first row
+            if self.watermark and chroma_service.get_collection_count(COLLECTION_NAME) == 0:
+                logger.info("security_logs collection is empty; re-ingesting from the beginning")
+                self.watermark = None
+                self.recent_ids = {}
+                self.rollup = AttackRollup(retention_days=settings.SECURITY_ROLLUP_RETENTION_DAYS)
+
+            # Re-read the overlap window for rows that committed late
+            after_timestamp = after_id = None
+            if self.watermark:
+                after_timestamp = datetime.fromisoformat(self.watermark["timestamp"]) - timedelta(
+                    seconds=settings.SECURITY_INGEST_OVERLAP_SECONDS
+                )
+                after_id = ""
+
+            while True:
+                logs = db_service.get_security_logs_page(after_timestamp, after_id, self.batch_size)
+                if not logs:
+                    break
+                after_timestamp, after_id = self._position(logs[-1])
+
+                new_logs = [log for log in logs if str(log["id"]) not in self.recent_ids]
+                if not new_logs:
+                    if len(logs) < self.batch_size:
+                        break
+                    continue
+
+                documents, metadatas, ids = [], [], []
+                for log in new_logs:
+                    document, metadata = security_log_document(log)
+                    documents.append(document)
+                    metadatas.append(metadata)
+                    ids.append(str(log['id']))
+
+                stats = chroma_service.sync_documents(
+                    collection_name=COLLECTION_NAME,
+                    documents=documents,
+                    metadatas=metadatas,
+                    ids=ids,
+                    prune=False,
+                )
+                if stats is None:
+                    raise RuntimeError("failed to embed security log page")
+
+                self.rollup.apply(new_logs)
+                last = max(new_logs, key=self._position)
+                if self.watermark is None or self._position(last) > self._position(self.watermark):
+                    self.watermark = {"timestamp": last["timestamp"], "id": str(last["id"])}
+                self._remember(new_logs)
+                self._save_state()
+
+                result["ingested"] += len(new_logs)
+                result["pages"] += 1
+                if len(logs) < self.batch_size:
+                    break
+
+            if result["ingested"]:
+                self._embed_summary()
+        except Exception as e:
+            logger.error(f"Security log ingestion failed: {e}")
+            result["error"] = str(e)
+        finally:
+            chroma_service.flush_lexical()
+            lock_file.close()
+            self._run_lock.release()
+
+        result["watermark"] = self.watermark
+        result["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        self.last_run = {**result, "finished_at": datetime.utcnow().isoformat()}
+        if result["ingested"]:
+            logger.info(f"Ingested {result['ingested']} security logs in {result['pages']} pages")
+        return result
+
+    def _embed_summary(self) -> None:
+        patterns = self.rollup.patterns()
+        if not patterns:
+            return
+        document, metadata = attack_summary_document(patterns)
+        chroma_service.sync_documents(
+            collection_name=COLLECTION_NAME,
+            documents=[document],
+            metadatas=[metadata],
+            ids=[SUMMARY_ID],
+            prune=False,
+        )
+
+    async def run_once_async(self) -> Dict[str, Any]:
+        """Run an ingestion pass on the ingest thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.run_once)
+
+    def _ingest_stage(self) -> None:
+        """Job stage for a scheduled run; raises so the job records the outcome."""
+        result = self.run_once()
+        if result.get("skipped"):
+            raise JobSkipped("another ingestion run is in progress")
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        if not result["ingested"]:
+            raise JobSkipped("no new security logs")
+
+    async def _schedule(self, interval: float) -> None:
+        while True:
+            # Queued with the other embedding jobs, so only one job embeds at a time
+            job_manager.submit("security_ingest", [("ingest", self._ingest_stage)])
+            await asyncio.sleep(interval)
+
+    def start_scheduler(self, interval: Optional[float] = None) -> None:
+        """Submit an ingestion job every `interval` seconds from the running event loop."""
+        interval = settings.SECURITY_INGEST_INTERVAL_SECONDS if interval is None else interval
+        if interval <= 0 or not settings.POSTGRES_URL:
+            logger.info("Security log ingestion scheduler disabled")
+            return
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.get_running_loop().create_task(self._schedule(interval))
+            logger.info(f"Security log ingestion scheduled every {interval}s")
+
+    def stop_scheduler(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
+
+    async def get_attack_patterns(self) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Attack pattern counts from the rollups, or from Postgres before the first ingest.
+
+        Returns:
+            Tuple of (patterns, source) where source is 'rollup' or 'database'
+        """
+        if self.rollup.total:
+            return self.rollup.patterns(), "rollup"
+        return await db_service.fetch_attack_patterns(), "database"
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "watermark": self.watermark,
+            "rollup_version": self.rollup.version,
+            "total_logs": self.rollup.total,
+            "running": self._run_lock.locked(),
+            "scheduled": self._scheduler is not None and not self._scheduler.done(),
+            "last_run": self.last_run,
+        }
+
+
+# Singleton instance
+security_ingestor = SecurityLogIngestor()
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Iterable
+import threading
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp; naive values are UTC like the audit log table."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class AttackRollup:
+    """
+    Incrementally maintained attack counters.
+
+    Keeps a count and last occurrence per (activity type, severity) and
+    hourly counts per pair, so pattern and trend reads never scan the log
+    table. version increases whenever new logs are applied.
+    """
+
+    def __init__(self, retention_days: int = 90):
+        self.retention_days = retention_days
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.hourly: Dict[str, Dict[str, int]] = {}
+        self.total = 0
+        self.version = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _group_key(activity_type: str, severity: str) -> str:
+        return f"{activity_type}|{severity}"
+
+    def apply(self, logs: Iterable[Dict[str, Any]]) -> int:
+        """Count new logs; returns how many were applied."""
+        applied = 0
+        with self._lock:
+            for log in logs:
+                key = self._group_key(log["activityType"], log["severity"])
+                group = self.groups.setdefault(key, {
+                    "activityType": log["activityType"],
+                    "severity": log["severity"],
+                    "count": 0,
+                    "last_occurrence": None,
+                })
+                group["count"] += 1
+                timestamp = log.get("timestamp")
+                if timestamp and (group["last_occurrence"] is None or timestamp > group["last_occurrence"]):
+                    group["last_occurrence"] = timestamp
+
+                parsed = _parse_timestamp(timestamp)
+                if parsed is not None:
+                    bucket = self.hourly.setdefault(parsed.strftime(HOUR_FORMAT), {})
+                    bucket[key] = bucket.get(key, 0) + 1
+
+                self.total += 1
+                applied += 1
+
+            if applied:
+                self.version += 1
+                self._prune()
+        return applied
+
+    def _prune(self) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime(HOUR_FORMAT)
+        for hour in [hour for hour in self.hourly if hour < cutoff]:
+            del self.hourly[hour]
+
+    def patterns(self) -> List[Dict[str, Any]]:
+        """Counts per activity type and severity, most frequent first."""
+        with self._lock:
+            return sorted(
+                (dict(group) for group in self.groups.values()),
+                key=lambda group: group["count"],
+                reverse=True,
+            )
+
+    def totals(self) -> Dict[str, Dict[str, int]]:
+        """Counts per activity type and per severity."""
+        by_type: Dict[str, int] = {}
+        by_severity: Dict[str, int] = {}
+        with self._lock:
+            for group in self.groups.values():
+                by_type[group["activityType"]] = by_type.get(group["activityType"], 0) + group["count"]
+                by_severity[group["severity"]] = by_severity.get(group["severity"], 0) + group["count"]
+        return {"by_type": by_type, "by_severity": by_severity}
+
+    def trend(
+        self,
+        hours: int = 24,
+        bucket: str = "hour",
+        activity_type: Optional[str] = None,
+        severity: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Attack counts over the last `hours`, oldest bucket first.
+
+        Args:
+            hours: Window length (capped by the retention period)
+            bucket: 'hour' or 'day'
+            activity_type: Only count this activity type
+            severity: Only count this severity
+
+        Returns:
+            List of {'bucket': ISO start time, 'count', 'by_type'}; empty
+            buckets are included with zero counts
+        """
+        hours = max(1, min(hours, self.retention_days * 24))
+        step = timedelta(days=1) if bucket == "day" else timedelta(hours=1)
+
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        start = now - timedelta(hours=hours - 1)
+        if bucket == "day":
+            start = start.replace(hour=0)
+
+        buckets: List[Dict[str, Any]] = []
+        cursor = start
+        while cursor <= now:
+            buckets.append({"bucket": cursor.isoformat(), "count": 0, "by_type": {}})
+            cursor += step
+
+        with self._lock:
+            hour = start
+            while hour <= now:
+                counts = self.hourly.get(hour.strftime(HOUR_FORMAT))
+                if counts:
+                    index = (hour - start) // step
+                    target = buckets[index]
+                    for key, count in counts.items():
+                        group_type, group_severity = key.split("|", 1)
+                        if activity_type and group_type != activity_type:
+                            continue
+                        if severity and group_severity != severity:
+                            continue
+                        target["count"] += count
+                        target["by_type"][group_type] = target["by_type"].get(group_type, 0) + count
+                hour += timedelta(hours=1)
+
+        return buckets
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "groups": {key: dict(group) for key, group in self.groups.items()},
+                "hourly": {hour: dict(counts) for hour, counts in self.hourly.items()},
+                "total": self.total,
+                "version": self.version,
+            }
+
+    def load(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self.groups = payload.get("groups", {})
+            self.hourly = payload.get("hourly", {})
+            self.total = payload.get("total", 0)
+            self.version = payload.get("version", 0)
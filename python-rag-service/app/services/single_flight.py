@@ -0,0 +1,51 @@
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(*parts: Any) -> str:
+    """Stable key for JSON-serializable request parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task. The work runs as its own task so a caller
+    that disconnects (is cancelled) doesn't cancel it for the others. The
+    key is released as soon as the work finishes, so results aren't cached.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run work() once per key among concurrent callers.
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            joined an existing flight
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["executed"] += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+
+        return await asyncio.shield(task), shared
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "in_flight": len(self._in_flight)}
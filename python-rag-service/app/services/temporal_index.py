@@ -0,0 +1,149 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Metadata date field -> precomputed epoch field written at ingestion
+TEMPORAL_FIELDS = {
+    "created_at": "created_at_ts",
+    "first_commit": "first_commit_ts",
+    "last_commit": "last_commit_ts",
+}
+
+
+def to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO-8601 timestamp (GitHub style, 'Z' suffix) to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_age(seconds: float) -> str:
+    days = max(0, int(seconds // 86400))
+    if days < 30:
+        return f"{days} days ago"
+    if days < 365:
+        return f"{days // 30} months ago"
+    return f"{days // 365} year(s) and {(days % 365) // 30} month(s) ago"
+
+
+def recency_note(metadata: Dict[str, Any], now: Optional[float] = None) -> Optional[str]:
+    """
+    Describe a document's age relative to now from its epoch fields.
+
+    Computed per query because relative ages in the stored text would change
+    its content hash (and force a re-embed) every day.
+    """
+    now = datetime.now().timestamp() if now is None else now
+    parts = []
+    for field, label in (("created_at_ts", "created"), ("last_commit_ts", "last commit")):
+        timestamp = metadata.get(field)
+        if isinstance(timestamp, (int, float)):
+            parts.append(f"{label} {_format_age(now - timestamp)}")
+    if not parts:
+        return None
+    return f"- Age (as of {datetime.fromtimestamp(now).strftime('%Y-%m-%d')}): {', '.join(parts)}"
+
+
+class TemporalIndex:
+    """
+    Sorted in-memory index of github_repo documents by date.
+
+    Built once per knowledge-base version from the epoch fields written at
+    ingestion, so earliest/latest lookups cover every repo (not just the top
+    semantic hits) and never parse dates per query.
+    """
+
+    def __init__(self, chroma, collection_name: str = "portfolio"):
+        self.chroma = chroma
+        self.collection_name = collection_name
+        self._built_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._embeddings = np.empty((0, 0), dtype=np.float32)
+        # field -> ascending list of (timestamp, row)
+        self._sorted: Dict[str, List[Tuple[int, int]]] = {}
+
+    def _ensure_built(self) -> None:
+        # Writes to other collections (e.g. security logs) keep the index
+        version = self.chroma.kb_version_for([self.collection_name])
+        if self._built_version == version:
+            return
+        with self._lock:
+            if self._built_version == version:
+                return
+
+            collection = self.chroma.collections.get(self.collection_name)
+            entries = collection.get(
+                where={"type": "github_repo"},
+                include=["documents", "metadatas", "embeddings"],
+            ) if collection else {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+
+            sorted_rows: Dict[str, List[Tuple[int, int]]] = {field: [] for field in TEMPORAL_FIELDS}
+            for row, meta in enumerate(entries["metadatas"]):
+                for field, ts_field in TEMPORAL_FIELDS.items():
+                    # Older ingests lack the epoch fields; parse once here instead
+                    ts = meta.get(ts_field)
+                    if ts is None:
+                        ts = to_epoch(meta.get(field))
+                    if ts is not None:
+                        sorted_rows[field].append((ts, row))
+            for rows in sorted_rows.values():
+                rows.sort()
+
+            embeddings = entries["embeddings"]
+            self._ids = list(entries["ids"])
+            self._documents = list(entries["documents"])
+            self._metadatas = list(entries["metadatas"])
+            self._embeddings = (
+                np.asarray(embeddings, dtype=np.float32)
+                if embeddings is not None and len(embeddings) else np.empty((0, 0), dtype=np.float32)
+            )
+            self._sorted = sorted_rows
+            self._built_version = version
+            logger.info(f"Built temporal index over {len(self._ids)} GitHub repos")
+
+    def top(
+        self,
+        date_field: str,
+        temporal_type: str,
+        n_results: int = 10,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the n earliest or latest repos by date_field.
+
+        Distances are cosine distances to query_embedding when given, so the
+        results can be ranked and filtered like regular query results.
+        """
+        self._ensure_built()
+
+        ordered = self._sorted.get(date_field, [])
+        if temporal_type == "earliest":
+            picked = ordered[:n_results]
+        else:
+            picked = ordered[-n_results:][::-1] if n_results > 0 else []
+        rows = [row for _, row in picked]
+
+        if query_embedding is not None and len(self._embeddings) and rows:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            vectors = self._embeddings[rows]
+            norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+            distances = (1 - (vectors @ query) / np.where(norms == 0, 1.0, norms)).tolist()
+        else:
+            distances = [0.0] * len(rows)
+
+        return {
+            "documents": [self._documents[row] for row in rows],
+            "metadatas": [self._metadatas[row] for row in rows],
+            "distances": distances,
+            "ids": [self._ids[row] for row in rows],
+        }
@@ -0,0 +1,2 @@
+# Entry points run in spawned worker processes. Keep module-level imports
+# light: workers import only what their entry point needs.
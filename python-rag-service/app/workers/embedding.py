@@ -0,0 +1,43 @@
+import os
+
+
+def serve(conn, backend_name: str, model_name: str, threads: int) -> None:
+    """
+    Embedding worker process main loop.
+
+    Loads the embedding backend once, reports ("ready", dimension), then
+    answers each (texts, batch_size) request on the pipe with ("ok",
+    embeddings) or ("error", message) until it receives None or the pipe
+    closes.
+    """
+    # Several workers share the machine's cores; keep each one's math libraries to `threads`
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    from app.core.config import settings
+    from app.services.embedding_backends import create_embedding_backend
+
+    if not settings.EMBEDDING_ONNX_THREADS:
+        settings.EMBEDDING_ONNX_THREADS = threads
+    try:
+        backend = create_embedding_backend(backend_name, model_name)
+        if backend_name == "sentence-transformers":
+            import torch
+            torch.set_num_threads(threads)
+        conn.send(("ready", backend.dimension))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+        texts, batch_size = request
+        try:
+            conn.send(("ok", backend.encode(texts, batch_size=batch_size)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
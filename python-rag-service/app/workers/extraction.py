@@ -0,0 +1,48 @@
+import os
+
+
+class ExtractionError(ValueError):
+    """The uploaded file's text could not be extracted."""
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ExtractionError("PDF support requires the pypdf package")
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            reader.decrypt("")
+        pages = [(page.extract_text() or "").strip() for page in reader.pages]
+    except Exception as e:
+        raise ExtractionError(f"Could not read PDF: {e}")
+
+    text = "\n\n".join(page for page in pages if page)
+    if not text:
+        raise ExtractionError("PDF contains no extractable text")
+    return text
+
+
+def extract_text(path: str, extension: str) -> str:
+    """
+    Extract the text of an uploaded file (runs in a worker process).
+
+    PDFs are read page by page with pypdf; every other type must be UTF-8
+    text. Raises ExtractionError with a client-facing message on failure.
+    """
+    if extension == ".pdf":
+        return _extract_pdf(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ExtractionError("File must be text-based (UTF-8 encoded)")
+
+
+def file_extension(filename: str) -> str:
+    """Lower-cased extension of a filename, including the dot."""
+    return os.path.splitext(filename or "")[1].lower()
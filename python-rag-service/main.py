@@ -1,12 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api import api_router
 import logging
-import asyncio
 import os
-import sys
-from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -16,9 +14,6 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Thread pool for running synchronous embedding tasks
-_embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
-
 # Create FastAPI app
 app = FastAPI(
     title="RAG Assistant API",
@@ -39,34 +34,6 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 
 
-def _run_initial_embedding():
-    """Run initial data embedding synchronously in a background thread."""
-    try:
-        # Ensure /app (project root) is on sys.path so script imports resolve
-        app_root = os.path.dirname(os.path.abspath(__file__))
-        if app_root not in sys.path:
-            sys.path.insert(0, app_root)
-
-        logger.info("[embed] Embedding portfolio and documentation...")
-        from scripts.embed_initial_data import embed_portfolio_data, embed_documentation
-        embed_portfolio_data()
-        embed_documentation()
-        logger.info("[embed] Portfolio and documentation done.")
-
-        github_token = settings.GITHUB_TOKEN or os.getenv("GITHUB_TOKEN")
-        if github_token:
-            logger.info("[embed] Fetching and embedding GitHub repositories...")
-            from scripts.fetch_github_repos import embed_github_repos
-            embed_github_repos(github_token)
-            logger.info("[embed] GitHub repositories done.")
-        else:
-            logger.warning("[embed] GITHUB_TOKEN not set — skipping GitHub repos.")
-
-        logger.info("[embed] Initial embedding complete.")
-    except Exception as e:
-        logger.error(f"[embed] Initial embedding failed: {e}", exc_info=True)
-
-
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup."""
@@ -74,30 +41,39 @@ async def startup_event():
     logger.info(f"CORS origins: {settings.cors_origins_list}")
     logger.info(f"ChromaDB persist dir: {settings.CHROMA_PERSIST_DIR}")
 
+    # Load the embedding model and Chroma client without delaying port binding
     from app.services.chroma_service import chroma_service
-    portfolio_count = chroma_service.get_collection_count("portfolio")
+    chroma_service.start_warmup()
+
+    from app.services.rag_service import rag_service
+    rag_service.reranker.start_loading()
 
-    if portfolio_count == 0:
-        logger.info(
-            "Portfolio collection is empty — starting background embedding. "
-            "RAG responses will be limited until embedding completes (~1-2 min)."
-        )
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(_embed_executor, _run_initial_embedding)
-    else:
-        logger.info(f"Collections already populated (portfolio: {portfolio_count} docs) — skipping embedding.")
+    # Embed initial data in the background if the store is empty
+    from app.services.embedding_jobs import submit_initial_embedding
+    submit_initial_embedding()
+
+    # Keep security_logs and the attack rollups fresh from the watermark
+    from app.services.security_ingest import security_ingestor
+    security_ingestor.start_scheduler()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("Shutting down RAG Assistant API...")
-    _embed_executor.shutdown(wait=False)
-    from app.services.openai_service import openai_service
+    from app.services.job_manager import job_manager
+    job_manager.shutdown()
+    from app.services.security_ingest import security_ingestor
+    security_ingestor.stop_scheduler()
+    from app.services.document_extraction import document_extractor
+    document_extractor.close()
+    from app.services.chroma_service import chroma_service
+    chroma_service.close()
+    from app.services.llm_service import llm_service
     from app.services.database_service import db_service
 
-    await openai_service.close()
-    db_service.close()
+    await llm_service.close()
+    await db_service.close()
 
 
 @app.get("/")
@@ -112,10 +88,20 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
+    """Liveness check endpoint."""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check endpoint — 503 until the embedding model is loaded."""
+    from app.services.chroma_service import chroma_service
+
+    readiness = chroma_service.readiness()
+    status_code = 200 if readiness["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=readiness)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,159 @@
+"""
+Benchmark embedding backends on latency, memory and retrieval quality.
+
+Each backend embeds the repo notes corpus and a set of typical visitor
+questions. Retrieval quality is measured against the sentence-transformers
+backend: top-k overlap of the retrieved documents and the mean cosine
+similarity between the two backends' query vectors.
+
+Every backend runs in a fresh spawned process, so its memory figures
+aren't affected by the backends measured before it.
+
+Usage:
+    python scripts/benchmark_embedding_backends.py [--backends onnx onnx-int8] [--top-k 5]
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding_backends import EMBEDDING_BACKENDS, create_embedding_backend
+import argparse
+import logging
+import multiprocessing
+import resource
+import statistics
+import time
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERIES = [
+    "What projects has he built?",
+    "Tell me about Protokół 999",
+    "What is plonbli?",
+    "Which repositories use TypeScript?",
+    "What is his most recent project?",
+    "Does he have experience with Web3?",
+    "What did he build at ETH Warsaw?",
+    "How does the Guardian security system work?",
+    "What medical software has he worked on?",
+    "Which skills does he have in AI and machine learning?",
+]
+
+
+def load_corpus() -> list:
+    """Load repo notes as the benchmark corpus."""
+    possible_dirs = [
+        "data/private-readmes/github-repo-notes",
+        "../data/private-readmes/github-repo-notes",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "private-readmes", "github-repo-notes"),
+    ]
+    for d in possible_dirs:
+        if os.path.isdir(d):
+            corpus = []
+            for filename in sorted(os.listdir(d)):
+                if filename.endswith(".md"):
+                    with open(os.path.join(d, filename), "r", encoding="utf-8") as f:
+                        content = f.read().strip()
+                    if content:
+                        corpus.append(content)
+            return corpus
+    raise FileNotFoundError("github-repo-notes directory not found")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb() -> float:
+    """Current resident set size in MB, from /proc on Linux (else the peak)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def benchmark_backend(name: str, corpus: list, top_k: int) -> dict:
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    backend = create_embedding_backend(name)
+    load_seconds = time.perf_counter() - started
+
+    # Warm up once so lazy initialization doesn't skew the timings
+    backend.encode(["warm up"])
+
+    latencies = []
+    query_vectors = []
+    for query in QUERIES * 3:
+        t0 = time.perf_counter()
+        vector = backend.encode([query])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if len(query_vectors) < len(QUERIES):
+            query_vectors.append(vector[0])
+
+    t0 = time.perf_counter()
+    corpus_vectors = backend.encode(corpus, batch_size=32)
+    corpus_seconds = time.perf_counter() - t0
+
+    query_matrix = np.stack(query_vectors)
+    top = np.argsort(-(query_matrix @ corpus_vectors.T), axis=1)[:, :top_k]
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "load_s": round(load_seconds, 2),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "corpus_docs_per_s": round(len(corpus) / corpus_seconds, 1),
+        "rss_growth_mb": round(current_rss_mb() - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "query_vectors": query_matrix,
+        "top": top,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    logger.info(f"Benchmarking {args.backends} on {len(corpus)} documents, {len(QUERIES)} queries")
+
+    # The reference backend is always measured first
+    names = ["sentence-transformers"] + [b for b in args.backends if b != "sentence-transformers"]
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        # A fresh process per backend: no shared allocator state or loaded libraries
+        with context.Pool(1) as pool:
+            results.append(pool.apply(benchmark_backend, (name, corpus, args.top_k)))
+    reference = results[0]
+
+    header = f"{'backend':<22}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'docs/s':>9}{'RSS +MB':>9}{'peak MB':>9}{'top-k overlap':>15}{'cosine':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        overlap = np.mean([
+            len(set(a) & set(b)) / args.top_k
+            for a, b in zip(result["top"], reference["top"])
+        ])
+        cosine = float(np.mean(np.sum(result["query_vectors"] * reference["query_vectors"], axis=1)))
+        print(
+            f"{result['backend']:<22}{result['load_s']:>8}{result['query_p50_ms']:>9}"
+            f"{result['query_p95_ms']:>9}{result['corpus_docs_per_s']:>9}{result['rss_growth_mb']:>9}"
+            f"{result['peak_rss_mb']:>9}"
+            f"{overlap:>15.3f}{cosine:>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.chroma_service import chroma_service
-from app.services.database_service import db_service
+from app.services.chunking import build_chunk_records
+from app.services.security_ingest import security_ingestor
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -20,76 +21,16 @@ logger = logging.getLogger(__name__)
 
 
 def embed_security_logs():
-    """Embed security logs from PostgreSQL."""
-    logger.info("Embedding security logs...")
-
-    logs = db_service.get_security_logs(limit=1000)
-    if not logs:
-        logger.warning("No security logs found")
-        return
-
-    documents = []
-    metadatas = []
-    ids = []
-
-    for log in logs:
-        # Create document text
-        doc_text = f"""
-Activity: {log['activityType']}
-Severity: {log['severity']}
-IP Address: {log['ipAddress']}
-User Agent: {log.get('userAgent', 'Unknown')}
-Details: {log.get('details', {})}
-Timestamp: {log['timestamp']}
-"""
-        documents.append(doc_text.strip())
-        metadatas.append({
-            "type": "security_log",
-            "activityType": log['activityType'],
-            "severity": log['severity'],
-            "timestamp": log['timestamp'],
-        })
-        ids.append(log['id'])
-
-    success = chroma_service.add_documents(
-        collection_name="security_logs",
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids,
-    )
-
-    if success:
-        logger.info(f"Embedded {len(documents)} security logs")
+    """Embed security logs added since the last run, and refresh the attack summary."""
+    logger.info("Embedding new security logs...")
+
+    result = security_ingestor.run_once()
+    if result.get("error"):
+        logger.error(f"Failed to embed security logs: {result['error']}")
+    elif not result.get("ingested"):
+        logger.info("No new security logs since the last run")
     else:
-        logger.error("Failed to embed security logs")
-
-    # Embed attack pattern summary
-    patterns = db_service.get_attack_patterns()
-    if patterns:
-        total_attacks = sum(p['count'] for p in patterns)
-        pattern_lines = '\n'.join(
-            f"- {p['activityType']} ({p['severity']}): {p['count']} occurrences, last seen {p['last_occurrence']}"
-            for p in patterns
-        )
-        summary_doc = f"""Guardian Security System — Attack Pattern Summary
-
-Total prompt injection attempts: {total_attacks}
-
-Attack breakdown:
-{pattern_lines}
-
-This portfolio uses a multi-layer security system (Guardian) that detects and logs prompt injection attempts,
-role manipulation, jailbreak attempts, system prompt extraction, and other adversarial inputs.
-Sessions with 5+ injection attempts are automatically suspended for 48 hours.
-IPs can be permanently blocked by the admin.
-"""
-        chroma_service.add_documents(
-            collection_name="security_logs",
-            documents=[summary_doc.strip()],
-            metadatas=[{"type": "attack_summary", "total_attacks": total_attacks}],
-            ids=["attack_pattern_summary"],
-        )
-        logger.info(f"Embedded attack pattern summary ({total_attacks} total attacks)")
+        logger.info(f"Embedded security logs: {result}")
 
 
 def embed_private_readmes():
@@ -128,28 +69,39 @@ def embed_private_readmes():
             continue
 
         repo_name = filename.replace("-README.md", "").replace(".md", "")
-        documents.append(f"# {repo_name}\n\n{content}")
-        metadatas.append({
-            "type": "repo_note",
-            "repo": repo_name,
-            "source": filename,
-            "person": "Jakub Skwierawski",
-        })
-        ids.append(f"repo_note_{repo_name.lower().replace('-', '_')}")
+        chunk_docs, chunk_metas, chunk_ids = build_chunk_records(
+            f"# {repo_name}\n\n{content}",
+            {
+                "type": "repo_note",
+                "repo": repo_name,
+                "source": filename,
+                "person": "Jakub Skwierawski",
+            },
+            f"repo_note_{repo_name.lower().replace('-', '_')}",
+        )
+        # Prefix every chunk with the repo name so chunks stay attributable
+        documents.extend(
+            doc if doc.startswith(f"# {repo_name}") else f"# {repo_name}\n{doc}"
+            for doc in chunk_docs
+        )
+        metadatas.extend(chunk_metas)
+        ids.extend(chunk_ids)
 
     if not documents:
         logger.warning("No markdown files found in github-repo-notes")
         return
 
-    success = chroma_service.add_documents(
+    # Only repo notes are pruned; user uploads share this collection
+    stats = chroma_service.sync_documents(
         collection_name="custom_docs",
         documents=documents,
         metadatas=metadatas,
         ids=ids,
+        where={"type": "repo_note"},
     )
 
-    if success:
-        logger.info(f"Embedded {len(documents)} repo notes")
+    if stats is not None:
+        logger.info(f"Embedded repo notes: {stats}")
     else:
         logger.error("Failed to embed repo notes")
 
@@ -316,15 +268,17 @@ Technologies: {', '.join(proj.get('technologies', []))}
         else:
             ids.append(f"{meta['type']}_{len(ids)}")
 
-    success = chroma_service.add_documents(
+    # GitHub repos share this collection, so only prune profile.json documents
+    stats = chroma_service.sync_documents(
         collection_name="portfolio",
         documents=documents,
         metadatas=metadatas,
         ids=ids,
+        where={"source": "profile.json"},
     )
 
-    if success:
-        logger.info(f"Embedded {len(documents)} portfolio documents")
+    if stats is not None:
+        logger.info(f"Embedded portfolio documents: {stats}")
     else:
         logger.error("Failed to embed portfolio data")
 
@@ -420,7 +374,7 @@ In the Interactive Portfolio project:
     ]
 
     documents = [doc["content"].strip() for doc in docs]
-    metadatas = [doc["metadata"] for doc in docs]
+    metadatas = [{**doc["metadata"], "source": "knowledge_base"} for doc in docs]
 
     # Generate unique IDs based on topic to prevent duplicates
     ids = []
@@ -429,15 +383,16 @@ In the Interactive Portfolio project:
         doc_type = meta.get("type", "doc")
         ids.append(f"doc_{doc_type}_{topic}")
 
-    success = chroma_service.add_documents(
+    stats = chroma_service.sync_documents(
         collection_name="documentation",
         documents=documents,
         metadatas=metadatas,
         ids=ids,
+        where={"source": "knowledge_base"},
     )
 
-    if success:
-        logger.info(f"Embedded {len(documents)} documentation entries")
+    if stats is not None:
+        logger.info(f"Embedded documentation entries: {stats}")
     else:
         logger.error("Failed to embed documentation")
 
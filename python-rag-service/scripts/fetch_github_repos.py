@@ -4,40 +4,170 @@ Script to fetch GitHub repositories and embed them into ChromaDB.
 This script fetches all repos with detailed information including:
 - Repository metadata (name, description, languages, topics)
 - First and last commit timestamps for timeline
-- README content for better context
+
+Requests run concurrently with ETag/Last-Modified revalidation, so repeated
+refreshes mostly get 304 responses that don't count against the rate limit.
 """
 
 import sys
 import os
+import asyncio
 import base64
+import json
+import random
+import time
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.chroma_service import chroma_service
+from app.services.temporal_index import to_epoch
 from app.core.config import settings
 import logging
 import httpx
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class GitHubFetcher:
-    """Fetches GitHub repository data for embedding."""
+class ETagCache:
+    """On-disk cache of GitHub responses for conditional requests."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable GitHub cache {path}: {e}")
+            self.entries = {}
 
-    def __init__(self, github_token: str):
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return f"{url}?{urlencode(sorted((params or {}).items()))}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str], data: Any):
+        self.entries[key] = {"etag": etag, "last_modified": last_modified, "data": data}
+        self._dirty = True
+
+    def save(self):
+        """Write the cache atomically."""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"Could not save GitHub cache {self.path}: {e}")
+
+
+class GitHubFetcher:
+    """
+    Fetches GitHub repository data for embedding.
+
+    Requests run concurrently (bounded by GITHUB_MAX_CONCURRENCY) and are
+    conditional on cached ETag/Last-Modified values, so unchanged resources
+    come back as 304s, which don't count against the rate limit.
+    """
+
+    MAX_RETRIES = 3
+    MAX_RETRY_WAIT = 60.0
+
+    def __init__(
+        self,
+        github_token: str,
+        base_url: str = "https://api.github.com",
+        max_concurrency: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.token = github_token
-        self.base_url = "https://api.github.com"
+        self.base_url = base_url
         self.headers = {
             "Authorization": f"token {github_token}",
             "Accept": "application/vnd.github.v3+json",
         }
-        self.client = httpx.Client(headers=self.headers, timeout=30.0)
+        max_concurrency = max_concurrency or settings.GITHUB_MAX_CONCURRENCY
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max_concurrency),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = ETagCache(cache_path or settings.GITHUB_CACHE_PATH)
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0}
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the response is final."""
+        if response.status_code in (403, 429):
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                return min(float(retry_after), self.MAX_RETRY_WAIT)
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = float(response.headers.get("X-RateLimit-Reset", "0"))
+                return min(max(reset - time.time(), 1.0), self.MAX_RETRY_WAIT)
+            return None
+        if response.status_code >= 500:
+            # Jittered exponential backoff
+            return min(2 ** attempt + random.random(), self.MAX_RETRY_WAIT)
+        return None
+
+    async def _get_json(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Any]:
+        """GET a resource, revalidating against the cache. Returns (status, data)."""
+        url = f"{self.base_url}{path}"
+        cache_key = ETagCache.key(url, params)
+        cached = self.cache.get(cache_key)
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self._semaphore:
+            for attempt in range(self.MAX_RETRIES + 1):
+                self.stats["requests"] += 1
+                response = await self.client.get(url, params=params, headers=headers)
+
+                delay = self._retry_delay(response, attempt)
+                if delay is None or attempt == self.MAX_RETRIES:
+                    break
+                self.stats["retries"] += 1
+                logger.warning(f"GitHub {response.status_code} for {path}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
 
-    def get_user_repos(self) -> List[Dict[str, Any]]:
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return 200, cached["data"]
+
+        if response.status_code != 200:
+            return response.status_code, None
+
+        data = response.json()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.put(cache_key, etag, last_modified, data)
+        return 200, data
+
+    async def get_user_repos(self) -> List[Dict[str, Any]]:
         """Fetch all repositories for the authenticated user."""
         try:
             repos = []
@@ -45,8 +175,8 @@ class GitHubFetcher:
             per_page = 100
 
             while True:
-                response = self.client.get(
-                    f"{self.base_url}/user/repos",
+                status, page_repos = await self._get_json(
+                    "/user/repos",
                     params={
                         "per_page": per_page,
                         "page": page,
@@ -54,8 +184,8 @@ class GitHubFetcher:
                         "affiliation": "owner",
                     },
                 )
-                response.raise_for_status()
-                page_repos = response.json()
+                if status != 200:
+                    raise RuntimeError(f"GitHub returned {status} for /user/repos")
 
                 if not page_repos:
                     break
@@ -74,79 +204,39 @@ class GitHubFetcher:
             logger.error(f"Error fetching repositories: {e}")
             return []
 
-    def get_commit_timeline(self, owner: str, repo: str) -> Dict[str, Optional[str]]:
-        """Get first and last commit timestamps."""
-        try:
-            # Get first commit
-            first_commit_response = self.client.get(
-                f"{self.base_url}/repos/{owner}/{repo}/commits",
-                params={"per_page": 1, "sha": "HEAD"},
-            )
+    async def get_commit_timeline(self, owner: str, repo: str) -> Dict[str, Optional[str]]:
+        """
+        Get first and last commit timestamps.
 
-            # Get the total count and fetch the last page
-            # GitHub doesn't provide total count directly, so we'll get the last commit from default branch
-            last_commit_response = self.client.get(
-                f"{self.base_url}/repos/{owner}/{repo}/commits",
-                params={"per_page": 1, "page": 1},
+        Commits are listed newest first, so one page gives the last commit and
+        the oldest commit among the first 100 (exact for smaller repos).
+        """
+        try:
+            status, commits = await self._get_json(
+                f"/repos/{owner}/{repo}/commits",
+                params={"per_page": 100},
             )
 
-            first_commit = None
-            last_commit = None
-
-            if last_commit_response.status_code == 200:
-                last_commit_data = last_commit_response.json()
-                if last_commit_data:
-                    last_commit = last_commit_data[0]["commit"]["author"]["date"]
-
-            # To get the first commit, we need to traverse to the oldest
-            # For efficiency, we'll use a different approach: get all commits and take the last one
-            # But this can be expensive, so we'll try to get the oldest commit by fetching with reverse order
-
-            # Alternative: Get commits in reverse chronological order and get the last page
-            # Since GitHub API doesn't support reverse order directly, we'll get repo creation date as approximation
-            # and fetch early commits
-
-            # Simpler approach: use repository created_at as first commit approximation
-            # and fetch actual first commit if repo is small
-
-            try:
-                # Try to get oldest commits (this works for smaller repos)
-                all_commits_response = self.client.get(
-                    f"{self.base_url}/repos/{owner}/{repo}/commits",
-                    params={"per_page": 100},
-                )
-
-                if all_commits_response.status_code == 200:
-                    all_commits = all_commits_response.json()
-                    if all_commits:
-                        # The last commit in the list is the oldest in this page
-                        # For repos with > 100 commits, we'd need pagination
-                        # For now, we'll use the oldest commit from first 100
-                        first_commit = all_commits[-1]["commit"]["author"]["date"]
-            except:
-                pass
+            if status != 200 or not commits:
+                return {"first_commit": None, "last_commit": None}
 
             return {
-                "first_commit": first_commit,
-                "last_commit": last_commit,
+                "first_commit": commits[-1]["commit"]["author"]["date"],
+                "last_commit": commits[0]["commit"]["author"]["date"],
             }
 
         except Exception as e:
             logger.error(f"Error fetching commit timeline for {owner}/{repo}: {e}")
             return {"first_commit": None, "last_commit": None}
 
-    def get_readme(self, owner: str, repo: str) -> Optional[str]:
+    async def get_readme(self, owner: str, repo: str) -> Optional[str]:
         """Fetch repository README content."""
         try:
-            response = self.client.get(
-                f"{self.base_url}/repos/{owner}/{repo}/readme",
-            )
+            status, readme_data = await self._get_json(f"/repos/{owner}/{repo}/readme")
 
-            if response.status_code == 200:
-                readme_data = response.json()
+            if status == 200:
                 # README content is base64 encoded
-                content = base64.b64decode(readme_data["content"]).decode("utf-8")
-                return content
+                return base64.b64decode(readme_data["content"]).decode("utf-8")
             else:
                 return None
 
@@ -154,133 +244,132 @@ class GitHubFetcher:
             logger.error(f"Error fetching README for {owner}/{repo}: {e}")
             return None
 
-    def get_languages(self, owner: str, repo: str) -> Dict[str, int]:
+    async def get_languages(self, owner: str, repo: str) -> Dict[str, int]:
         """Fetch repository languages."""
         try:
-            response = self.client.get(
-                f"{self.base_url}/repos/{owner}/{repo}/languages",
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {}
+            status, languages = await self._get_json(f"/repos/{owner}/{repo}/languages")
+            return languages if status == 200 else {}
 
         except Exception as e:
             logger.error(f"Error fetching languages for {owner}/{repo}: {e}")
             return {}
 
-    def close(self):
-        """Close HTTP client."""
-        self.client.close()
+    async def close(self):
+        """Persist the ETag cache and close HTTP client."""
+        self.cache.save()
+        await self.client.aclose()
+
+
+async def fetch_repos_with_details(
+    github_token: str, base_url: str = "https://api.github.com"
+) -> List[Tuple[Dict[str, Any], Dict[str, Optional[str]], Dict[str, int]]]:
+    """Fetch all repos, then their commit timelines and languages concurrently."""
+    fetcher = GitHubFetcher(github_token, base_url=base_url)
+
+    try:
+        repos = await fetcher.get_user_repos()
+
+        async def fetch_details(repo: Dict[str, Any]):
+            owner = repo["owner"]["login"]
+            timeline, languages = await asyncio.gather(
+                fetcher.get_commit_timeline(owner, repo["name"]),
+                fetcher.get_languages(owner, repo["name"]),
+            )
+            return repo, timeline, languages
+
+        results = await asyncio.gather(*[fetch_details(repo) for repo in repos])
+        logger.info(f"GitHub fetch stats: {fetcher.stats}")
+        return results
+
+    finally:
+        await fetcher.close()
 
 
 def embed_github_repos(github_token: str):
     """Fetch and embed GitHub repositories."""
     logger.info("Fetching GitHub repositories...")
 
-    fetcher = GitHubFetcher(github_token)
+    # Called from worker threads, which have no running event loop
+    repos = asyncio.run(fetch_repos_with_details(github_token))
 
-    try:
-        # Fetch all repos
-        repos = fetcher.get_user_repos()
+    if not repos:
+        logger.warning("No repositories found")
+        return
 
-        if not repos:
-            logger.warning("No repositories found")
-            return
+    documents = []
+    metadatas = []
+    ids = []
 
-        documents = []
-        metadatas = []
-        ids = []
+    for repo, timeline, languages in repos:
+        owner = repo["owner"]["login"]
+        repo_name = repo["name"]
 
-        for repo in repos:
-            owner = repo["owner"]["login"]
-            repo_name = repo["name"]
-
-            logger.info(f"Processing repository: {owner}/{repo_name}")
-
-            # Get commit timeline
-            timeline = fetcher.get_commit_timeline(owner, repo_name)
-
-            # Get languages
-            languages = fetcher.get_languages(owner, repo_name)
-            language_list = list(languages.keys()) if languages else []
-
-            # Get README
-            readme = fetcher.get_readme(owner, repo_name)
-
-            # Format dates
-            created_at = repo.get("created_at", "")
-            updated_at = repo.get("updated_at", "")
-            first_commit = timeline.get("first_commit", created_at)
-            last_commit = timeline.get("last_commit", updated_at)
-
-            # Parse dates for better formatting and chronological context
-            try:
-                created_dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                created_at_human = created_dt.strftime("%B %d, %Y")
-                created_at_short = created_dt.strftime("%Y-%m-%d")
-
-                # Determine chronological context
-                current_year = datetime.now().year
-                repo_year = created_dt.year
-
-                if repo_year < 2024:
-                    chronological_context = f"EARLY REPOSITORY - Created in {repo_year}, one of Jakub's earliest projects"
-                elif repo_year == 2024 and created_dt.month <= 6:
-                    chronological_context = f"Created in early {repo_year}"
-                elif repo_year == 2024:
-                    chronological_context = f"Created in late {repo_year}"
-                else:
-                    chronological_context = f"Recent repository - Created in {repo_year}"
-
-                # Calculate days since creation
-                days_since_creation = (datetime.now(created_dt.tzinfo) - created_dt).days
-                if days_since_creation < 30:
-                    age_context = f"Very recent - created {days_since_creation} days ago"
-                elif days_since_creation < 180:
-                    age_context = f"Recent - created {days_since_creation // 30} months ago"
-                else:
-                    age_context = f"Created {days_since_creation // 365} year(s) and {(days_since_creation % 365) // 30} month(s) ago"
-
-            except:
-                created_at_human = created_at
-                created_at_short = created_at
-                chronological_context = "Creation date unknown"
-                age_context = ""
-
-            # Parse commit dates
-            try:
-                if first_commit:
-                    first_commit_dt = datetime.fromisoformat(first_commit.replace("Z", "+00:00"))
-                    first_commit_formatted = first_commit_dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-                    first_commit_human = first_commit_dt.strftime("%B %d, %Y")
-                else:
-                    first_commit_formatted = "Unknown"
-                    first_commit_human = "Unknown"
-
-                if last_commit:
-                    last_commit_dt = datetime.fromisoformat(last_commit.replace("Z", "+00:00"))
-                    last_commit_formatted = last_commit_dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-                    last_commit_human = last_commit_dt.strftime("%B %d, %Y")
-                else:
-                    last_commit_formatted = "Unknown"
-                    last_commit_human = "Unknown"
-            except:
-                first_commit_formatted = first_commit or "Unknown"
+        logger.info(f"Processing repository: {owner}/{repo_name}")
+
+        language_list = list(languages.keys()) if languages else []
+
+        # Format dates
+        created_at = repo.get("created_at", "")
+        updated_at = repo.get("updated_at", "")
+        first_commit = timeline.get("first_commit", created_at)
+        last_commit = timeline.get("last_commit", updated_at)
+
+        # Parse dates for better formatting and chronological context
+        try:
+            created_dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            created_at_human = created_dt.strftime("%B %d, %Y")
+            created_at_short = created_dt.strftime("%Y-%m-%d")
+
+            # Determine chronological context. Only absolute dates go into
+            # the document: relative ages ("N days ago") would change its
+            # content hash daily, and are added to the context at query time.
+            repo_year = created_dt.year
+
+            if repo_year < 2024:
+                chronological_context = f"EARLY REPOSITORY - Created in {repo_year}, one of Jakub's earliest projects"
+            elif repo_year == 2024 and created_dt.month <= 6:
+                chronological_context = f"Created in early {repo_year}"
+            elif repo_year == 2024:
+                chronological_context = f"Created in late {repo_year}"
+            else:
+                chronological_context = f"Created in {repo_year}"
+
+        except:
+            created_at_human = created_at
+            created_at_short = created_at
+            chronological_context = "Creation date unknown"
+
+        # Parse commit dates
+        try:
+            if first_commit:
+                first_commit_dt = datetime.fromisoformat(first_commit.replace("Z", "+00:00"))
+                first_commit_formatted = first_commit_dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+                first_commit_human = first_commit_dt.strftime("%B %d, %Y")
+            else:
+                first_commit_formatted = "Unknown"
                 first_commit_human = "Unknown"
-                last_commit_formatted = last_commit or "Unknown"
-                last_commit_human = "Unknown"
 
-            # Build document content — metadata only, no README.
-            # Detailed repo info comes exclusively from github-repo-notes/ files (custom_docs collection).
-            doc_content = f"""
+            if last_commit:
+                last_commit_dt = datetime.fromisoformat(last_commit.replace("Z", "+00:00"))
+                last_commit_formatted = last_commit_dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+                last_commit_human = last_commit_dt.strftime("%B %d, %Y")
+            else:
+                last_commit_formatted = "Unknown"
+                last_commit_human = "Unknown"
+        except:
+            first_commit_formatted = first_commit or "Unknown"
+            first_commit_human = "Unknown"
+            last_commit_formatted = last_commit or "Unknown"
+            last_commit_human = "Unknown"
+
+        # Build document content — metadata only, no README.
+        # Detailed repo info comes exclusively from github-repo-notes/ files (custom_docs collection).
+        doc_content = f"""
 Jakub Skwierawski - GitHub Repository: {repo_name}
 
 CHRONOLOGICAL INFORMATION (IMPORTANT FOR TIMELINE QUERIES):
 - Repository Creation Date: {created_at_short} ({created_at_human})
 - Chronological Context: {chronological_context}
-- Age: {age_context}
 - First Commit: {first_commit_human} ({first_commit_formatted})
 - Last Commit: {last_commit_human} ({last_commit_formatted})
 - Last Updated: {updated_at}
@@ -306,41 +395,47 @@ STATUS:
 - Archived: {repo.get("archived", False)}
 """
 
-            documents.append(doc_content.strip())
-            metadatas.append({
-                "type": "github_repo",
-                "source": "github_api",
-                "person": "Jakub Skwierawski",
-                "repo_name": repo_name,
-                "owner": owner,
-                "url": repo.get("html_url", ""),
-                "languages": ", ".join(language_list) if language_list else "",
-                "topics": ", ".join(repo.get("topics", [])) if repo.get("topics") else "",
-                "stars": repo.get("stargazers_count", 0),
-                "forks": repo.get("forks_count", 0),
-                "created_at": created_at,
-                "first_commit": first_commit or created_at,
-                "last_commit": last_commit or updated_at,
-                "is_private": repo.get("private", False),
-                "is_fork": repo.get("fork", False),
-            })
-            ids.append(f"github_{owner}_{repo_name}")
-
-        # Embed into ChromaDB
-        success = chroma_service.add_documents(
-            collection_name="portfolio",
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids,
-        )
-
-        if success:
-            logger.info(f"Successfully embedded {len(documents)} GitHub repositories")
-        else:
-            logger.error("Failed to embed GitHub repositories")
-
-    finally:
-        fetcher.close()
+        documents.append(doc_content.strip())
+        metadatas.append({
+            "type": "github_repo",
+            "source": "github_api",
+            "person": "Jakub Skwierawski",
+            "repo_name": repo_name,
+            "owner": owner,
+            "url": repo.get("html_url", ""),
+            "languages": ", ".join(language_list) if language_list else "",
+            "topics": ", ".join(repo.get("topics", [])) if repo.get("topics") else "",
+            "stars": repo.get("stargazers_count", 0),
+            "forks": repo.get("forks_count", 0),
+            "created_at": created_at,
+            "first_commit": first_commit or created_at,
+            "last_commit": last_commit or updated_at,
+            "is_private": repo.get("private", False),
+            "is_fork": repo.get("fork", False),
+        })
+        # Epoch timestamps for the temporal index (omitted when unknown)
+        timestamps = {
+            "created_at_ts": to_epoch(created_at),
+            "first_commit_ts": to_epoch(first_commit or created_at),
+            "last_commit_ts": to_epoch(last_commit or updated_at),
+        }
+        metadatas[-1].update({k: v for k, v in timestamps.items() if v is not None})
+        ids.append(f"github_{owner}_{repo_name}")
+
+    # Embed into ChromaDB
+    # Only re-embed changed repos and drop repos that no longer exist
+    stats = chroma_service.sync_documents(
+        collection_name="portfolio",
+        documents=documents,
+        metadatas=metadatas,
+        ids=ids,
+        where={"type": "github_repo"},
+    )
+
+    if stats is not None:
+        logger.info(f"Successfully embedded GitHub repositories: {stats}")
+    else:
+        logger.error("Failed to embed GitHub repositories")
 
 
 def main():
@@ -0,0 +1,41 @@
+"""
+Incrementally embed new security logs and update the attack rollups.
+
+Only rows newer than the persisted watermark are read (keyset pagination)
+and embedded. With --interval the script keeps running and ingests new
+logs every N seconds.
+
+Usage:
+    python scripts/ingest_security_logs.py [--interval 300]
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.security_ingest import security_ingestor
+import argparse
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest security logs")
+    parser.add_argument("--interval", type=int, default=0, help="Re-run every N seconds (0 runs once)")
+    args = parser.parse_args()
+
+    while True:
+        result = security_ingestor.run_once()
+        logger.info(f"Ingestion run: {result}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
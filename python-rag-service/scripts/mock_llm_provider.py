@@ -0,0 +1,85 @@
+"""
+Local OpenAI-compatible mock provider for exercising the LLM client.
+
+Serves /v1/chat/completions (plain and streaming) with configurable latency
+and injected failures, so retries, Retry-After handling and the circuit
+breaker can be observed without a real provider.
+
+Usage:
+    python scripts/mock_llm_provider.py [--port 8081] [--fail-rate 0.3] [--status 503] [--retry-after 1]
+
+Then point the service at it:
+    AI_PROVIDER_BASE_URL=http://localhost:8081/v1 AI_PROVIDER_API_KEY=test uvicorn main:app
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import argparse
+import asyncio
+import json
+import random
+import uvicorn
+
+app = FastAPI(title="Mock LLM provider")
+config = {"fail_rate": 0.0, "status": 503, "retry_after": None, "latency_ms": 200}
+counters = {"requests": 0, "failed": 0}
+
+
+def _reply_text(messages) -> str:
+    last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Mock answer to: {last[:200]}"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    counters["requests"] += 1
+    body = await request.json()
+    await asyncio.sleep(config["latency_ms"] / 1000)
+
+    if random.random() < config["fail_rate"]:
+        counters["failed"] += 1
+        headers = {"Retry-After": str(config["retry_after"])} if config["retry_after"] is not None else {}
+        return JSONResponse({"error": {"message": "injected failure"}}, status_code=config["status"], headers=headers)
+
+    text = _reply_text(body.get("messages", []))
+    if not body.get("stream"):
+        return {
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        for word in text.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0.01)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def stats():
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--status", type=int, default=503, help="Status code of injected failures")
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds on failures")
+    parser.add_argument("--latency-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    config.update(
+        fail_rate=args.fail_rate,
+        status=args.status,
+        retry_after=args.retry_after,
+        latency_ms=args.latency_ms,
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
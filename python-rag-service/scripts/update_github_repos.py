@@ -32,9 +32,8 @@ def main():
 
     logger.info("Updating GitHub repositories...")
 
-    # Note: This will add new repos or update existing ones
+    # Note: Only new or changed repos are re-embedded, and deleted repos are removed
     # GitHub repo IDs are formatted as: github_{owner}_{repo_name}
-    # If you want to completely refresh, delete the collection first
 
     embed_github_repos(github_token)
 
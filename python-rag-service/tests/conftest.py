@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Make the app and scripts packages importable without installing the service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services.chroma_service import chroma_service  # noqa: E402
+from app.services.kb_versions import KnowledgeBaseVersions  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def kb_versions(tmp_path, monkeypatch):
+    """Keep knowledge-base version stamps out of the real embeddings directory."""
+    path = str(tmp_path / "kb_versions.json")
+    monkeypatch.setattr(settings, "KB_VERSION_PATH", path)
+    monkeypatch.setattr(chroma_service, "_kb_versions", KnowledgeBaseVersions(path))
+    return path
@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+from scripts.benchmark_embedding_backends import current_rss_mb
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_current_rss_follows_allocations_down():
+    before = current_rss_mb()
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b"x" * len(block[::4096])  # touch every page
+    grown = current_rss_mb()
+    del block
+    after = current_rss_mb()
+
+    # Unlike the ru_maxrss peak, the current figure drops once memory is freed
+    assert grown - before > 50
+    assert grown - after > 50
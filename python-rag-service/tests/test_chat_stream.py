@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+
+REQUEST = {"messages": [{"role": "user", "content": "What did you build?"}]}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    return TestClient(app)
+
+
+def stub_stream(monkeypatch, events):
+    calls = []
+
+    async def fake_chat_stream(messages, use_rag=True, collections=None):
+        calls.append({"messages": messages, "use_rag": use_rag, "collections": collections})
+        for event in events:
+            yield event
+
+    monkeypatch.setattr(chat.rag_service, "chat_stream", fake_chat_stream)
+    return calls
+
+
+def parse_sse(body):
+    events = []
+    for frame in body.split("\n\n"):
+        if not frame:
+            continue
+        name, data = frame.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_events_are_framed_as_server_sent_events(client, monkeypatch):
+    calls = stub_stream(monkeypatch, [
+        {"event": "sources", "data": {"sources": [{"collection": "portfolio"}]}},
+        {"event": "token", "data": {"content": "Zażółć"}},
+        {"event": "token", "data": {"content": "\nline two"}},
+        {"event": "done", "data": {}},
+    ])
+
+    response = client.post("/api/chat/stream", json=REQUEST)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["x-accel-buffering"] == "no"
+    # Newlines inside a token stay escaped, so each event is one data line
+    assert parse_sse(response.text) == [
+        ("sources", {"sources": [{"collection": "portfolio"}]}),
+        ("token", {"content": "Zażółć"}),
+        ("token", {"content": "\nline two"}),
+        ("done", {}),
+    ]
+    # Non-ASCII text is sent as-is, not as \u escapes
+    assert "Zażółć" in response.text
+    assert calls == [{"messages": REQUEST["messages"], "use_rag": True, "collections": None}]
+
+
+def test_errors_are_streamed_as_an_error_event(client, monkeypatch):
+    stub_stream(monkeypatch, [
+        {"event": "sources", "data": {"sources": []}},
+        {"event": "error", "data": {"error": "all providers failed"}},
+    ])
+
+    response = client.post("/api/chat/stream", json=REQUEST)
+
+    assert response.status_code == 200
+    assert parse_sse(response.text)[-1] == ("error", {"error": "all providers failed"})
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.chroma_service import ChromaService
+
+
+class FakeCollection:
+    def __init__(self):
+        self.added = []
+
+    def add(self, documents, embeddings, metadatas, ids):
+        self.added.append({"documents": documents, "embeddings": embeddings, "ids": ids})
+
+
+class RecordingBackend:
+    """Returns normalized float32 vectors and records each encode call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append((list(texts), batch_size))
+        vectors = np.ones((len(texts), 4), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def service():
+    chroma = ChromaService()
+    chroma._ready = threading.Event()
+    chroma._ready.set()
+    chroma._embedding_backend = RecordingBackend()
+    chroma._collections = {"custom_docs": FakeCollection()}
+    return chroma
+
+
+def test_empty_input_is_a_no_op(service):
+    assert service.add_documents("custom_docs", [], []) is True
+    assert service._collections["custom_docs"].added == []
+    assert service.embedding_backend.calls == []
+
+
+def test_documents_are_embedded_in_batches_and_handed_to_chroma(service, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 16)
+    documents = [f"doc {i}" for i in range(5)]
+
+    assert service.add_documents("custom_docs", documents, [{}] * 5, ids=[f"d{i}" for i in range(5)])
+
+    # One encode call for the whole list, with the configured batch size
+    assert service.embedding_backend.calls == [(documents, 16)]
+    (added,) = service._collections["custom_docs"].added
+    assert added["ids"] == [f"d{i}" for i in range(5)]
+    assert len(added["embeddings"]) == 5
+    assert added["embeddings"][0] == pytest.approx([0.5] * 4)
+
+
+def test_progress_is_reported_per_batch(service, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "EMBEDDING_WORKERS", 1)
+    progress = []
+
+    with service.track_progress(progress.append):
+        embeddings = service.embed_texts([f"doc {i}" for i in range(5)])
+
+    assert embeddings.shape == (5, 4) and embeddings.dtype == np.float32
+    assert progress == [2, 2, 1]
+    assert [len(texts) for texts, _ in service.embedding_backend.calls] == [2, 2, 1]
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.chroma_service import ChromaService
+from app.services.chunking import build_chunk_records
+
+
+class FakeCollection:
+    """In-memory stand-in for the Chroma collection calls sync_documents makes."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def _matches(self, meta, where):
+        for key, condition in (where or {}).items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if meta.get(key) not in condition["$in"]:
+                    return False
+            elif meta.get(key) != condition:
+                return False
+        return True
+
+    def get(self, ids=None, where=None, include=None):
+        selected = [
+            doc_id for doc_id, (_, meta) in self.rows.items()
+            if (ids is None or doc_id in ids) and self._matches(meta, where)
+        ]
+        return {"ids": selected, "metadatas": [self.rows[doc_id][1] for doc_id in selected]}
+
+    def upsert(self, documents, embeddings, metadatas, ids):
+        for doc, meta, doc_id in zip(documents, metadatas, ids):
+            self.rows[doc_id] = (doc, meta)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+
+class FakeBackend:
+    def encode(self, texts, batch_size=32):
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def service():
+    chroma = ChromaService()
+    chroma._ready = threading.Event()
+    chroma._ready.set()
+    chroma._embedding_backend = FakeBackend()
+    chroma._collections = {"custom_docs": FakeCollection()}
+    return chroma
+
+
+def sync(service, content, doc_id, **kwargs):
+    documents, metadatas, ids = build_chunk_records(content, {}, doc_id, chunk_size=100, chunk_overlap=0)
+    return service.sync_documents("custom_docs", documents, metadatas, ids, prune=False, **kwargs), ids
+
+
+def test_reingest_with_fewer_chunks_prunes_trailing_chunks(service):
+    rows = service._collections["custom_docs"].rows
+    _, long_ids = sync(service, "word " * 100, "doc", prune_parents=True)
+    sync(service, "other " * 100, "other", prune_parents=True)
+    assert len(long_ids) > 2
+
+    stats, short_ids = sync(service, "short text", "doc", prune_parents=True)
+
+    assert short_ids == ["doc#0"]
+    assert stats["deleted"] == len(long_ids) - 1
+    assert sorted(doc_id for doc_id in rows if doc_id.startswith("doc#")) == ["doc#0"]
+    # Other parents are untouched
+    assert any(doc_id.startswith("other#") for doc_id in rows)
+
+
+def test_without_prune_parents_trailing_chunks_remain(service):
+    rows = service._collections["custom_docs"].rows
+    _, long_ids = sync(service, "word " * 100, "doc")
+    sync(service, "short text", "doc")
+    assert set(long_ids) <= set(rows)
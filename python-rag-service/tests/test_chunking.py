@@ -0,0 +1,58 @@
+from app.services.chunking import build_chunk_records, chunk_text
+
+
+def test_short_text_is_one_chunk():
+    chunks = chunk_text("Just one line.", chunk_size=100, chunk_overlap=10)
+    assert chunks == [{"text": "Just one line.", "start": 0, "end": 14, "section": None}]
+
+
+def test_chunks_respect_size_and_offsets():
+    text = " ".join(f"word{i}." for i in range(300))
+    chunks = chunk_text(text, chunk_size=200, chunk_overlap=40, markdown=False)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk["text"]) <= 200
+        assert text[chunk["start"]:chunk["end"]] == chunk["text"]
+    # Consecutive chunks overlap and together cover the text
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current["start"] < previous["end"]
+    assert chunks[0]["start"] == 0 and chunks[-1]["end"] == len(text)
+
+
+def test_chunks_break_at_paragraphs_and_words():
+    text = ("alpha " * 20).strip() + "\n\n" + ("beta " * 20).strip()
+    chunks = chunk_text(text, chunk_size=150, chunk_overlap=0, markdown=False)
+    assert [chunk["text"].split()[0] for chunk in chunks] == ["alpha", "beta"]
+    assert all(not chunk["text"].endswith("alph") for chunk in chunks)
+
+
+def test_markdown_sections_are_not_merged_when_large():
+    text = "# Intro\n" + "intro text. " * 20 + "\n## Setup\n" + "setup text. " * 20
+    chunks = chunk_text(text, chunk_size=300, chunk_overlap=0)
+
+    sections = [chunk["section"] for chunk in chunks]
+    assert sections[0] == "Intro" and sections[-1] == "Setup"
+    assert not any("intro" in chunk["text"] and "setup" in chunk["text"] for chunk in chunks)
+
+
+def test_small_markdown_sections_are_packed():
+    text = "# A\none\n# B\ntwo\n"
+    chunks = chunk_text(text, chunk_size=300, chunk_overlap=0)
+    assert len(chunks) == 1 and chunks[0]["section"] == "A"
+
+
+def test_build_chunk_records_ids_and_metadata():
+    text = "# Guide\n" + "step by step. " * 50
+    documents, metadatas, ids = build_chunk_records(text, {"source": "x"}, "doc1", chunk_size=200, chunk_overlap=20)
+
+    assert ids == [f"doc1#{i}" for i in range(len(ids))]
+    assert all(meta["parent_id"] == "doc1" and meta["chunk_count"] == len(ids) for meta in metadatas)
+    assert all(meta["source"] == "x" and meta["section"] == "Guide" for meta in metadatas)
+    # Later chunks start mid-section, so they carry the heading
+    assert documents[1].startswith("[Guide]\n")
+
+
+def test_build_chunk_records_keeps_empty_document():
+    documents, metadatas, ids = build_chunk_records("", {}, "empty")
+    assert documents == [""] and ids == ["empty#0"]
@@ -0,0 +1,40 @@
+import sys
+
+from app.services.context_packer import ContextPacker, TokenCounter
+
+
+def test_token_counter_loads_encoding_on_first_use(monkeypatch):
+    calls = []
+    monkeypatch.setattr(TokenCounter, "_load_encoding", lambda self: calls.append(self.model))
+
+    counter = TokenCounter("gpt-4o-mini")
+    ContextPacker()
+    assert calls == []
+
+    assert counter.count("x" * 40) == 10
+    counter.truncate("abc", 1)
+    assert calls == ["gpt-4o-mini"]
+
+
+def test_token_counter_falls_back_to_character_estimate(monkeypatch):
+    # A None entry makes "import tiktoken" raise ImportError
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    counter = TokenCounter("gpt-4o-mini")
+
+    assert counter.count("x" * 40) == 10
+    assert counter.truncate("abcdefgh", 1) == "abcd"
+
+
+def test_pack_dedupes_and_fits_budget(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    packer = ContextPacker(token_budget=200, max_distance=1.0, dedup_threshold=0.8)
+
+    text = "alpha beta gamma delta " * 20
+    packed = packer.pack([
+        {"collection": "portfolio", "document": text, "metadata": {}, "distance": 0.2},
+        {"collection": "documentation", "document": text, "metadata": {}, "distance": 0.3},
+        {"collection": "custom_docs", "document": "unrelated words here", "metadata": {}, "distance": 0.1},
+    ])
+
+    assert [item["collection"] for item in packed["selected"]] == ["custom_docs", "portfolio"]
+    assert packed["tokens"] <= 200
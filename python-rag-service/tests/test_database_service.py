@@ -0,0 +1,109 @@
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.services.database_service import DatabaseService, naive_utc
+
+START = datetime(2025, 6, 1, 12)
+
+
+class FakeStreamingConnection:
+    """Records the parameters stream_security_logs binds; returns no rows."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def execution_options(self, **options):
+        return self
+
+    async def stream(self, statement, params):
+        self.calls.append(params)
+
+        async def rows():
+            return
+            yield
+
+        return rows()
+
+
+class FakeAsyncEngine:
+    def __init__(self):
+        self.calls = []
+
+    @asynccontextmanager
+    async def connect(self):
+        yield FakeStreamingConnection(self.calls)
+
+
+def test_naive_utc_converts_aware_values():
+    warsaw = timezone(timedelta(hours=2))
+    assert naive_utc(datetime(2025, 6, 1, 14, 0, tzinfo=warsaw)) == datetime(2025, 6, 1, 12, 0)
+    assert naive_utc(datetime(2025, 6, 1, 14, 0)) == datetime(2025, 6, 1, 14, 0)
+
+
+def test_stream_binds_since_as_naive_utc():
+    service = DatabaseService()
+    service._async_engine = FakeAsyncEngine()
+
+    async def drain(**kwargs):
+        return [log async for log in service.stream_security_logs(**kwargs)]
+
+    asyncio.run(drain(since=datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)))
+    asyncio.run(drain())
+
+    assert service._async_engine.calls == [{"since": datetime(2025, 6, 1, 12, 30)}, {}]
+
+
+@pytest.fixture
+def audit_db():
+    """DatabaseService reading a SQLite copy of security_audit_logs."""
+    engine = create_engine("sqlite://", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE security_audit_logs (id TEXT, "sessionId" TEXT, "activityType" TEXT, '
+            'severity TEXT, details TEXT, "ipAddress" TEXT, "userAgent" TEXT, timestamp TIMESTAMP)'
+        ))
+    service = DatabaseService()
+    service._sync_engine = engine
+    return service
+
+
+def insert_logs(service, rows):
+    with service.engine.begin() as conn:
+        for log_id, minutes in rows:
+            conn.execute(
+                text("INSERT INTO security_audit_logs (id, severity, timestamp) VALUES (:id, 'low', :ts)"),
+                {"id": log_id, "ts": START + timedelta(minutes=minutes)},
+            )
+
+
+def test_keyset_pages_cover_every_row_once(audit_db):
+    # b, c and d share a timestamp, so the id breaks the tie across pages
+    insert_logs(audit_db, [("e", 2), ("c", 1), ("a", 0), ("d", 1), ("b", 1)])
+
+    seen, pages = [], 0
+    after_timestamp = after_id = None
+    while True:
+        page = audit_db.get_security_logs_page(after_timestamp, after_id, limit=2)
+        if not page:
+            break
+        pages += 1
+        seen.extend(log["id"] for log in page)
+        after_timestamp = datetime.fromisoformat(page[-1]["timestamp"])
+        after_id = page[-1]["id"]
+
+    assert seen == ["a", "b", "c", "d", "e"]
+    assert pages == 3
+
+
+def test_page_after_a_timestamp_without_id_starts_at_that_timestamp(audit_db):
+    insert_logs(audit_db, [("a", 0), ("b", 1)])
+
+    page = audit_db.get_security_logs_page(START, None)
+
+    # An empty id sorts before every id, so rows at exactly that time are included
+    assert [log["id"] for log in page] == ["a", "b"]
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import documents
+from app.core.config import settings
+
+BOUNDARY = "upload-boundary"
+
+
+def multipart_body(content: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="collection"\r\n\r\ncustom_docs\r\n'
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="notes.txt"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(body: bytes, chunk_size=64 * 1024, content_length=False):
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    async def receive():
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    return Request({"type": "http", "method": "POST", "path": "/upload", "headers": headers}, receive)
+
+
+@pytest.fixture
+def parsers(monkeypatch):
+    """Record the multipart parsers the upload handler creates."""
+    created = []
+
+    class RecordingParser(documents.MultiPartParser):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(documents, "MultiPartParser", RecordingParser)
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE_MB", 1)
+    return created
+
+
+def test_form_within_the_limit_is_parsed(parsers):
+    form = asyncio.run(documents._read_upload_form(make_request(multipart_body(b"hello"))))
+    try:
+        assert form["collection"] == "custom_docs"
+        assert form["file"].filename == "notes.txt"
+    finally:
+        asyncio.run(form.close())
+
+
+def test_oversized_stream_is_cut_off_and_spooled_parts_closed(parsers):
+    request = make_request(multipart_body(b"x" * (3 * 1024 * 1024)))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(documents._read_upload_form(request))
+
+    assert error.value.status_code == 413
+    (parser,) = parsers
+    spooled = parser._files_to_close_on_error
+    assert spooled and all(file.closed for file in spooled)
+
+
+def test_oversized_content_length_is_rejected_before_parsing(parsers):
+    request = make_request(multipart_body(b"x" * (2 * 1024 * 1024)), content_length=True)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(documents._read_upload_form(request))
+
+    assert error.value.status_code == 413
+    assert parsers == []
@@ -0,0 +1,53 @@
+import pytest
+
+from app.services import embedding_cache
+from app.services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: now["t"])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("a", "m", [1.0])
+    cache.put("b", "m", [2.0])
+    assert cache.get("a", "m") == [1.0]
+
+    cache.put("c", "m", [3.0])
+
+    assert cache.get("b", "m") is None
+    assert cache.get("a", "m") == [1.0] and cache.get("c", "m") == [3.0]
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (3, 1, 0.75)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = EmbeddingCache(max_size=10, ttl_seconds=60)
+    cache.put("query", "m", [1.0])
+
+    clock["t"] += 59
+    assert cache.get("query", "m") == [1.0]
+    clock["t"] += 2
+    assert cache.get("query", "m") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_keys_are_normalized_and_scoped_by_model():
+    cache = EmbeddingCache()
+    cache.put("What  did you\nBUILD?", "model-a", [1.0])
+
+    assert cache.get("what did you build?", "model-a") == [1.0]
+    assert cache.get("what did you build?", "model-b") is None
+
+
+def test_zero_size_disables_the_cache():
+    cache = EmbeddingCache(max_size=0)
+    cache.put("a", "m", [1.0])
+
+    assert cache.get("a", "m") is None
+    assert cache.stats()["size"] == 0 and cache.stats()["misses"] == 0
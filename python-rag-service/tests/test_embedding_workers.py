@@ -0,0 +1,184 @@
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import embedding_backends, embedding_workers
+from app.services.embedding_backends import EmbeddingBackend
+from app.services.embedding_workers import EmbeddingWorkerPool, _Worker
+from app.workers.embedding import serve
+
+
+class StubBackend(EmbeddingBackend):
+    """Records batches; 'crash' kills the worker, 'hang' stalls it, gate holds the first batch."""
+
+    def __init__(self):
+        super().__init__("stub-model")
+        self.calls = []
+        self.gate = None
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    @property
+    def dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=32):
+        if "crash" in texts:
+            raise SystemExit(1)
+        if "hang" in texts:
+            self.release.wait(5)
+        if self.gate is not None and not self.started.is_set():
+            self.started.set()
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        return np.full((len(texts), 2), len(self.calls), dtype=np.float32)
+
+
+class ThreadWorker:
+    """A _Worker running serve() in a thread instead of a spawned process."""
+
+    wait_ready = _Worker.wait_ready
+
+    def __init__(self, index, backend, fail=False):
+        self.index = index
+        self.backend = backend
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = threading.Thread(target=self._serve, args=(child_conn, fail), daemon=True)
+        self.process.start()
+
+    @staticmethod
+    def _serve(child_conn, fail):
+        try:
+            if fail:
+                child_conn.send(("error", "RuntimeError: model files missing"))
+            else:
+                serve(child_conn, "stub", "stub-model", 1)
+        except (OSError, SystemExit):
+            pass
+        finally:
+            child_conn.close()
+
+    def kill(self):
+        # A thread can't be killed: let the stalled batch finish into a closed pipe
+        self.backend.release.set()
+        self.conn.close()
+
+    def stop(self):
+        _Worker.stop(self)
+
+
+class ThreadPool(EmbeddingWorkerPool):
+    def __init__(self, backend, workers=1):
+        self.backend = backend
+        self.failing_starts = 0
+        super().__init__(workers, backend_name="stub", model_name="stub-model", threads=1)
+
+    def _start_worker(self, index):
+        fail = self.failing_starts > 0
+        self.failing_starts -= 1
+        return ThreadWorker(index, self.backend, fail=fail)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    stub = StubBackend()
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        monkeypatch.setenv(var, "1")
+    monkeypatch.setattr(settings, "EMBEDDING_ONNX_THREADS", 1)
+    monkeypatch.setattr(embedding_backends, "create_embedding_backend", lambda *args: stub)
+    monkeypatch.setattr(embedding_workers, "create_embedding_backend", lambda *args: stub)
+    return stub
+
+
+@pytest.fixture
+def pool(backend):
+    workers = ThreadPool(backend)
+    yield workers
+    workers.close()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_query_batches_jump_ahead_of_ingest_batches(backend, pool):
+    backend.gate = threading.Event()
+    ingest = threading.Thread(target=pool.encode, args=(["i0", "i1", "i2", "i3", "i4", "i5"], 2))
+    ingest.start()
+    backend.started.wait(5)
+    wait_until(lambda: pool._queue.qsize() == 2)
+
+    query = threading.Thread(target=pool.encode_query, args=(["q"],))
+    query.start()
+    wait_until(lambda: pool._queue.qsize() == 3)
+    backend.gate.set()
+    ingest.join()
+    query.join()
+
+    assert backend.calls == [["i0", "i1"], ["q"], ["i2", "i3"], ["i4", "i5"]]
+    assert pool.info()["query_batches"] == 1
+
+
+def test_dead_worker_is_restarted(backend, pool):
+    with pytest.raises(RuntimeError, match="died"):
+        pool.encode(["crash"])
+
+    assert pool.encode(["after"]).shape == (1, 2)
+    info = pool.info()
+    assert info["restarts"] == 1 and info["errors"] == 1
+    assert info["alive"] == 1 and info["fallback_batches"] == 0
+
+
+def test_hung_worker_is_killed_and_restarted(backend, pool, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_WORKER_BATCH_TIMEOUT_SECONDS", 0.2)
+
+    with pytest.raises(RuntimeError, match="hung"):
+        pool.encode(["hang"])
+
+    assert pool.encode_query(["after"]).shape == (1, 2)
+    info = pool.info()
+    assert info["timeouts"] == 1 and info["restarts"] == 1
+
+
+def test_failed_restart_falls_back_in_process(backend, pool):
+    pool.failing_starts = 1
+    with pytest.raises(RuntimeError, match="died"):
+        pool.encode(["crash"])
+
+    # The slot is backed off: batches are embedded in this process meanwhile
+    assert pool.encode(["during"]).shape == (1, 2)
+    info = pool.info()
+    assert info["unavailable"] == 1 and info["fallback_batches"] == 1
+
+    pool._retry_at[0] = 0.0
+    assert pool.encode(["after"]).shape == (1, 2)
+    info = pool.info()
+    assert info["unavailable"] == 0 and info["restarts"] == 2 and info["fallback_batches"] == 1
+
+
+def test_close_drains_queued_batches(backend, pool):
+    backend.gate = threading.Event()
+    results = []
+    ingest = threading.Thread(target=lambda: results.append(pool.encode(["a", "b", "c", "d", "e", "f"], 2)))
+    ingest.start()
+    backend.started.wait(5)
+    wait_until(lambda: pool._queue.qsize() == 2)
+
+    closer = threading.Thread(target=pool.close)
+    closer.start()
+    backend.gate.set()
+    closer.join()
+    ingest.join()
+
+    assert results[0].shape == (6, 2)
+    assert len(backend.calls) == 3
+    assert not any(worker.process.is_alive() for worker in pool._workers)
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.encode(["late"])
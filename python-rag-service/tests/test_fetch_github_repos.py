@@ -0,0 +1,166 @@
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from scripts import fetch_github_repos
+from scripts.fetch_github_repos import GitHubFetcher
+
+REPOS = [{"name": "newPortfolio", "owner": {"login": "0xjaqbek"}}]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting."""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(fetch_github_repos.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def make_fetcher(handler, cache_path):
+    return GitHubFetcher(
+        "token",
+        base_url="https://github.test",
+        cache_path=str(cache_path),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def run(fetcher, coro_fn):
+    async def main():
+        try:
+            return await coro_fn(fetcher)
+        finally:
+            await fetcher.close()
+    return asyncio.run(main())
+
+
+def test_etag_is_revalidated_and_cached_body_reused(tmp_path):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=REPOS, headers={"ETag": '"v1"'})
+
+    cache_path = tmp_path / "github_cache.json"
+    first = make_fetcher(handler, cache_path)
+    assert run(first, lambda f: f.get_user_repos()) == REPOS
+    assert first.stats["not_modified"] == 0
+
+    # A new fetcher (next refresh) loads the persisted ETag cache
+    second = make_fetcher(handler, cache_path)
+    assert run(second, lambda f: f.get_user_repos()) == REPOS
+    assert second.stats["not_modified"] == 1
+    assert seen == [None, '"v1"']
+
+
+def test_changed_resource_replaces_cache_entry(tmp_path):
+    versions = iter([(200, '"v1"', ["old"]), (200, '"v2"', ["new"]), (304, '"v2"', None)])
+
+    def handler(request):
+        status, etag, body = next(versions)
+        return httpx.Response(status, json=body, headers={"ETag": etag})
+
+    def languages():
+        fetcher = make_fetcher(handler, tmp_path / "cache.json")
+        return run(fetcher, lambda f: f.get_languages("0xjaqbek", "newPortfolio"))
+
+    assert languages() == ["old"]
+    assert languages() == ["new"]
+    assert languages() == ["new"]  # 304 against the updated entry
+
+
+def test_rate_limit_waits_for_reset_then_retries(tmp_path, sleeps):
+    responses = iter([
+        httpx.Response(403, headers={
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 30),
+        }),
+        httpx.Response(200, json=REPOS),
+    ])
+    fetcher = make_fetcher(lambda request: next(responses), tmp_path / "cache.json")
+
+    assert run(fetcher, lambda f: f.get_user_repos()) == REPOS
+    assert fetcher.stats["retries"] == 1
+    assert len(sleeps) == 1 and 25 <= sleeps[0] <= 30
+
+
+def test_retry_after_is_honored_and_capped(tmp_path, sleeps):
+    responses = iter([
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(429, headers={"Retry-After": "3600"}),
+        httpx.Response(200, json=REPOS),
+    ])
+    fetcher = make_fetcher(lambda request: next(responses), tmp_path / "cache.json")
+
+    assert run(fetcher, lambda f: f.get_user_repos()) == REPOS
+    assert sleeps == [2.0, GitHubFetcher.MAX_RETRY_WAIT]
+
+
+def test_forbidden_without_rate_limit_is_not_retried(tmp_path, sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(403, headers={"X-RateLimit-Remaining": "4999"})
+
+    fetcher = make_fetcher(handler, tmp_path / "cache.json")
+
+    assert run(fetcher, lambda f: f.get_user_repos()) == []
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_server_errors_back_off_until_retries_run_out(tmp_path, sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    fetcher = make_fetcher(handler, tmp_path / "cache.json")
+
+    assert run(fetcher, lambda f: f.get_languages("0xjaqbek", "newPortfolio")) == {}
+    assert len(calls) == GitHubFetcher.MAX_RETRIES + 1
+    assert [int(delay) for delay in sleeps] == [1, 2, 4]
+
+
+def test_repo_documents_do_not_change_as_time_passes(monkeypatch):
+    repo = {
+        "name": "newPortfolio",
+        "owner": {"login": "0xjaqbek"},
+        "created_at": "2024-03-01T10:00:00Z",
+        "updated_at": "2024-09-01T10:00:00Z",
+    }
+    timeline = {"first_commit": "2024-03-01T10:05:00Z", "last_commit": "2024-08-30T18:00:00Z"}
+
+    async def fake_fetch(token):
+        return [(repo, timeline, {"Python": 100})]
+
+    synced = []
+    monkeypatch.setattr(fetch_github_repos, "fetch_repos_with_details", fake_fetch)
+    monkeypatch.setattr(
+        fetch_github_repos.chroma_service, "sync_documents", lambda **kwargs: synced.append(kwargs) or {}
+    )
+
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2030, 1, 1, tzinfo=tz)
+
+    fetch_github_repos.embed_github_repos("token")
+    monkeypatch.setattr(fetch_github_repos, "datetime", Later)
+    fetch_github_repos.embed_github_repos("token")
+
+    first, second = synced
+    assert first["documents"] == second["documents"]
+    assert "ago" not in first["documents"][0]
+    assert first["metadatas"][0]["created_at"] == "2024-03-01T10:00:00Z"
+    assert first["metadatas"][0]["last_commit"] == "2024-08-30T18:00:00Z"
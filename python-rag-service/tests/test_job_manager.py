@@ -0,0 +1,129 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import embedding_jobs
+from app.services.chroma_service import chroma_service
+from app.services.job_manager import CANCELLED, SUCCEEDED, JobManager
+
+
+class FakeBackend:
+    """Embedding backend returning zeros; on_batch runs after every encode call."""
+
+    def __init__(self):
+        self.batches = 0
+        self.on_batch = None
+
+    def encode(self, texts, batch_size=32):
+        self.batches += 1
+        if self.on_batch:
+            self.on_batch()
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(chroma_service, "_ready", ready)
+    monkeypatch.setattr(chroma_service, "_embedding_backend", fake)
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "EMBEDDING_WORKERS", 0)
+    return fake
+
+
+@pytest.fixture
+def manager():
+    jobs = JobManager()
+    yield jobs
+    jobs.shutdown()
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.done
+
+
+def test_job_counts_only_its_own_documents(backend, manager):
+    outside = threading.Event()
+
+    def embed_elsewhere():
+        chroma_service.embed_texts(["x"] * 500)
+        outside.set()
+
+    def stage():
+        # Another embedder (e.g. a bulk upload) runs while the stage does
+        thread = threading.Thread(target=embed_elsewhere)
+        thread.start()
+        chroma_service.embed_texts(["doc"] * 25)
+        thread.join()
+
+    job, created = manager.submit("test", [("embed", stage)])
+    wait_for(job)
+
+    assert created and outside.is_set()
+    status = manager.get(job.id)
+    assert status["status"] == SUCCEEDED
+    assert status["stages"][0]["docs"] == 25
+    assert status["docs_embedded"] == 25
+
+
+def test_cancel_takes_effect_between_batches(backend, manager):
+    go = threading.Event()
+    job_holder = {}
+
+    def cancel_after_second_batch():
+        if backend.batches == 2:
+            job_holder["job"].cancel()
+
+    backend.on_batch = cancel_after_second_batch
+
+    def stage():
+        go.wait()
+        # Broad handlers in the stores must not swallow the cancellation
+        try:
+            chroma_service.embed_texts(["doc"] * 100)
+        except Exception:
+            pass
+
+    job, _ = manager.submit("test", [("embed", stage), ("never", lambda: None)])
+    job_holder["job"] = job
+    go.set()
+    wait_for(job)
+
+    status = manager.get(job.id)
+    assert status["status"] == CANCELLED
+    assert backend.batches == 2
+    assert [stage["status"] for stage in status["stages"]] == [CANCELLED, CANCELLED]
+    assert status["stages"][0]["docs"] == 20
+
+
+def test_duplicate_submit_returns_the_running_job(backend, manager):
+    release = threading.Event()
+    first, created = manager.submit("test", [("wait", release.wait)])
+    second, created_again = manager.submit("test", [("wait", release.wait)])
+    release.set()
+    wait_for(first)
+
+    assert created and not created_again
+    assert second is first
+
+
+def test_health_initial_data_job_leaves_out_private_notes(monkeypatch):
+    submitted = {}
+    monkeypatch.setattr(
+        embedding_jobs.job_manager, "submit",
+        lambda kind, stages, on_finish=None: submitted.setdefault(kind, [name for name, _ in stages]),
+    )
+
+    embedding_jobs.submit_initial_data()
+    embedding_jobs.submit_reembed()
+
+    assert submitted["initial_data"] == ["portfolio", "documentation", "security_logs", "github_repos"]
+    assert "private_notes" in submitted["reembed"]
@@ -0,0 +1,35 @@
+from app.services.chroma_service import ChromaService
+from app.services.kb_versions import KnowledgeBaseVersions
+
+
+def test_bumps_from_another_process_are_seen(kb_versions):
+    server = KnowledgeBaseVersions(kb_versions)
+    script = KnowledgeBaseVersions(kb_versions)
+    assert server.get(["portfolio"]) == {"portfolio": 0}
+
+    script.bump("portfolio")
+    script.bump("portfolio")
+
+    assert server.get(["portfolio", "custom_docs"]) == {"portfolio": 2, "custom_docs": 0}
+    assert server.bump("portfolio") == 3
+    assert script.version(["portfolio"]) == 3
+
+
+def test_unreadable_stamp_file_counts_as_empty(kb_versions):
+    with open(kb_versions, "w") as f:
+        f.write("{not json")
+
+    versions = KnowledgeBaseVersions(kb_versions)
+    assert versions.get() == {}
+    assert versions.bump("security_logs") == 1
+
+
+def test_versions_are_tracked_per_collection():
+    chroma = ChromaService()
+    portfolio = chroma.kb_version_for(["portfolio"])
+
+    chroma.bump_kb_version("security_logs")
+
+    assert chroma.kb_version_for(["portfolio"]) == portfolio
+    assert chroma.kb_versions(["security_logs"]) == {"security_logs": 1}
+
@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.chroma_service import ChromaService
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_adds_folded_and_camel_case_parts():
+    terms = tokenize("Protokół skanerLekow snake_case")
+    assert {"protokół", "protokol", "skanerlekow", "skaner", "lekow", "snake", "case"} <= set(terms)
+
+
+def test_bm25_ranks_exact_term_matches_first():
+    index = BM25Index()
+    index.add(
+        ["a", "b", "c"],
+        ["skanerLekow scans medicine labels", "a portfolio website", "medicine and more medicine"],
+    )
+
+    results = index.search("skaner lekow")
+    assert [doc_id for doc_id, _ in results] == ["a"]
+
+    ranked = [doc_id for doc_id, _ in index.search("medicine")]
+    assert ranked == ["c", "a"]
+
+
+def test_bm25_replace_and_remove():
+    index = BM25Index()
+    index.add(["a"], ["old words"])
+    index.add(["a"], ["new words"])
+    assert index.search("old") == []
+    assert [doc_id for doc_id, _ in index.search("new")] == ["a"]
+
+    index.remove(["a"])
+    assert len(index) == 0
+    assert index.search("words") == []
+
+
+def test_bm25_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "portfolio.json")
+    index = BM25Index(path)
+    index.add(["a", "b"], ["hello world", "goodbye world"])
+    index.save()
+
+    loaded = BM25Index.load(path)
+    assert len(loaded) == 2
+    assert loaded.search("hello") == index.search("hello")
+
+
+def test_bm25_flush_writes_only_when_dirty(tmp_path):
+    path = tmp_path / "portfolio.json"
+    index = BM25Index(str(path))
+    index.add(["a"], ["hello"])
+    assert index.dirty
+
+    index.flush()
+    assert path.exists() and not index.dirty
+
+    path.unlink()
+    index.flush()
+    assert not path.exists()
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+    scores = dict(fused)
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["c"] == pytest.approx(1 / 63)
+
+
+@pytest.fixture
+def service(tmp_path):
+    chroma = ChromaService()
+    chroma._lexical = {"portfolio": BM25Index(str(tmp_path / "portfolio.json"))}
+    yield chroma
+    chroma.flush_lexical()
+
+
+def test_lexical_writes_are_flushed_once_after_the_delay(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_FLUSH_SECONDS", 0.05)
+    saves = []
+    index = service._lexical["portfolio"]
+    original_save = index.save
+    monkeypatch.setattr(index, "save", lambda: (saves.append(len(index)), original_save()))
+
+    for i in range(20):
+        service._update_lexical("portfolio", ids=[f"doc{i}"], documents=[f"text {i}"])
+    assert saves == []
+
+    deadline = time.monotonic() + 2
+    while not saves and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saves == [20]
+    assert os.path.exists(tmp_path / "portfolio.json")
+
+
+def test_flush_lexical_writes_pending_changes_immediately(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_FLUSH_SECONDS", 3600)
+    service._update_lexical("portfolio", ids=["a"], documents=["hello"])
+    assert not os.path.exists(tmp_path / "portfolio.json")
+
+    service.flush_lexical()
+    assert BM25Index.load(str(tmp_path / "portfolio.json")).search("hello")
+    assert service._lexical_flush_timer is None
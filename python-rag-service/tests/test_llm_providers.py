@@ -0,0 +1,176 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.http_resilience import CircuitBreaker, RetryPolicy, parse_retry_after
+from app.services.llm_providers import OpenAICompatibleProvider, ProviderError
+
+
+def completion(content="hello"):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.05)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 5)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_RESET_SECONDS", 0.05)
+
+
+def make_provider(handler):
+    return OpenAICompatibleProvider(
+        "mock", "key", "http://llm.test/v1", "mock-model", transport=httpx.MockTransport(handler)
+    )
+
+
+async def ask(provider):
+    return await provider.complete([{"role": "user", "content": "hi"}], 0.0, 10)
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    responses = [httpx.Response(429), httpx.Response(503), completion("ok")]
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return responses[len(calls) - 1]
+
+    provider = make_provider(handler)
+    assert asyncio.run(ask(provider)) == "ok"
+    assert len(calls) == 3
+    assert provider.stats["retries"] == 2
+
+
+def test_gives_up_after_max_retries():
+    provider = make_provider(lambda request: httpx.Response(500))
+    with pytest.raises(ProviderError) as error:
+        asyncio.run(ask(provider))
+    assert error.value.status_code == 500
+    assert provider.stats["failures"] == 1
+
+
+def test_retry_after_above_cap_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "120"})
+
+    with pytest.raises(ProviderError):
+        asyncio.run(ask(make_provider(handler)))
+    assert len(calls) == 1
+
+
+def test_retry_after_within_cap_is_honored():
+    policy = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=10.0)
+    assert policy.delay(0, "2") == 2.0
+    assert policy.delay(0, "11") is None
+    assert policy.delay(3, "2") is None
+    assert parse_retry_after("garbage") is None
+
+
+def test_circuit_opens_and_recovers_after_trial(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    healthy = False
+
+    def handler(request):
+        return completion() if healthy else httpx.Response(503)
+
+    provider = make_provider(handler)
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            asyncio.run(ask(provider))
+    assert provider.circuit.state == "open"
+    assert not provider.available
+
+    with pytest.raises(ProviderError, match="circuit is open"):
+        asyncio.run(ask(provider))
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert provider.circuit.state == "half_open"
+    healthy = True
+    assert asyncio.run(ask(provider)) == "hello"
+    assert provider.circuit.state == "closed"
+
+
+def test_cancelled_half_open_trial_releases_circuit(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    mode = {"value": "fail"}
+
+    async def handler(request):
+        if mode["value"] == "hang":
+            await asyncio.sleep(3600)
+        if mode["value"] == "fail":
+            return httpx.Response(503)
+        return completion("recovered")
+
+    provider = make_provider(handler)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ProviderError):
+                await ask(provider)
+        assert provider.circuit.state == "open"
+        await asyncio.sleep(0.06)
+        assert provider.circuit.state == "half_open"
+
+        # The trial request is cancelled, like a hedge loser or a client disconnect
+        mode["value"] = "hang"
+        trial = asyncio.create_task(ask(provider))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert provider.circuit.state == "half_open"
+        assert provider.available
+        mode["value"] = "ok"
+        assert await ask(provider) == "recovered"
+        assert provider.circuit.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_retried_request_counts_as_one_breaker_failure(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    provider = make_provider(handler)
+    with pytest.raises(ProviderError):
+        asyncio.run(ask(provider))
+
+    assert len(calls) == 3
+    assert provider.circuit.snapshot() == {"state": "closed", "consecutive_failures": 1}
+
+
+def test_transport_errors_count_once_after_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    provider = make_provider(handler)
+    with pytest.raises(ProviderError):
+        asyncio.run(ask(provider))
+
+    assert provider.stats["retries"] == 2 and provider.stats["failures"] == 1
+    assert provider.circuit.snapshot()["consecutive_failures"] == 1
+
+
+def test_breaker_trial_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.allow_request()
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.llm_providers import OpenAICompatibleProvider
+from app.services.llm_service import LLMService
+
+
+@pytest.fixture(autouse=True)
+def fast_hedge(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_MS", 20)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 1)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+
+
+class HangingStream(httpx.AsyncByteStream):
+    """SSE body that never sends a token; records whether it was closed."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        await asyncio.sleep(3600)
+        yield b""
+
+    async def aclose(self):
+        self.closed = True
+
+
+def sse(*deltas):
+    lines = [
+        f'data: {{"choices": [{{"delta": {{"content": "{delta}"}}}}]}}\n\n' for delta in deltas
+    ]
+    return httpx.Response(200, content="".join(lines + ["data: [DONE]\n\n"]).encode())
+
+
+def provider(name, handler):
+    return OpenAICompatibleProvider(
+        name, "key", f"http://{name}.test/v1", "model", transport=httpx.MockTransport(handler)
+    )
+
+
+def half_open(p):
+    p.circuit._opened_at = time.monotonic() - p.circuit.reset_seconds - 1
+
+
+def test_hedge_loser_releases_circuit_trial():
+    async def slow(request):
+        await asyncio.sleep(3600)
+
+    async def fast(request):
+        return httpx.Response(200, json={"choices": [{"message": {"content": "fast"}}]})
+
+    primary, backup = provider("primary", slow), provider("backup", fast)
+    half_open(primary)
+    service = LLMService([primary, backup])
+
+    async def scenario():
+        assert await service.chat_completion([{"role": "user", "content": "hi"}]) == "fast"
+        # The cancelled trial must not leave the primary failing fast
+        assert primary.circuit.allow_request()
+
+    asyncio.run(scenario())
+    assert service.stats["hedge_wins"] == 1
+
+
+def test_hedge_loser_stream_is_closed():
+    hanging = HangingStream()
+
+    async def slow(request):
+        return httpx.Response(200, stream=hanging)
+
+    async def fast(request):
+        return sse("a", "b")
+
+    service = LLMService([provider("primary", slow), provider("backup", fast)])
+
+    async def scenario():
+        deltas = [delta async for delta in service.chat_completion_stream([{"role": "user", "content": "hi"}])]
+        assert deltas == ["a", "b"]
+        assert hanging.closed
+
+    asyncio.run(scenario())
+
+
+def test_failover_when_primary_errors():
+    primary = provider("primary", lambda request: httpx.Response(500))
+    backup = provider("backup", lambda request: httpx.Response(
+        200, json={"choices": [{"message": {"content": "backup"}}]}
+    ))
+    service = LLMService([primary, backup])
+    assert asyncio.run(service.chat_completion([{"role": "user", "content": "hi"}])) == "backup"
+    assert service.stats["failovers"] == 1
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.services.query_router import AhoCorasick, QueryRouter, is_chitchat, normalize_query
+
+
+class FakeChroma:
+    """Just enough of ChromaService for the router: no collections, fixed embeddings."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def kb_version_for(self, collection_names):
+        return 0
+
+    def embed_texts(self, texts):
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def router():
+    return QueryRouter(FakeChroma(), enabled=True, min_similarity=0.5)
+
+
+def test_normalize_query_folds_and_pads():
+    assert normalize_query("Protokół-999, v2!") == " protokol 999 v2 "
+
+
+def test_aho_corasick_matches_whole_words_only():
+    automaton = AhoCorasick()
+    automaton.add("hi", "greeting")
+    automaton.add("sql injection", "attack")
+    automaton.add("injection", "injection")
+    automaton.build()
+
+    assert automaton.find(normalize_query("hi there")) == {"greeting": 1}
+    assert automaton.find(normalize_query("this is history")) == {}
+    assert automaton.find(normalize_query("any SQL injection?")) == {"attack": 1, "injection": 1}
+
+
+@pytest.mark.parametrize("query", ["hi", "Hey!", "thanks a lot", "ok, thank you", "Hello, who are you?"])
+def test_pure_chitchat_skips_retrieval(router, query):
+    plan = router.route(query)
+    assert plan["intents"] == ["chitchat"]
+    assert plan["collections"] == []
+    assert plan["n_results"] == 0
+
+
+@pytest.mark.parametrize("query", [
+    "Hi, what projects have you built?",
+    "thanks, what is Protokół 999?",
+    "ok tell me about your work",
+])
+def test_greeting_with_question_gets_context(router, query):
+    plan = router.route(query)
+    assert plan["intents"] == ["general"]
+    assert plan["collections"]
+    assert plan["n_results"] > 0
+
+
+def test_greeting_with_question_ignores_chitchat_prototype(router, monkeypatch):
+    monkeypatch.setattr(router, "_nearest_prototype", lambda embedding: ("chitchat", 0.9))
+    plan = router.route("hey, what is this site about?", query_embedding=[0.0] * 4)
+    assert "chitchat" not in plan["intents"]
+    assert plan["collections"]
+
+
+def test_greeting_with_keyword_intent(router):
+    plan = router.route("hi, any attacks recently?")
+    assert "security" in plan["intents"]
+    assert "chitchat" not in plan["intents"]
+
+
+def test_is_chitchat():
+    assert is_chitchat(normalize_query("good morning everyone"))
+    assert not is_chitchat(normalize_query("what is okay"))
+    assert not is_chitchat(normalize_query("there"))
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.chroma_service import COLLECTION_NAMES
+from app.services.rag_service import rag_service
+from app.services.security_ingest import security_ingestor
+
+
+def test_response_cache_key_does_not_wait_for_warmup(monkeypatch):
+    monkeypatch.setattr(rag_service.response_cache, "max_size", 10)
+    assert not rag_service.chroma.is_ready
+
+    key = rag_service._response_cache_key([{"role": "user", "content": "hi"}], True, None)
+
+    assert key == ("hi", tuple(sorted(COLLECTION_NAMES)))
+    assert rag_service.chroma._warmup_thread is None
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    """Stub the uncached analysis; set results['next'] to control the next outcome."""
+    results = {"next": {"summary": "ok", "patterns": []}, "calls": 0}
+
+    async def fake_analyze():
+        results["calls"] += 1
+        return results["next"]
+
+    monkeypatch.setattr(rag_service, "_security_analysis", None)
+    monkeypatch.setattr(rag_service, "_security_analysis_task", None)
+    monkeypatch.setattr(rag_service, "_analyze_security_patterns", fake_analyze)
+    monkeypatch.setattr(security_ingestor.rollup, "version", 1)
+    monkeypatch.setattr(security_ingestor.rollup, "total", 10)
+    return results
+
+
+def test_failed_refresh_returns_previous_analysis_as_stale(analysis):
+    async def run():
+        first = await rag_service.analyze_security_patterns()
+        analysis["next"] = {"summary": "Error analyzing security patterns.", "error": "db down"}
+        refreshed = await rag_service.analyze_security_patterns(refresh=True)
+        return first, refreshed
+
+    first, refreshed = asyncio.run(run())
+
+    assert first["stale"] is False and "error" not in first
+    assert refreshed["summary"] == "ok"
+    assert refreshed["stale"] is True
+    assert refreshed["error"] == "db down"
+
+
+def test_analysis_expires_while_rollup_version_is_unchanged(analysis, monkeypatch):
+    async def run():
+        await rag_service.analyze_security_patterns()
+        fresh = await rag_service.analyze_security_patterns()
+        rag_service._security_analysis["computed_at"] -= settings.SECURITY_ANALYSIS_MAX_AGE_SECONDS + 1
+        expired = await rag_service.analyze_security_patterns()
+        await rag_service._security_analysis_task
+        return fresh, expired
+
+    fresh, expired = asyncio.run(run())
+
+    assert fresh["stale"] is False
+    assert expired["stale"] is True
+    assert analysis["calls"] == 2
+
+
+def test_answers_depend_on_searched_and_routing_collections():
+    security = {"route": {"collections": ["security_logs"], "method": "keywords"}}
+    disabled = {"route": {"collections": ["security_logs"], "method": "disabled"}}
+
+    assert rag_service._answer_sources(None, security) == ["custom_docs", "portfolio", "security_logs"]
+    assert rag_service._answer_sources(None, disabled) == ["security_logs"]
+    assert rag_service._answer_sources(["documentation"], security) == ["documentation"]
+    assert rag_service._answer_sources(None, {"sources": []}) is None
+
+
+def test_collections_are_queried_concurrently_in_order(monkeypatch):
+    names = ["portfolio", "documentation", "custom_docs"]
+    # Every lookup blocks until all of them are running at once
+    barrier = threading.Barrier(len(names), timeout=5)
+    calls = []
+
+    def fake_retrieve(collection_name, query_text, query_embedding, temporal_info=None, n_results=10):
+        calls.append((collection_name, tuple(query_embedding), threading.current_thread().name))
+        barrier.wait()
+        # Finish in reverse order
+        time.sleep(0.01 * (len(names) - names.index(collection_name)))
+        return {"documents": [collection_name], "metadatas": [{}], "distances": [0.1]}
+
+    monkeypatch.setattr(rag_service, "_retrieve", fake_retrieve)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        results = await rag_service._retrieve_all(names, "query", [0.5, 0.5])
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+
+    assert [r["documents"] for r in results] == [[name] for name in names]
+    # One shared embedding, looked up on the retrieval pool, event loop left free
+    assert {embedding for _, embedding, _ in calls} == {(0.5, 0.5)}
+    assert all(thread.startswith("retrieval") for _, _, thread in calls)
+    assert ticks > 1
@@ -0,0 +1,92 @@
+import pytest
+
+from app.services import reranker as reranker_module
+from app.services.reranker import Reranker
+
+
+class FakeCrossEncoder:
+    """Scores a document by its length; each batch takes batch_ms on the fake clock."""
+
+    def __init__(self, clock, batch_ms=0.0, fail=False):
+        self.clock = clock
+        self.batch_ms = batch_ms
+        self.fail = fail
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        if self.fail:
+            raise RuntimeError("out of memory")
+        self.batches.append(pairs)
+        self.clock["t"] += self.batch_ms / 1000
+        return [float(len(document)) for _, document in pairs]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 100.0}
+    monkeypatch.setattr(reranker_module.time, "monotonic", lambda: now["t"])
+    return now
+
+
+def candidates():
+    # Vector order: a, bb, ccc, dddd (the cross-encoder prefers longer documents)
+    return [
+        {"document": "ccc", "distance": 0.3},
+        {"document": "a", "distance": 0.1},
+        {"document": "dddd", "distance": 0.4},
+        {"document": "bb", "distance": 0.2},
+    ]
+
+
+def make_reranker(model, **kwargs):
+    reranker = Reranker(enabled=True, batch_size=2, timeout_ms=50, max_candidates=3, **kwargs)
+    reranker._model = model
+    return reranker
+
+
+def test_candidates_are_reordered_within_the_budget(clock):
+    reranker = make_reranker(FakeCrossEncoder(clock, batch_ms=10))
+
+    reranked, info = reranker.rerank("query", candidates())
+
+    # Only the 3 nearest are scored; the rest follow in distance order
+    assert [c["document"] for c in reranked] == ["ccc", "bb", "a", "dddd"]
+    assert "rerank_score" not in reranked[-1]
+    assert info["reranked"] and info["scored"] == 3
+    assert reranker.stats["reranked"] == 1
+
+
+def test_timeout_falls_back_to_vector_order(clock):
+    model = FakeCrossEncoder(clock, batch_ms=60)
+    reranker = make_reranker(model)
+    original = candidates()
+
+    reranked, info = reranker.rerank("query", original)
+
+    # The second batch is never scored once the first used up the budget
+    assert len(model.batches) == 1
+    assert reranked is original
+    assert info == {"reranked": False, "candidates": 4, "reason": "timeout", "elapsed_ms": 60.0}
+    assert reranker.stats["timeouts"] == 1
+
+
+def test_model_errors_fall_back_to_vector_order(clock):
+    reranker = make_reranker(FakeCrossEncoder(clock, fail=True))
+    original = candidates()
+
+    reranked, info = reranker.rerank("query", original)
+
+    assert reranked is original and info["reason"] == "error"
+    assert reranker.stats["errors"] == 1
+
+
+def test_unloaded_model_starts_loading_and_keeps_order(monkeypatch):
+    reranker = Reranker(enabled=True)
+    started = []
+    monkeypatch.setattr(reranker, "start_loading", lambda: started.append(True))
+    original = candidates()
+
+    reranked, info = reranker.rerank("query", original)
+
+    assert reranked is original and info["reason"] == "model_loading"
+    assert started == [True] and reranker.stats["not_loaded"] == 1
@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.response_cache import SemanticResponseCache
+
+COLLECTIONS = ("custom_docs", "documentation", "portfolio", "security_logs")
+QUERY = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+
+
+def test_hit_requires_a_similar_query_and_the_same_collection_set():
+    cache = SemanticResponseCache(max_size=4, similarity_threshold=0.9)
+    cache.put(QUERY, COLLECTIONS, {}, "answer", {})
+
+    assert cache.get(QUERY, COLLECTIONS, {})["response"] == "answer"
+    assert cache.get(np.array([0.0, 1.0, 0.0, 0.0]), COLLECTIONS, {}) is None
+    assert cache.get(QUERY, ("portfolio",), {}) is None
+
+
+def test_writes_to_unused_collections_keep_the_answer():
+    cache = SemanticResponseCache(max_size=4)
+    versions = {"portfolio": 3, "security_logs": 7}
+    cache.put(QUERY, COLLECTIONS, versions, "answer", {}, depends_on=["portfolio"])
+
+    assert cache.get(QUERY, COLLECTIONS, {"portfolio": 3, "security_logs": 8}) is not None
+    assert cache.get(QUERY, COLLECTIONS, {"portfolio": 4, "security_logs": 8}) is None
+
+
+def test_without_depends_on_every_requested_collection_counts():
+    cache = SemanticResponseCache(max_size=4)
+    cache.put(QUERY, COLLECTIONS, {"portfolio": 1}, "answer", {})
+
+    assert cache.get(QUERY, COLLECTIONS, {"portfolio": 1}) is not None
+    # A first write to a collection that had none yet
+    assert cache.get(QUERY, COLLECTIONS, {"portfolio": 1, "documentation": 1}) is None
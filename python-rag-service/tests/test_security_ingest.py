@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services import security_ingest
+from app.services.security_ingest import SecurityLogIngestor
+
+START = datetime(2025, 1, 1, 12)
+
+
+def row(log_id, minutes):
+    return {
+        "id": log_id,
+        "sessionId": "s",
+        "activityType": "prompt_injection",
+        "severity": "high",
+        "details": {},
+        "ipAddress": "203.0.113.7",
+        "userAgent": "curl",
+        "timestamp": (START + timedelta(minutes=minutes)).isoformat(),
+    }
+
+
+class FakeDatabase:
+    """Committed audit log rows, paged like get_security_logs_page."""
+
+    def __init__(self):
+        self.rows = []
+
+    def get_security_logs_page(self, after_timestamp=None, after_id=None, limit=500):
+        ordered = sorted(self.rows, key=lambda r: (datetime.fromisoformat(r["timestamp"]), r["id"]))
+        if after_timestamp is not None:
+            ordered = [
+                r for r in ordered
+                if (datetime.fromisoformat(r["timestamp"]), r["id"]) > (after_timestamp, after_id)
+            ]
+        return ordered[:limit]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    db = FakeDatabase()
+    embedded = []
+    chroma = security_ingest.chroma_service
+    monkeypatch.setattr(security_ingest, "db_service", db)
+    monkeypatch.setattr(chroma, "wait_until_ready", lambda timeout=None: None)
+    monkeypatch.setattr(chroma, "get_collection_count", lambda name: len(embedded))
+    monkeypatch.setattr(chroma, "flush_lexical", lambda: None)
+    monkeypatch.setattr(chroma, "sync_documents", lambda **kwargs: embedded.extend(kwargs["ids"]) or {})
+    monkeypatch.setattr(settings, "SECURITY_INGEST_OVERLAP_SECONDS", 300)
+    db.embedded = embedded
+    return db
+
+
+def make_ingestor(tmp_path, batch_size=2):
+    ingestor = SecurityLogIngestor(state_path=str(tmp_path / "state.json"))
+    ingestor.batch_size = batch_size
+    return ingestor
+
+
+def test_row_committing_after_a_later_row_is_ingested_once(database, tmp_path):
+    database.rows = [row("a", 0), row("c", 2)]
+    ingestor = make_ingestor(tmp_path)
+    assert ingestor.run_once()["ingested"] == 2
+
+    # Stamped between a and c, but committed after c was ingested
+    database.rows.append(row("b", 1))
+    database.rows.append(row("d", 3))
+    result = ingestor.run_once()
+
+    assert result["ingested"] == 2
+    assert "b" in database.embedded
+    assert ingestor.rollup.total == 4
+    assert ingestor.watermark == {"timestamp": row("d", 3)["timestamp"], "id": "d"}
+
+    # Re-reading the overlap window never counts a row twice
+    assert ingestor.run_once()["ingested"] == 0
+    assert ingestor.rollup.total == 4
+    logs = [log_id for log_id in database.embedded if log_id != security_ingest.SUMMARY_ID]
+    assert sorted(logs) == ["a", "b", "c", "d"]
+
+
+def test_seen_ids_are_persisted_and_pruned(database, tmp_path):
+    database.rows = [row("a", 0), row("b", 10)]
+    make_ingestor(tmp_path).run_once()
+
+    # A fresh process loads the window from the state file
+    restarted = make_ingestor(tmp_path)
+    assert restarted.recent_ids == {"b": row("b", 10)["timestamp"]}
+    assert restarted.run_once()["ingested"] == 0
+    assert restarted.rollup.total == 2
+
+
+def test_run_is_skipped_while_another_process_holds_the_state(database, tmp_path):
+    database.rows = [row("a", 0)]
+    other = make_ingestor(tmp_path)
+    lock_file = other._acquire_state_lock()
+    try:
+        result = make_ingestor(tmp_path).run_once()
+    finally:
+        lock_file.close()
+
+    assert result == {"skipped": True, "reason": "running_in_another_process"}
+    assert make_ingestor(tmp_path).run_once()["ingested"] == 1
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.security_rollup import HOUR_FORMAT, AttackRollup
+
+
+def log(activity_type, severity, hours_ago=0):
+    timestamp = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {"activityType": activity_type, "severity": severity, "timestamp": timestamp.isoformat()}
+
+
+def test_apply_counts_groups_and_bumps_version():
+    rollup = AttackRollup()
+    assert rollup.apply([log("xss", "high"), log("xss", "high"), log("sqli", "critical")]) == 3
+    assert rollup.apply([]) == 0
+
+    assert rollup.total == 3
+    assert rollup.version == 1
+    assert [(p["activityType"], p["count"]) for p in rollup.patterns()] == [("xss", 2), ("sqli", 1)]
+    assert rollup.totals() == {
+        "by_type": {"xss": 2, "sqli": 1},
+        "by_severity": {"high": 2, "critical": 1},
+    }
+
+
+def test_last_occurrence_is_the_newest_timestamp():
+    rollup = AttackRollup()
+    newest, older = log("xss", "high", 1), log("xss", "high", 5)
+    rollup.apply([newest, older])
+    assert rollup.patterns()[0]["last_occurrence"] == newest["timestamp"]
+
+
+def test_trend_buckets_and_filters():
+    rollup = AttackRollup()
+    rollup.apply([log("xss", "high", 0), log("xss", "low", 0), log("sqli", "high", 2)])
+
+    hourly = rollup.trend(hours=3)
+    assert len(hourly) == 3
+    assert [bucket["count"] for bucket in hourly] == [1, 0, 2]
+    assert hourly[-1]["by_type"] == {"xss": 2}
+
+    assert [bucket["count"] for bucket in rollup.trend(hours=3, severity="high")] == [1, 0, 1]
+    assert sum(bucket["count"] for bucket in rollup.trend(hours=3, activity_type="sqli")) == 1
+    assert sum(bucket["count"] for bucket in rollup.trend(hours=48, bucket="day")) == 3
+
+
+def test_old_hours_are_pruned():
+    rollup = AttackRollup(retention_days=1)
+    rollup.apply([log("xss", "high", 72), log("xss", "high", 0)])
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=1)).strftime(HOUR_FORMAT)
+    assert all(hour >= cutoff for hour in rollup.hourly)
+    # Totals keep every log; only the hourly series is bounded
+    assert rollup.total == 2
+
+
+def test_round_trip():
+    rollup = AttackRollup()
+    rollup.apply([log("xss", "high")])
+
+    restored = AttackRollup()
+    restored.load(rollup.to_dict())
+    assert restored.to_dict() == rollup.to_dict()
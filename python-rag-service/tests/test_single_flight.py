@@ -0,0 +1,107 @@
+import asyncio
+
+from app.services.rag_service import rag_service
+from app.services.single_flight import SingleFlight, flight_key
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return {"answer": 42}
+
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+        return flights, calls, results
+
+    flights, calls, results = asyncio.run(run())
+
+    assert calls == [1]
+    assert [shared for _, shared in results] == [False, True, True]
+    assert flights.get_stats() == {"executed": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_cancelled_caller_does_not_cancel_the_flight():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first, await second
+
+    first, second = asyncio.run(run())
+
+    assert first.cancelled()
+    assert second == ("done", True)
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    async def run():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(
+            flights.do("key", work), flights.do("key", work), return_exceptions=True
+        )
+        return flights, results
+
+    flights, results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.get_stats()["in_flight"] == 0
+
+
+def test_flight_key_ignores_dict_order():
+    assert flight_key("chat", {"a": 1, "b": 2}) == flight_key("chat", {"b": 2, "a": 1})
+    assert flight_key("chat", "x") != flight_key("search", "x")
+
+
+def test_coalesced_callers_get_their_own_copies(monkeypatch):
+    monkeypatch.setattr(rag_service, "_flights", SingleFlight())
+
+    async def fake_chat(messages, use_rag, collections):
+        await asyncio.sleep(0.01)
+        return {"response": "hi", "metadata": {"sources": []}}
+
+    async def fake_search(query, collection_name, n_results):
+        await asyncio.sleep(0.01)
+        return [{"document": "doc", "distance": 0.1}]
+
+    monkeypatch.setattr(rag_service, "_chat", fake_chat)
+    monkeypatch.setattr(rag_service, "_search_similar", fake_search)
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def run():
+        chats = await asyncio.gather(*[rag_service.chat(messages) for _ in range(2)])
+        searches = await asyncio.gather(*[rag_service.search_similar("q", "portfolio") for _ in range(2)])
+        return chats, searches
+
+    (first, second), (mine, theirs) = asyncio.run(run())
+    assert rag_service._flights.get_stats()["coalesced"] == 2
+
+    assert "coalesced" not in first["metadata"]
+    assert second["metadata"]["coalesced"] is True
+    assert first["metadata"] is not second["metadata"]
+
+    # One caller editing its results doesn't change what the other got
+    mine[0]["document"] = "changed by one caller"
+    assert theirs[0]["document"] == "doc"
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from app.services.temporal_index import recency_note, to_epoch
+
+
+def test_to_epoch_parses_github_timestamps():
+    assert to_epoch("1970-01-02T00:00:00Z") == 86400
+    assert to_epoch("not a date") is None
+    assert to_epoch(None) is None
+
+
+def test_recency_note_is_relative_to_query_time():
+    metadata = {"created_at_ts": to_epoch("2024-01-01T00:00:00Z"), "last_commit_ts": to_epoch("2024-12-22T00:00:00Z")}
+    now = datetime(2025, 1, 1, 12).timestamp()
+
+    note = recency_note(metadata, now=now)
+    assert note.startswith("- Age (as of 2025-01-01): ")
+    assert "created 1 year(s) and 0 month(s) ago" in note
+    assert "last commit 10 days ago" in note
+
+
+def test_recency_note_needs_epoch_fields():
+    assert recency_note({"created_at": "2024-01-01T00:00:00Z"}) is None